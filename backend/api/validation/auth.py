@@ -44,6 +44,27 @@ class ResetPasswordData(BaseModel):
             raise ValueError('Password mismatch.')
 
 
+class NewUserCredentials(BaseModel):
+    """Model to validate user credentials to create user."""
+
+    username: str
+    password1: str
+    password2: str
+
+    @validator('password1')
+    def validate_password_strength(cls, password):
+        """Validate password format."""
+        validate_password_format(password)
+        return password
+
+    @validator('password2')
+    def validate_passwords_match(cls, password2, values):
+        """Validate password confirmation."""
+        password1 = values.get('password1')
+        if password1 != password2:
+            raise ValueError('Passwords mismatch.')
+
+
 def validate_password_format(password: str, pattern: Optional[str] = None):
     """Validate password by regexp pattern."""
     pattern = pattern or AUTH_CONFIG['PASSWORD_PATTERN']
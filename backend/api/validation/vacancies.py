@@ -23,6 +23,7 @@ class BaseVacancy(BaseModel):
     source: Optional[HttpUrl]
     source_name: Optional[str] = SELF_SOURCE_NAME
     description: Optional[str]
+    region: Optional[str]
     is_published: Optional[bool]
 
     @validator('source')
@@ -97,6 +98,7 @@ class SearchOptions(BaseModel):
     date_from: Optional[date]
     date_to: Optional[date]
     search_query: Optional[str]
+    region: Optional[str]
     published_only: Optional[bool]
 
     @validator('date_from', pre=True)
@@ -109,6 +111,7 @@ class PublicFilterOptions(BaseModel):
     """Model to validate filter options for public API."""
 
     modified_at: Optional[date]
+    region: Optional[str]
 
     @validator('modified_at', pre=True)
     def validate_modified_at_format(cls, modified_at):
@@ -120,6 +123,7 @@ class PrivateFilterOptions(BaseModel):
     """Model to validate filter options for private API."""
     
     source_name: Optional[str]
+    region: Optional[str]
     is_published: Optional[bool]
     modified_at: Optional[date]
 
@@ -0,0 +1 @@
+"""Benchmarks for ingestion path, run them against separate database."""
@@ -0,0 +1,80 @@
+"""
+Compare extractors of vacancies from saved farpost.ru pages.
+
+Usage: python -m benchmarks.farpost_extraction -d <directory with *.html pages>
+
+Pages can be saved from farpost.ru with "--fetch <pages count>",
+cookies are taken from jobparser/cookies/farpost.json like in parser.
+Every extractor processes every page "--repeat" times, CPU time
+of the current process is reported per page.
+"""
+import asyncio
+import click
+import time
+from pathlib import Path
+from typing import List
+
+from jobparser.client import create_client_session
+from jobparser.extractors import FARPOST_EXTRACTORS
+from jobparser.parsers import FarpostParser
+
+from config import PARSERS_CONFIG
+
+
+DEFAULT_PAGES_DIR = Path(__file__).parent.parent.joinpath(
+    'tests', 'test_unit', 'test_jobparser', 'data',
+)
+
+
+async def fetch_pages(directory: Path, pages_count: int) -> None:
+    """Save pages of farpost.ru vacancies to directory."""
+    directory.mkdir(parents=True, exist_ok=True)
+    async with create_client_session() as session:
+        parser = FarpostParser(session, PARSERS_CONFIG['farpost'])
+        cookies = await parser.load_cookies()
+        for page in range(1, pages_count + 1):
+            markup = await parser.get_html(parser.get_page_url(page), cookies=cookies)
+            directory.joinpath('farpost_{0}.html'.format(page)).write_text(markup)
+
+
+def measure_cpu_time(extractor_name: str, pages: List[str], repeat: int) -> float:
+    """Return CPU seconds spent by extractor per page."""
+    extractor = FARPOST_EXTRACTORS[extractor_name]
+    start = time.process_time()
+    for _ in range(repeat):
+        for markup in pages:
+            extractor(markup, FarpostParser.base_url, FarpostParser.name)
+    return (time.process_time() - start) / (repeat * len(pages))
+
+
+@click.command()
+@click.option(
+    '-d', '--directory',
+    type=click.Path(file_okay=False, path_type=Path),
+    default=DEFAULT_PAGES_DIR,
+    show_default=True,
+    help='Directory with saved farpost.ru pages.',
+)
+@click.option('-n', '--repeat', type=int, default=20, show_default=True)
+@click.option('--fetch', type=int, default=0, help='Save this number of pages before run.')
+def main(directory: Path, repeat: int, fetch: int):
+    """Compare CPU time of lxml and BeautifulSoup extractors per page."""
+    if fetch:
+        asyncio.run(fetch_pages(directory, fetch))
+
+    pages = [path.read_text() for path in sorted(directory.glob('*.html'))]
+    if not pages:
+        raise click.ClickException('No *.html pages in {0}'.format(directory))
+
+    click.echo('{0} pages, {1:.0f} KB on average'.format(
+        len(pages),
+        sum(len(markup) for markup in pages) / len(pages) / 1024,
+    ))
+    click.echo('{0:>10} {1:>16}'.format('extractor', 'CPU ms per page'))
+    for extractor_name in FARPOST_EXTRACTORS.keys():
+        cpu_time = measure_cpu_time(extractor_name, pages, repeat)
+        click.echo('{0:>10} {1:>16.2f}'.format(extractor_name, cpu_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
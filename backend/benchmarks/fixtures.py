@@ -0,0 +1,127 @@
+"""
+Recorded responses of parsers sources.
+
+Responses are saved to directory once with real requests and then
+are served by stand-in server, see benchmarks.standin.
+Response is identified by parser name, path relative to "parse_url"
+of parser and query params, except params depending on current time.
+"""
+from yarl import URL
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+from jobparser.base import BaseParser
+
+
+DEFAULT_FIXTURES_DIR = Path(__file__).parent.joinpath('fixtures')
+
+MANIFEST_FILE = 'manifest.json'
+
+# Params which change between runs, they are not part of response key
+VOLATILE_PARAMS = frozenset((
+    'access_token',
+    'date_from',
+    'date_published_from',
+    'start_time',
+))
+
+
+class RecordedResponse(NamedTuple):
+    """Response saved to fixtures directory."""
+
+    status: int
+    content_type: str
+    encoding: str
+    file: str
+
+
+def get_response_key(parse_url: str, url: URL) -> str:
+    """Return key of request url relative to parse url of parser."""
+    base_path = URL(parse_url).path.rstrip('/')
+    path = url.path[len(base_path):] if url.path.startswith(base_path) else url.path
+    query = sorted(
+        (name, value) for name, value in url.query.items()
+        if name not in VOLATILE_PARAMS
+    )
+    return '{0}?{1}'.format(path.rstrip('/'), '&'.join('='.join(item) for item in query))
+
+
+class FixtureStore:
+    """Directory with recorded responses and manifest of them."""
+
+    def __init__(self, directory: Path) -> None:
+        """Initialization, manifest is loaded if it exists."""
+        self.directory = Path(directory)
+        self.manifest: Dict[str, Dict[str, RecordedResponse]] = {}
+
+        manifest_path = self.directory.joinpath(MANIFEST_FILE)
+        if manifest_path.exists():
+            manifest = json.loads(manifest_path.read_text())
+            self.manifest = {
+                parser_name: {
+                    key: RecordedResponse(**response) for key, response in responses.items()
+                }
+                for parser_name, responses in manifest.items()
+            }
+
+    def add(
+        self,
+        parser_name: str,
+        key: str,
+        status: int,
+        content_type: str,
+        encoding: str,
+        body: bytes
+    ) -> None:
+        """Save response body and add it to manifest."""
+        file = '{0}/{1}'.format(parser_name, hashlib.sha1(key.encode()).hexdigest())
+        body_path = self.directory.joinpath(file)
+        body_path.parent.mkdir(parents=True, exist_ok=True)
+        body_path.write_bytes(body)
+        self.manifest.setdefault(parser_name, {})[key] = RecordedResponse(
+            status, content_type, encoding, file,
+        )
+
+    def get(self, parser_name: str, key: str) -> Optional[RecordedResponse]:
+        """Return recorded response, None if it was not recorded."""
+        return self.manifest.get(parser_name, {}).get(key)
+
+    def read_body(self, response: RecordedResponse) -> bytes:
+        """Return body of recorded response."""
+        return self.directory.joinpath(response.file).read_bytes()
+
+    def save_manifest(self) -> None:
+        """Write manifest to directory."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            parser_name: {key: response._asdict() for key, response in responses.items()}
+            for parser_name, responses in self.manifest.items()
+        }
+        self.directory.joinpath(MANIFEST_FILE).write_text(
+            json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True),
+        )
+
+
+def record_responses(parser: BaseParser, store: FixtureStore) -> None:
+    """Save every successful response of parser to store."""
+    send = parser.send
+
+    async def recording_send(url, headers, **kwargs):
+        result = await send(url, headers, **kwargs)
+        status, body, encoding, response_headers = result
+        if status == 200:
+            request_url = URL(url).update_query(kwargs.get('params') or {})
+            store.add(
+                parser.name,
+                get_response_key(parser.parse_url, request_url),
+                status,
+                response_headers.get('Content-Type', 'application/octet-stream'),
+                encoding,
+                body,
+            )
+        return result
+
+    parser.send = recording_send
@@ -0,0 +1,125 @@
+"""
+Import time of CLI commands.
+
+Usage: python -m benchmarks.importtime [-c create_user] [--repeat 3]
+
+Commands of main.py import modules inside their functions. Modules of command
+are found in source of command function and functions of main.py called by it,
+then "import main" and these modules are run with "python -X importtime"
+in clean interpreter. The best total time of "--repeat" runs is compared
+with budget of command, exit code is 1 if any command is over budget.
+"""
+import ast
+import click
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Set
+
+
+MAIN_PATH = Path(__file__).parent.parent.joinpath('main.py')
+
+# Milliseconds of imports of command, "import main" is included
+IMPORT_BUDGETS = {
+    'create_user': 600,
+    'drop_expired_vacancies': 600,
+    'ingest_report': 600,
+    'init_db': 1000,
+    'load_vacancies': 1000,
+    'reparse': 1000,
+    'run_app': 900,
+    'run_parsers': 1000,
+    'schedule': 1000,
+    'update_vacancies': 1000,
+}
+DEFAULT_BUDGET = 1000
+
+
+def _get_command_name(function: ast.FunctionDef) -> str:
+    """Return name of click command from decorator of function, None if it is not command."""
+    for decorator in function.decorator_list:
+        if (
+            isinstance(decorator, ast.Call)
+            and isinstance(decorator.func, ast.Attribute)
+            and decorator.func.attr == 'command'
+        ):
+            for keyword in decorator.keywords:
+                if keyword.arg == 'name':
+                    return keyword.value.value
+            return function.name
+    return None
+
+
+def get_commands_modules(source: str) -> Dict[str, Set[str]]:
+    """Return modules imported by every command of main.py source."""
+    functions = {
+        node.name: node for node in ast.parse(source).body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    }
+
+    def collect(function, modules: Set[str], seen: Set[str]) -> None:
+        seen.add(function.name)
+        for node in ast.walk(function):
+            if isinstance(node, ast.Import):
+                modules.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                modules.add(node.module)
+            elif isinstance(node, ast.Name) and node.id in functions and node.id not in seen:
+                collect(functions[node.id], modules, seen)
+
+    commands = {}
+    for function in functions.values():
+        command_name = _get_command_name(function)
+        if command_name is not None:
+            modules = set()
+            collect(function, modules, set())
+            commands[command_name] = modules
+    return commands
+
+
+def measure_imports(modules: List[str]) -> float:
+    """Return milliseconds of "import main" and modules in clean interpreter."""
+    code = '; '.join('import {0}'.format(module) for module in ['main'] + modules)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=MAIN_PATH.parent,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    total = 0
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", nested ones are indented
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit() and not parts[2].startswith('  '):
+            total += int(parts[1])
+    return total / 1000
+
+
+@click.command()
+@click.option('-c', '--commands', multiple=True, help='Commands to measure, all by default.')
+@click.option('-n', '--repeat', type=click.IntRange(min=1), default=3, show_default=True)
+def main(commands: List[str], repeat: int):
+    """Measure import time of CLI commands and compare it with budgets."""
+    commands_modules = get_commands_modules(MAIN_PATH.read_text())
+    over_budget = False
+    click.echo('{0:<24} {1:>8} {2:>8}  {3}'.format('command', 'ms', 'budget', 'modules'))
+    for command_name in commands or sorted(commands_modules):
+        modules = sorted(commands_modules[command_name])
+        milliseconds = min(measure_imports(modules) for _ in range(repeat))
+        budget = IMPORT_BUDGETS.get(command_name, DEFAULT_BUDGET)
+        over_budget = over_budget or milliseconds > budget
+        click.echo('{0:<24} {1:>8.1f} {2:>8}  {3}'.format(
+            command_name,
+            milliseconds,
+            budget,
+            click.style(', '.join(modules), fg='red' if milliseconds > budget else None),
+        ))
+
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
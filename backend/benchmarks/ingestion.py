@@ -0,0 +1,144 @@
+"""
+Compare ways to save vacancies to database.
+
+Usage: python -m benchmarks.ingestion -r 10000 -r 100000
+
+Benchmark creates database "<POSTGRES_DB>_bench" and drops it at the end.
+Every path saves generated vacancies twice: to empty table (inserts)
+and then the same vacancies again (updates).
+"""
+from aiopg.sa import create_engine
+
+from sqlalchemy import text
+
+import psycopg2
+
+import asyncio
+import click
+import time
+from typing import Callable, Dict, List
+from unittest import mock
+
+from core.db import utils
+from core.services.vacancies import (
+    create_or_update_vacancy,
+    create_or_update_vacancy_batch,
+    create_vacancies_staging,
+    copy_vacancies_to_staging,
+    merge_staging_vacancies,
+)
+
+from config import POSTGRES_CONFIG, INGESTION_CONFIG
+
+
+PAGE_SIZE = 100
+
+
+def generate_vacancies(rows: int) -> List[Dict[str, str]]:
+    """Return fake vacancies split to pages like parsers return them."""
+    return [
+        {
+            'name': 'Vacancy number {0}'.format(i),
+            'source': 'https://bench.ru/vacancy/{0}'.format(i),
+            'source_name': 'bench',
+        } for i in range(rows)
+    ]
+
+
+async def save_rowwise(dsn: str, vacancies: List[Dict[str, str]]) -> None:
+    """Save vacancies with one upsert per row."""
+    async with create_engine(dsn) as aio_engine:
+        async with aio_engine.acquire() as conn:
+            for vacancy in vacancies:
+                await create_or_update_vacancy(conn, **vacancy)
+
+
+async def save_batch(dsn: str, vacancies: List[Dict[str, str]]) -> None:
+    """Save vacancies with multi-row upsert per page."""
+    async with create_engine(dsn) as aio_engine:
+        async with aio_engine.acquire() as conn:
+            for i in range(0, len(vacancies), PAGE_SIZE):
+                await create_or_update_vacancy_batch(
+                    conn,
+                    vacancies[i:i + PAGE_SIZE],
+                    chunk_size=INGESTION_CONFIG['chunk_size'],
+                )
+
+
+async def save_copy(dsn: str, vacancies: List[Dict[str, str]]) -> None:
+    """Save vacancies with COPY per page to staging table and one merge."""
+    conn = psycopg2.connect(dsn)
+    try:
+        cursor = conn.cursor()
+        create_vacancies_staging(cursor)
+        for i in range(0, len(vacancies), PAGE_SIZE):
+            copy_vacancies_to_staging(cursor, vacancies[i:i + PAGE_SIZE])
+        merge_staging_vacancies(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+SAVE_PATHS = {
+    'rowwise': save_rowwise,
+    'batch': save_batch,
+    'copy': save_copy,
+}
+
+
+async def truncate_vacancies(dsn: str) -> None:
+    """Remove all vacancies."""
+    async with create_engine(dsn) as aio_engine:
+        async with aio_engine.acquire() as conn:
+            await conn.execute(text('TRUNCATE vacancies RESTART IDENTITY'))
+
+
+async def measure(save: Callable, dsn: str, vacancies: List[Dict[str, str]]) -> float:
+    """Return seconds spent on saving vacancies."""
+    start = time.perf_counter()
+    await save(dsn, vacancies)
+    return time.perf_counter() - start
+
+
+async def run_benchmark(dsn: str, rows_list: List[int]) -> None:
+    """Run every saving path for every number of rows and output results."""
+    click.echo('{0:>8} {1:>8} {2:>10} {3:>10} {4:>12}'.format(
+        'rows', 'path', 'insert, s', 'update, s', 'rows/s'
+    ))
+    for rows in rows_list:
+        vacancies = generate_vacancies(rows)
+        for path_name, save in SAVE_PATHS.items():
+            await truncate_vacancies(dsn)
+            insert_time = await measure(save, dsn, vacancies)
+            update_time = await measure(save, dsn, vacancies)
+            click.echo('{0:>8} {1:>8} {2:>10.2f} {3:>10.2f} {4:>12.0f}'.format(
+                rows,
+                path_name,
+                insert_time,
+                update_time,
+                2 * rows / (insert_time + update_time),
+            ))
+
+
+@click.command()
+@click.option(
+    '-r', '--rows',
+    type=int,
+    multiple=True,
+    default=[10000, 100000],
+    help='Number of vacancies to save.',
+)
+def main(rows: List[int]):
+    """Compare row-wise, batched and COPY saving paths."""
+    bench_db_name = '{0}_bench'.format(POSTGRES_CONFIG['POSTGRES_DB'])
+    with mock.patch.dict(POSTGRES_CONFIG, {'POSTGRES_DB': bench_db_name}):
+        utils.create_db()
+        try:
+            utils.apply_migrations()
+            asyncio.run(run_benchmark(utils.get_postgres_dsn(), list(rows)))
+        finally:
+            utils.drop_db()
+
+
+if __name__ == '__main__':
+    main()
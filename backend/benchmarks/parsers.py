@@ -0,0 +1,213 @@
+"""
+Benchmark of parsers on recorded responses.
+
+Usage:
+    python -m benchmarks.parsers record -p hh -p superjob
+    python -m benchmarks.parsers run --latency 0.05 --failure-rate 0.05
+
+"record" runs parsers against real sources once and saves their responses
+to fixtures directory. "run" serves saved responses from local stand-in server
+and runs every recorded parser and then all of them together like "run_parsers".
+Every run is made in separate process to measure its peak memory.
+"""
+from aiohttp import web
+
+import asyncio
+import click
+import json
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+from unittest import mock
+
+from benchmarks.fixtures import DEFAULT_FIXTURES_DIR, FixtureStore, record_responses
+from benchmarks.standin import (
+    StandinState,
+    create_standin_app,
+    get_standin_configs,
+    get_standin_host,
+)
+
+from jobparser.cache import PARSERS_CACHE_CONFIG
+from jobparser.client import create_client_session
+from jobparser.parsers import FarpostParser
+from jobparser.registry import get_parser_class
+from jobparser.utils import run_parsers
+
+from config import PARSERS_CONFIG
+
+
+fixtures_dir_option = click.option(
+    '-d', '--directory',
+    type=click.Path(file_okay=False, path_type=Path),
+    default=DEFAULT_FIXTURES_DIR,
+    show_default=True,
+    help='Directory of recorded responses.',
+)
+
+
+async def record_parsers(store: FixtureStore, parsers: List[str]) -> None:
+    """Run parsers against real sources and save their responses."""
+    async with create_client_session() as session:
+        for parser_name in parsers:
+            config = PARSERS_CONFIG[parser_name]
+            parser = get_parser_class(parser_name, config)(session, config)
+            record_responses(parser, store)
+            vacancies = await parser.get_vacancies()
+            click.echo('{0}: {1} vacancies, {2} responses recorded'.format(
+                parser_name,
+                len(vacancies),
+                len(store.manifest.get(parser_name, {})),
+            ))
+
+
+async def measure_run(parsers_config: Dict[str, Dict], parsers: List[str]) -> Dict:
+    """Run parsers with "run_parsers" and return vacancies count and time."""
+    async def load_cookies(self):
+        return {}
+
+    with mock.patch.dict(PARSERS_CONFIG, parsers_config, clear=True), \
+            mock.patch.object(FarpostParser, 'load_cookies', load_cookies):
+        started_at = time.monotonic()
+        results = await run_parsers(parsers)
+        seconds = time.monotonic() - started_at
+
+    return {
+        'vacancies': sum(len(vacancies) for vacancies in results),
+        'seconds': seconds,
+        # Kilobytes on Linux
+        'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+async def run_in_process(base_urls: Dict[str, str], parsers: List[str], rate_limit: bool) -> Dict:
+    """Run parsers in child process and return its measurements."""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, '-m', 'benchmarks.parsers', 'run-one',
+        '--base-urls', json.dumps(base_urls),
+        *['--parsers={0}'.format(parser_name) for parser_name in parsers],
+        '--rate-limit' if rate_limit else '--no-rate-limit',
+        stdout=asyncio.subprocess.PIPE,
+    )
+    stdout, _ = await process.communicate()
+    if process.returncode != 0:
+        raise click.ClickException('Benchmark of {0} failed'.format(', '.join(parsers)))
+    return json.loads(stdout)
+
+
+async def run_benchmark(
+    store: FixtureStore,
+    parsers: List[str],
+    latency: float,
+    failure_rate: float,
+    seed: int,
+    rate_limit: bool
+) -> None:
+    """Start stand-in server and benchmark parsers one by one and all together."""
+    state = StandinState(store, latency, failure_rate, seed)
+    runner = web.AppRunner(create_standin_app(state))
+    await runner.setup()
+
+    base_urls = {}
+    for index, parser_name in enumerate(parsers):
+        site = web.TCPSite(runner, get_standin_host(index), 0)
+        await site.start()
+        host, port = runner.addresses[-1][:2]
+        base_urls[parser_name] = 'http://{0}:{1}'.format(host, port)
+
+    click.echo('{0:>10} {1:>10} {2:>8} {3:>10} {4:>10} {5:>9} {6:>12}'.format(
+        'parser', 'vacancies', 'pages', 'vacancy/s', 'page/s', 'failures', 'peak RSS, MB'
+    ))
+    runs = [[parser_name] for parser_name in parsers]
+    if len(parsers) > 1:
+        runs.append(parsers)
+    try:
+        for run_parsers_names in runs:
+            state.reset_counters()
+            result = await run_in_process(base_urls, run_parsers_names, rate_limit)
+            pages = sum(state.pages.values())
+            click.echo('{0:>10} {1:>10} {2:>8} {3:>10.1f} {4:>10.1f} {5:>9} {6:>12.1f}'.format(
+                run_parsers_names[0] if len(run_parsers_names) == 1 else 'all',
+                result['vacancies'],
+                pages,
+                result['vacancies'] / result['seconds'],
+                pages / result['seconds'],
+                sum(state.failures.values()),
+                result['max_rss'] / 1024,
+            ))
+            if state.missing:
+                click.echo('Not recorded requests: {0}'.format(dict(state.missing)))
+    finally:
+        await runner.cleanup()
+
+
+@click.group()
+def cli():
+    """Record responses of sources and benchmark parsers on them."""
+
+
+@cli.command()
+@fixtures_dir_option
+@click.option('-p', '--parsers', multiple=True, help='Parsers to record, active ones by default.')
+def record(directory: Path, parsers: List[str]):
+    """Save responses of real sources to fixtures directory."""
+    if not parsers:
+        parsers = [name for name, config in PARSERS_CONFIG.items() if config['is_active']]
+
+    store = FixtureStore(directory)
+    with mock.patch.dict(PARSERS_CACHE_CONFIG, {'is_active': False}):
+        asyncio.run(record_parsers(store, parsers))
+    store.save_manifest()
+
+
+@cli.command()
+@fixtures_dir_option
+@click.option('-p', '--parsers', multiple=True, help='Parsers to run, recorded ones by default.')
+@click.option('--latency', type=float, default=0, show_default=True, help='Seconds.')
+@click.option('--failure-rate', type=float, default=0, show_default=True)
+@click.option('--seed', type=int, default=0, show_default=True)
+@click.option(
+    '--rate-limit/--no-rate-limit',
+    default=False,
+    show_default=True,
+    help='Keep "rate_limit" options of parsers.',
+)
+def run(
+    directory: Path,
+    parsers: List[str],
+    latency: float,
+    failure_rate: float,
+    seed: int,
+    rate_limit: bool
+):
+    """Benchmark parsers on stand-in server."""
+    store = FixtureStore(directory)
+    if not parsers:
+        parsers = sorted(store.manifest.keys())
+    if not parsers:
+        raise click.ClickException('No recorded responses in {0}'.format(directory))
+
+    asyncio.run(run_benchmark(store, parsers, latency, failure_rate, seed, rate_limit))
+
+
+@cli.command(name='run-one', hidden=True)
+@click.option('--base-urls', required=True, help='Json with stand-in url of every parser.')
+@click.option('-p', '--parsers', multiple=True, required=True)
+@click.option('--rate-limit/--no-rate-limit', default=False)
+def run_one(base_urls: str, parsers: List[str], rate_limit: bool):
+    """Run parsers on stand-in server and print measurements as json."""
+    parsers_config = get_standin_configs(json.loads(base_urls), PARSERS_CONFIG)
+    for parser_name, config in parsers_config.items():
+        config['is_active'] = parser_name in parsers
+        if not rate_limit:
+            config.pop('rate_limit', None)
+
+    with mock.patch.dict(PARSERS_CACHE_CONFIG, {'is_active': False}):
+        result = asyncio.run(measure_run(parsers_config, list(parsers)))
+    click.echo(json.dumps(result))
+
+
+if __name__ == '__main__':
+    cli()
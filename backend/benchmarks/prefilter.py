@@ -0,0 +1,144 @@
+"""
+Round trips saved by known vacancies prefilter on a daily run.
+
+Usage: python -m benchmarks.prefilter -r 10000 --changed 0.05 --new 0.1
+
+Benchmark creates database "<POSTGRES_DB>_bench" and drops it at the end.
+Generated vacancies are saved once as the previous run, then the daily run
+is saved by writers of ingestion with and without prefilter: most vacancies are
+the same, "--changed" part of them has new name and "--new" part is added.
+Statements sent to database by writers are counted. Near-duplicates detection
+is disabled: generated names are almost the same, so every page would be
+compared with the whole table.
+"""
+from aiopg.sa import SAConnection, create_engine
+
+from sqlalchemy import text
+
+import asyncio
+import click
+import time
+from typing import Dict, List
+from unittest import mock
+
+from benchmarks.ingestion import PAGE_SIZE, generate_vacancies
+from core.db import utils
+from jobparser.prefilter import load_known_vacancies
+from jobparser.utils import IngestionStats, write_vacancies
+
+from config import POSTGRES_CONFIG, INGESTION_CONFIG, DEDUP_CONFIG
+
+
+def generate_daily_run(
+    previous: List[Dict[str, str]],
+    changed: float,
+    new: float
+) -> List[Dict[str, str]]:
+    """Return vacancies of previous run with changed part and new vacancies."""
+    changed_count = int(len(previous) * changed)
+    run = [
+        dict(vacancy, name='{0} (changed)'.format(vacancy['name']))
+        if i < changed_count else vacancy
+        for i, vacancy in enumerate(previous)
+    ]
+    run.extend(generate_vacancies(len(previous) + int(len(previous) * new))[len(previous):])
+    return run
+
+
+async def save_run(dsn: str, vacancies: List[Dict[str, str]], prefilter: bool) -> Dict:
+    """Save vacancies by pages with writers of ingestion, return counters of saving."""
+    executed = 0
+    execute = SAConnection.execute
+
+    def counting_execute(conn, *args, **kwargs):
+        nonlocal executed
+        executed += 1
+        return execute(conn, *args, **kwargs)
+
+    async with create_engine(dsn) as aio_engine:
+        start = time.perf_counter()
+        known = None
+        if prefilter:
+            known = await load_known_vacancies(aio_engine, INGESTION_CONFIG['prefilter_days'] or 1)
+
+        stats = IngestionStats('bench')
+        queue = asyncio.Queue()
+        for i in range(0, len(vacancies), PAGE_SIZE):
+            page = [dict(vacancy) for vacancy in vacancies[i:i + PAGE_SIZE]]
+            stats.page_queued(len(page))
+            queue.put_nowait((stats, page))
+        queue.put_nowait(None)
+
+        with mock.patch.object(SAConnection, 'execute', counting_execute):
+            await write_vacancies(aio_engine, queue, known)
+
+    return {
+        'statements': executed,
+        'upserted': stats.created + stats.updated,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+async def reset_vacancies(dsn: str, previous: List[Dict[str, str]]) -> None:
+    """Save vacancies of previous run to empty table."""
+    async with create_engine(dsn) as aio_engine:
+        async with aio_engine.acquire() as conn:
+            await conn.execute(text('TRUNCATE vacancies RESTART IDENTITY'))
+    await save_run(dsn, previous, prefilter=False)
+    async with create_engine(dsn) as aio_engine:
+        async with aio_engine.acquire() as conn:
+            # Previous run was yesterday, so vacancies are touched by daily run
+            await conn.execute(text("UPDATE vacancies SET modified_at = modified_at - 1"))
+
+
+async def run_benchmark(dsn: str, rows_list: List[int], changed: float, new: float) -> None:
+    """Save daily run with and without prefilter for every number of rows."""
+    click.echo('{0:>8} {1:>10} {2:>11} {3:>9} {4:>9}'.format(
+        'rows', 'prefilter', 'statements', 'upserted', 'seconds'
+    ))
+    for rows in rows_list:
+        previous = generate_vacancies(rows)
+        daily_run = generate_daily_run(previous, changed, new)
+        results = {}
+        for prefilter in (False, True):
+            await reset_vacancies(dsn, previous)
+            results[prefilter] = await save_run(dsn, daily_run, prefilter)
+            click.echo('{0:>8} {1:>10} {2:>11} {3:>9} {4:>9.2f}'.format(
+                len(daily_run),
+                'on' if prefilter else 'off',
+                results[prefilter]['statements'],
+                results[prefilter]['upserted'],
+                results[prefilter]['seconds'],
+            ))
+        click.echo('{0:>8} {1:>10} {2:>11}'.format(
+            '', 'saved', results[False]['statements'] - results[True]['statements'],
+        ))
+
+
+@click.command()
+@click.option(
+    '-r', '--rows',
+    type=int,
+    multiple=True,
+    default=[10000, 100000],
+    help='Number of vacancies of previous run.',
+)
+@click.option('--changed', type=float, default=0.05, show_default=True,
+              help='Part of vacancies changed since previous run.')
+@click.option('--new', type=float, default=0.1, show_default=True,
+              help='Part of new vacancies relative to previous run.')
+def main(rows: List[int], changed: float, new: float):
+    """Count statements of daily run saved with and without prefilter."""
+    bench_db_name = '{0}_bench'.format(POSTGRES_CONFIG['POSTGRES_DB'])
+    with mock.patch.dict(POSTGRES_CONFIG, {'POSTGRES_DB': bench_db_name}), \
+            mock.patch.dict(DEDUP_CONFIG, {'is_active': False}):
+        utils.create_db()
+        try:
+            utils.apply_migrations()
+            asyncio.run(run_benchmark(utils.get_postgres_dsn(), list(rows), changed, new))
+        finally:
+            utils.drop_db()
+
+
+if __name__ == '__main__':
+    main()
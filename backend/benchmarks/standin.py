@@ -0,0 +1,108 @@
+"""
+Stand-in server of parsers sources.
+
+Server serves recorded responses at "/<parser name>/<path relative to parse_url>"
+with configurable latency and rate of temporary failures.
+"""
+from aiohttp import web
+
+import asyncio
+import random
+from collections import Counter
+from typing import Dict, Optional
+
+from benchmarks.fixtures import FixtureStore, get_response_key
+
+
+STANDIN_KEY = 'standin'
+
+
+class StandinState:
+    """Options and counters of stand-in server."""
+
+    def __init__(
+        self,
+        store: FixtureStore,
+        latency: float = 0,
+        failure_rate: float = 0,
+        seed: Optional[int] = None
+    ) -> None:
+        """
+        Initialization.
+
+        :param latency: Seconds before every response.
+        :param failure_rate: Share of requests answered with 503.
+        """
+        self.store = store
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.pages = Counter()
+        self.failures = Counter()
+        self.missing = Counter()
+
+    def reset_counters(self) -> None:
+        """Reset counters before next run."""
+        self.pages.clear()
+        self.failures.clear()
+        self.missing.clear()
+
+
+async def serve_recorded_response(request: web.Request) -> web.Response:
+    """Return recorded response for parser from url."""
+    state: StandinState = request.app[STANDIN_KEY]
+    parser_name = request.match_info['parser']
+
+    if state.latency:
+        await asyncio.sleep(state.latency)
+
+    if state.random.random() < state.failure_rate:
+        state.failures[parser_name] += 1
+        return web.Response(status=503)
+
+    key = get_response_key('/{0}'.format(parser_name), request.rel_url)
+    response = state.store.get(parser_name, key)
+    if response is None:
+        state.missing[parser_name] += 1
+        raise web.HTTPNotFound()
+
+    state.pages[parser_name] += 1
+    return web.Response(
+        status=response.status,
+        body=state.store.read_body(response),
+        headers={'Content-Type': response.content_type},
+    )
+
+
+def create_standin_app(state: StandinState) -> web.Application:
+    """Create application of stand-in server."""
+    app = web.Application()
+    app[STANDIN_KEY] = state
+    app.router.add_get('/{parser}', serve_recorded_response)
+    app.router.add_get('/{parser}/{path:.*}', serve_recorded_response)
+    return app
+
+
+def get_standin_host(index: int) -> str:
+    """
+    Return loopback address for parser with index.
+
+    Every parser has own address, because rate limiters of parsers are per host.
+    """
+    return '127.0.0.{0}'.format(index + 1)
+
+
+def get_standin_configs(base_urls: Dict[str, str], parsers_config: Dict[str, Dict]) -> Dict[str, Dict]:
+    """
+    Return configs of parsers with "parse_url" pointing to stand-in server.
+
+    :param base_urls: Url of stand-in server for every parser.
+    """
+    configs = {}
+    for parser_name, base_url in base_urls.items():
+        config = parsers_config[parser_name]
+        parse_url = '{0}/{1}'.format(base_url.rstrip('/'), parser_name)
+        if config['parse_url'].endswith('/'):
+            parse_url += '/'
+        configs[parser_name] = dict(config, parse_url=parse_url)
+    return configs
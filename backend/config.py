@@ -19,14 +19,43 @@ PARSERS_CONFIG = {
         "secret_key": env.str('SJ_SECRET_KEY'),
         "id": 1091,
         "v": "2.33",
+        "concurrency": 4, # Max number of pages loaded at once
+        "rate_limit": {
+            "rate": 5, # Requests per second
+            "burst": 5,
+            "latency_threshold": 5, # Seconds, slower responses decrease concurrency
+        },
+        # Parser is run once per region, "name" is saved to vacancies, see REGIONS
+        "regions": [
+            {"name": "khabarovsk", "town": 56},
+        ],
         "is_active": True
     },
     "farpost": {
-        "parse_url": "https://www.farpost.ru/khabarovsk/job/vacancy",
+        "parse_url": "https://www.farpost.ru/{path}/job/vacancy", # "path" of region
+        "regions": [
+            {"name": "khabarovsk", "path": "khabarovsk"},
+        ],
+        "rate_limit": {
+            "rate": 0.4, # Requests per second
+            "burst": 1,
+            "max_concurrency": 1,
+        },
+        "extractor": "lxml", # "lxml" or "bs4", BeautifulSoup is also used if lxml fails
+        "extract_in_process": True, # Extract vacancies in EXTRACTION_CONFIG process pool
         "is_active": False
     },
     "hh": {
         "parse_url": "https://api.hh.ru/vacancies/",
+        "concurrency": 4,
+        "rate_limit": {
+            "rate": 5,
+            "burst": 5,
+            "latency_threshold": 5,
+        },
+        "regions": [
+            {"name": "khabarovsk", "area": 102, "text": "Хабаровск"},
+        ],
         "is_active": True
     },
     "vk": {
@@ -34,10 +63,110 @@ PARSERS_CONFIG = {
         "client_id": env.str('VK_CLIENT_ID'),
         "access_token": env.str('VK_ACCESS_TOKEN'),
         "v": 5.95,
+        "regions": [
+            {"name": "khabarovsk", "query": "#РаботаХабаровск"},
+        ],
+        # Posts are dropped if they match some block rule and no allow rule, see jobparser.phrases
+        "posts_filter": {
+            "block_reposts": True,
+            "block": {
+                "resume": ["#резюме", "ищу работу", "ищу подработку"],
+                "ads": ["#реклама", "на правах рекламы", "розыгрыш"],
+            },
+            "allow": {
+                "vacancy": ["#вакансия", "требуется", "требуются", "приглашаем на работу"],
+            },
+        },
         "is_active": True
     }
 }
 
+# Regions parsed by one deployment, regions of parsers config which are not listed are skipped
+REGIONS = env.list('REGIONS', default=['khabarovsk'])
+
+# Region of parsers without "regions" in config
+DEFAULT_REGION = 'khabarovsk'
+
+PARSERS_CACHE_CONFIG = {
+    "is_active": env.bool('PARSERS_CACHE', default=True),
+    "directory": env.path('PARSERS_CACHE_DIR', default=BASE_DIR.joinpath('.parsers_cache')),
+    "max_size": 50 * 1024 * 1024, # Bytes
+}
+
+# Raw responses of parsers for "python main.py reparse", see jobparser.archive
+RESPONSE_ARCHIVE_CONFIG = {
+    "is_active": env.bool('RESPONSE_ARCHIVE', default=False),
+    "directory": env.path(
+        'RESPONSE_ARCHIVE_DIR', default=BASE_DIR.joinpath('.responses_archive')
+    ),
+    "compresslevel": 6, # Gzip level of archived bodies
+}
+
+HTTP_CLIENT_CONFIG = {
+    "limit": 32, # Max number of open connections of parsers session
+    # Max connections per host, None - max concurrency of active parsers
+    "limit_per_host": None,
+    "ttl_dns_cache": 300, # Seconds
+    "keepalive_timeout": 30, # Seconds
+    "json_decoder": "orjson", # "orjson" or "json", json is used if orjson is not installed
+    # Max requests in flight of all parsers, it is split between worker processes,
+    # None - only rate limits of sources
+    "concurrency_budget": 16,
+}
+
+# Modes of saving parsed vacancies, see jobparser.utils.ingest_vacancies
+INGESTION_MODES = ('upsert', 'copy')
+
+INGESTION_CONFIG = {
+    "queue_size": 16, # Max number of parsed pages waiting to be saved
+    "writers": 2, # Number of concurrent database writers
+    "chunk_size": 500, # Max number of vacancies in one upsert statement
+    "deadline": None, # Seconds of fetching for the whole run, parsers may have own "deadline"
+    "prefilter_days": 3, # Days of modified vacancies known before upsert, None to disable
+}
+
+EXTRACTION_CONFIG = {
+    "max_workers": 2, # Processes extracting vacancies from html pages
+}
+
+DEDUP_CONFIG = {
+    "is_active": True,
+    # Signature options, vacancies saved with other options are not comparable
+    "num_perm": 64, # Length of MinHash signature
+    "bands": 16, # LSH bands, num_perm must be divisible by bands
+    "shingle_size": 5, # Characters
+    "seed": 1,
+    "batch_size": 128, # Vacancies hashed at once
+    "threshold": 0.7, # Share of equal signature values of duplicates
+    # "link" - save duplicate with reference to the first vacancy, "suppress" - delete it
+    "action": "link",
+}
+
+ENRICHMENT_CONFIG = {
+    # Load descriptions of vacancies created by run from parsers which support it
+    "is_active": env.bool('ENRICHMENT', default=False),
+    "concurrency": 4, # Descriptions loaded at once by parser, rate limit of source is kept
+    "batch_size": 50, # Descriptions saved with one statement
+    "max_vacancies": 500, # Max number of vacancies enriched by one run of parser
+}
+
+METRICS_CONFIG = {
+    # Prometheus textfile with metrics of the last ingestion runs, not written if not set
+    "textfile": env.path('PROMETHEUS_TEXTFILE', default=None),
+}
+
+SCHEDULER_CONFIG = {
+    "expire_interval": 24 * 3600, # Seconds between clean ups of expired vacancies
+    # Default schedule of parsers, can be updated with "schedule" in parser config
+    "parsers": {
+        "interval": 3600, # Seconds before the first and next runs
+        "min_interval": 15 * 60,
+        "max_interval": 24 * 3600,
+        "busy_threshold": 50, # Created vacancies to halve interval
+        "idle_factor": 1.5, # Interval multiplier after run without new vacancies
+    },
+}
+
 VACANCY_EXPIRED = timedelta(days=4*2) # Clean vacancies every 2 mounth
 
 
@@ -102,6 +231,11 @@ LOG_CONFIG = {
             'handlers': ['server'],  # Log server errors
             'level': 'ERROR',
             'propagate': False
-        }
+        },
+        'jobparser': {
+            'handlers': ['file'],  # Log results of parsers runs
+            'level': 'INFO',
+            'propagate': False
+        },
     }
 }
@@ -0,0 +1,49 @@
+"""Add regions of vacancies, checkpoints and ingestion runs
+
+Revision ID: a8e4c6f1d3b7
+Revises: f3c7a9d2b5e8
+Create Date: 2026-10-19 09:41:27.305918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8e4c6f1d3b7'
+down_revision = 'f3c7a9d2b5e8'
+branch_labels = None
+depends_on = None
+
+# All vacancies and runs before regions are of Khabarovsk
+REGION = 'khabarovsk'
+
+
+def upgrade():
+    op.add_column('vacancies', sa.Column('region', sa.String(length=32), nullable=True))
+    op.execute("UPDATE vacancies SET region = '{0}'".format(REGION))
+    op.create_index('vacancies_region_idx', 'vacancies', ['region'], unique=False)
+
+    op.add_column('ingestion_runs', sa.Column('region', sa.String(length=32), nullable=True))
+    op.execute("UPDATE ingestion_runs SET region = '{0}'".format(REGION))
+
+    op.add_column(
+        'parser_checkpoints',
+        sa.Column('region', sa.String(length=32), server_default=REGION, nullable=False),
+    )
+    op.alter_column('parser_checkpoints', 'region', server_default=None)
+    op.drop_constraint('parser_checkpoints_pkey', 'parser_checkpoints', type_='primary')
+    op.create_primary_key('parser_checkpoints_pkey', 'parser_checkpoints', ['parser_name', 'region'])
+
+
+def downgrade():
+    # Checkpoint of default region is kept for every parser
+    op.execute("DELETE FROM parser_checkpoints WHERE region != '{0}'".format(REGION))
+    op.drop_constraint('parser_checkpoints_pkey', 'parser_checkpoints', type_='primary')
+    op.create_primary_key('parser_checkpoints_pkey', 'parser_checkpoints', ['parser_name'])
+    op.drop_column('parser_checkpoints', 'region')
+
+    op.drop_column('ingestion_runs', 'region')
+
+    op.drop_index('vacancies_region_idx', table_name='vacancies')
+    op.drop_column('vacancies', 'region')
@@ -2,11 +2,11 @@
 Database schema description.
 """
 from sqlalchemy import (
-    MetaData, Table, Column, Computed,
-    Integer, String, Date, Boolean, Index
+    MetaData, Table, Column, Computed, ForeignKey,
+    Integer, BigInteger, Float, String, Text, Date, DateTime, Boolean, Index
 )
 from sqlalchemy import text
-from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR
 
 from datetime import datetime
 
@@ -29,8 +29,29 @@ vacancies_table = Table(
     Column('source_name', String(16), nullable=False),
     Column('description', String(1024), nullable=True),
     Column('is_published', Boolean, server_default='t', nullable=False),
-    Column('search_index', TSVECTOR, Computed(text("to_tsvector('russian', name)"))),
-    Index('vacancies_idx_column', 'search_index', postgresql_using='gin')
+    # Region of source, see jobparser.regions
+    Column('region', String(32), nullable=True),
+    Column(
+        'search_index',
+        TSVECTOR,
+        Computed(text("to_tsvector('russian', name || ' ' || coalesce(description, ''))")),
+    ),
+    # Near-duplicates detection, see jobparser.dedup
+    Column('minhash', ARRAY(Integer), nullable=True, info={'is_internal': True}),
+    Column('lsh_bands', ARRAY(BigInteger), nullable=True, info={'is_internal': True}),
+    # Hash of content fields, unchanged vacancies are not rewritten by ingestion
+    Column('content_hash', BigInteger, nullable=True, info={'is_internal': True}),
+    # Time when description was loaded from source, see jobparser.enrichment
+    Column('enriched_at', DateTime(timezone=True), nullable=True, info={'is_internal': True}),
+    Column(
+        'duplicate_of',
+        Integer,
+        ForeignKey('vacancies.id', ondelete='SET NULL'),
+        nullable=True,
+    ),
+    Index('vacancies_idx_column', 'search_index', postgresql_using='gin'),
+    Index('vacancies_lsh_bands_idx', 'lsh_bands', postgresql_using='gin'),
+    Index('vacancies_region_idx', 'region'),
 )
 
 
@@ -48,3 +69,54 @@ jwt_blacklist_table = Table(
     metadata,
     Column('token', String(256), primary_key=True),
 )
+
+
+parser_checkpoints_table = Table(
+    'parser_checkpoints',
+    metadata,
+    Column('parser_name', String(16), primary_key=True),
+    Column('region', String(32), primary_key=True),
+    Column('last_seen_at', DateTime(timezone=True), nullable=False),
+)
+
+
+ingestion_runs_table = Table(
+    'ingestion_runs',
+    metadata,
+    Column('id', Integer, primary_key=True),
+    Column('parser_name', String(16), nullable=False),
+    Column('region', String(32), nullable=True),
+    Column('started_at', DateTime(timezone=True), nullable=False),
+    Column('finished_at', DateTime(timezone=True), nullable=False),
+    Column('pages', Integer, nullable=False),
+    Column('requests', Integer, nullable=False),
+    Column('http_errors', Integer, nullable=False),
+    Column('bytes', BigInteger, nullable=False),
+    # Fetch latency percentiles in seconds, NULL if parser sent no requests
+    Column('latency_p50', Float, nullable=True),
+    Column('latency_p90', Float, nullable=True),
+    Column('latency_p99', Float, nullable=True),
+    Column('created', Integer, nullable=False),
+    Column('updated', Integer, nullable=False),
+    Column('skipped', Integer, nullable=False),
+    Column('duplicates', Integer, nullable=False),
+    Column('enriched', Integer, server_default='0', nullable=False),
+    Column('rejected', Integer, server_default='0', nullable=False),
+    Column('error', Text, nullable=True),
+    # Parser was stopped by deadline, not all vacancies were fetched
+    Column('is_truncated', Boolean, server_default='f', nullable=False),
+    Index('ingestion_runs_parser_name_started_at_idx', 'parser_name', 'started_at'),
+)
+
+
+vacancy_rejects_table = Table(
+    'vacancy_rejects',
+    metadata,
+    Column('id', Integer, primary_key=True),
+    Column('parser_name', String(16), nullable=False),
+    Column('reason', String(256), nullable=False),
+    # Vacancy as parser returned it
+    Column('data', JSONB, nullable=False),
+    Column('created_at', DateTime(timezone=True), server_default=text('now()'), nullable=False),
+    Index('vacancy_rejects_parser_name_created_at_idx', 'parser_name', 'created_at'),
+)
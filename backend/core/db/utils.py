@@ -1,9 +1,6 @@
 """
 Utils to operate with database.
 """
-from alembic.config import Config
-from alembic.command import upgrade
-
 from psycopg2.errors import UniqueViolation
 
 from sqlalchemy import create_engine, Table, Column
@@ -34,6 +31,13 @@ def except_tsvector_columns(table: Table) -> List[Column]:
     return list(filter(lambda c: not isinstance(c.type, TSVECTOR), table.c))
 
 
+def except_internal_columns(table: Table) -> List[Column]:
+    """Return table columns except tsvector columns and columns marked as internal."""
+    return [
+        c for c in except_tsvector_columns(table) if not c.info.get('is_internal', False)
+    ]
+
+
 def parse_unique_violation_fields(error: UniqueViolation) -> Dict[str, str]:
     """Parse UniqueViolation error and return field that did not passed constraint."""
     field_str_list = re.findall(r'\(.+\)=\(.+\)', error.pgerror)
@@ -84,7 +88,10 @@ def drop_db(**options) -> None:
 
 
 def apply_migrations():
-    """Apply database migrations."""
+    """Apply database migrations, alembic is imported only by this command."""
+    from alembic.command import upgrade
+    from alembic.config import Config
+
     alembic_config = Config(str(BASE_DIR.joinpath('alembic.ini')))
     alembic_config.set_main_option('sqlalchemy.url', get_postgres_dsn())
     upgrade(alembic_config, 'head')
@@ -0,0 +1,48 @@
+"""
+Business logic to operate with parsers checkpoints.
+
+Checkpoint is publication time of the newest vacancy seen by parser in region,
+next run of parser in this region requests only vacancies published after it.
+"""
+from aiopg.sa import SAConnection
+
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from datetime import datetime
+from typing import Optional
+
+from core.db.schema import parser_checkpoints_table
+
+
+async def get_checkpoint(conn: SAConnection, parser_name: str, region: str) -> Optional[datetime]:
+    """Return checkpoint of parser in region or None if parser has no checkpoint."""
+    stmt = select(parser_checkpoints_table.c.last_seen_at).filter_by(
+        parser_name=parser_name,
+        region=region,
+    )
+    result = await conn.execute(stmt)
+    return await result.scalar()
+
+
+async def save_checkpoint(
+    conn: SAConnection,
+    parser_name: str,
+    region: str,
+    last_seen_at: datetime
+) -> None:
+    """Save checkpoint of parser in region, checkpoint is never moved back."""
+    insert_stmt = pg_insert(parser_checkpoints_table).values(
+        parser_name=parser_name,
+        region=region,
+        last_seen_at=last_seen_at,
+    )
+    await conn.execute(insert_stmt.on_conflict_do_update(
+        index_elements=['parser_name', 'region'],
+        set_={
+            'last_seen_at': func.greatest(
+                parser_checkpoints_table.c.last_seen_at,
+                insert_stmt.excluded.last_seen_at,
+            ),
+        },
+    ))
@@ -0,0 +1,53 @@
+"""
+Business logic to operate with ledger of ingestion runs.
+
+Every run of parser with saving to database is recorded with its fetch
+and saving statistics, so slow or empty sources can be noticed.
+"""
+from aiopg.sa import SAConnection
+from aiopg.sa.result import RowProxy
+
+from sqlalchemy import select, insert
+
+from typing import Dict, List, Optional
+
+from core.db.schema import ingestion_runs_table
+
+
+async def save_ingestion_runs(conn: SAConnection, runs_data: List[Dict]) -> None:
+    """Save results of parsers runs."""
+    if runs_data:
+        await conn.execute(insert(ingestion_runs_table).values(runs_data))
+
+
+async def get_ingestion_runs(
+    conn: SAConnection,
+    parser_name: Optional[str] = None,
+    limit: Optional[int] = None
+) -> List[RowProxy]:
+    """
+    Return runs from the newest.
+
+    :param parser_name: If passed then only runs of this parser are returned.
+    :param limit: Number of runs to return.
+    """
+    stmt = select(ingestion_runs_table)
+    if parser_name is not None:
+        stmt = stmt.filter_by(parser_name=parser_name)
+    stmt = stmt.order_by(ingestion_runs_table.c.started_at.desc()).limit(limit)
+    result = await conn.execute(stmt)
+    return await result.fetchall()
+
+
+async def get_last_ingestion_runs(conn: SAConnection) -> List[RowProxy]:
+    """Return the last run of every parser in every region."""
+    stmt = select(ingestion_runs_table).distinct(
+        ingestion_runs_table.c.parser_name,
+        ingestion_runs_table.c.region,
+    ).order_by(
+        ingestion_runs_table.c.parser_name,
+        ingestion_runs_table.c.region,
+        ingestion_runs_table.c.started_at.desc(),
+    )
+    result = await conn.execute(stmt)
+    return await result.fetchall()
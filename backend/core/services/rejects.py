@@ -0,0 +1,41 @@
+"""
+Business logic to operate with vacancies rejected by ingestion.
+
+Vacancies which can not be saved are kept with reason of reject,
+so broken parser or source can be found without failing ingestion.
+"""
+from aiopg.sa import SAConnection
+from aiopg.sa.result import RowProxy
+
+from sqlalchemy import select, insert
+
+from typing import Dict, List, Optional
+
+from core.db.schema import vacancy_rejects_table
+
+
+async def save_vacancy_rejects(conn: SAConnection, rejects_data: List[Dict]) -> None:
+    """Save rejected vacancies, every one has "parser_name", "reason" and "data"."""
+    if rejects_data:
+        await conn.execute(insert(vacancy_rejects_table).values(rejects_data))
+
+
+async def get_vacancy_rejects(
+    conn: SAConnection,
+    parser_name: Optional[str] = None,
+    limit: Optional[int] = None
+) -> List[RowProxy]:
+    """
+    Return rejected vacancies from the newest.
+
+    :param parser_name: If passed then only rejects of this parser are returned.
+    :param limit: Number of rejects to return.
+    """
+    stmt = select(vacancy_rejects_table)
+    if parser_name is not None:
+        stmt = stmt.filter_by(parser_name=parser_name)
+    stmt = stmt.order_by(
+        vacancy_rejects_table.c.created_at.desc(), vacancy_rejects_table.c.id.desc()
+    ).limit(limit)
+    result = await conn.execute(stmt)
+    return await result.fetchall()
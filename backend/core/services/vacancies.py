@@ -4,19 +4,40 @@ Business logic to operate with vacancies.
 from aiopg.sa import SAConnection
 from aiopg.sa.result import RowProxy
 
-from sqlalchemy import select, insert, func, update, delete
+from sqlalchemy import (
+    Integer, String, select, insert, func, update, delete, literal_column, values, column,
+)
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+from psycopg2.extensions import cursor as Cursor
+
 from datetime import date, datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+import hashlib
+import io
+from typing import Any, Iterable, List, Dict, Optional, Tuple
 
 from core.db.schema import vacancies_table
-from core.db.utils import except_tsvector_columns
+from core.db.utils import except_internal_columns
+
+
+# Fields of vacancy which are written by ingestion, see get_content_hash
+CONTENT_HASH_FIELDS = ('name', 'source_name', 'description')
+
+
+def get_content_hash(vacancy_data: Dict[str, Any]) -> int:
+    """
+    Return hash of content fields of vacancy as signed 64-bit integer.
+
+    Missed description is hashed as empty one, because upserts do not clear it.
+    """
+    content = '\x1f'.join(str(vacancy_data.get(field) or '') for field in CONTENT_HASH_FIELDS)
+    digest = hashlib.blake2b(content.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
 
 
 async def create_vacancy(conn: SAConnection, **vacancy_data) -> RowProxy:
     """Create new vacancy in database."""
-    columns = except_tsvector_columns(vacancies_table)
+    columns = except_internal_columns(vacancies_table)
     stmt = insert(vacancies_table).values(**vacancy_data).returning(*columns)
     result = await conn.execute(stmt)
     return await result.first()  
@@ -35,15 +56,331 @@ async def create_or_update_vacancy(
 
     :return: Tuple (is_created, vacancy)
     """
-    vacancy_data.update({'modified_at': datetime.utcnow().date()})
+    modified_at = datetime.utcnow().date()
+    vacancy_data.update({
+        'modified_at': modified_at,
+        'content_hash': get_content_hash(vacancy_data),
+    })
     insert_stmt = pg_insert(vacancies_table).values(**vacancy_data).returning(vacancies_table)
-    do_update_stmt = insert_stmt.on_conflict_do_update(index_elements=['source'], set_=vacancy_data)
+    do_update_stmt = insert_stmt.on_conflict_do_update(
+        index_elements=['source'],
+        set_=vacancy_data,
+        where=vacancies_table.c.content_hash.is_distinct_from(insert_stmt.excluded.content_hash),
+    )
     result = await conn.execute(do_update_stmt)
     vacancy = await result.fetchone()
+    if vacancy is None:
+        # Content is not changed, only modified_at is touched
+        touch_stmt = update(vacancies_table).where(
+            vacancies_table.c.source == vacancy_data['source']
+        ).values(modified_at=modified_at).returning(vacancies_table)
+        result = await conn.execute(touch_stmt)
+        vacancy = await result.fetchone()
     is_created = vacancy.created_at == datetime.utcnow().date()
     return (is_created, vacancy)
 
 
+async def touch_vacancies(conn: SAConnection, sources: List[str], modified_at: date) -> int:
+    """
+    Set modified_at of vacancies with sources, which have other date.
+
+    Only not indexed column is changed, so Postgres can make HOT update
+    without new entries in indexes of vacancies.
+
+    :return: Number of touched vacancies.
+    """
+    if not sources:
+        return 0
+    stmt = update(vacancies_table).where(
+        vacancies_table.c.source.in_(sources)
+    ).where(
+        vacancies_table.c.modified_at.is_distinct_from(modified_at)
+    ).values(modified_at=modified_at)
+    result = await conn.execute(stmt)
+    return result.rowcount
+
+
+async def get_recent_content_hashes(conn: SAConnection, since: date) -> List[Tuple[str, int]]:
+    """
+    Return sources and content hashes of vacancies modified since date.
+
+    modified_at is not indexed on purpose (see touch_vacancies), table is scanned.
+    """
+    stmt = select([vacancies_table.c.source, vacancies_table.c.content_hash]).where(
+        vacancies_table.c.modified_at >= since
+    ).where(
+        vacancies_table.c.content_hash.isnot(None)
+    )
+    result = await conn.execute(stmt)
+    return [(row.source, row.content_hash) for row in await result.fetchall()]
+
+
+async def create_or_update_vacancy_batch(
+    conn: SAConnection,
+    vacancies_data: List[Dict[str, str]],
+    chunk_size: int = 500
+) -> Tuple[int, int]:
+    """
+    Create or update batch of vacancies with one multi-row upsert per chunk.
+
+    Row is created if its xmax system column is 0, that is row has no previous version.
+    Existing row is updated only if its content hash is changed, rows with the same
+    content are only touched (see touch_vacancies) and are counted neither as created
+    nor as updated. If batch contains several vacancies with same source,
+    the last one is saved.
+
+    :param vacancies_data: List of vacancies data with same set of fields.
+    :param chunk_size: Max number of vacancies in one statement.
+
+    :return: Tuple (created, updated)
+    """
+    unique_vacancies = list({v['source']: v for v in vacancies_data}.values())
+    modified_at = datetime.utcnow().date()
+    created = 0
+    updated = 0
+
+    for i in range(0, len(unique_vacancies), chunk_size):
+        chunk = [
+            dict(vacancy, modified_at=modified_at, content_hash=get_content_hash(vacancy))
+            for vacancy in unique_vacancies[i:i + chunk_size]
+        ]
+        insert_stmt = pg_insert(vacancies_table).values(chunk)
+        do_update_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=['source'],
+            set_={
+                field: insert_stmt.excluded[field]
+                for field in chunk[0].keys() if field != 'source'
+            },
+            where=vacancies_table.c.content_hash.is_distinct_from(
+                insert_stmt.excluded.content_hash
+            ),
+        ).returning(
+            vacancies_table.c.source,
+            literal_column('xmax = 0').label('is_created'),
+        )
+
+        result = await conn.execute(do_update_stmt)
+        written = set()
+        for row in await result.fetchall():
+            written.add(row.source)
+            if row.is_created:
+                created += 1
+            else:
+                updated += 1
+
+        await touch_vacancies(
+            conn,
+            [vacancy['source'] for vacancy in chunk if vacancy['source'] not in written],
+            modified_at,
+        )
+
+    return (created, updated)
+
+
+STAGING_TABLE = 'vacancies_staging'
+
+STAGING_COLUMNS = (
+    'name', 'source', 'source_name', 'description', 'region',
+    'minhash', 'lsh_bands', 'content_hash',
+)
+
+
+def create_vacancies_staging(cursor: Cursor) -> None:
+    """
+    Create temporary staging table for vacancies, it is dropped on commit.
+
+    Staging table has no constraints, so COPY to it is as cheap as possible.
+    """
+    cursor.execute(
+        'CREATE TEMP TABLE {0} ON COMMIT DROP AS SELECT {1} FROM {2} WITH NO DATA'.format(
+            STAGING_TABLE,
+            ', '.join(STAGING_COLUMNS),
+            vacancies_table.name,
+        )
+    )
+
+
+def _copy_text_value(value: Optional[Any]) -> str:
+    """Format value for COPY text format, list is formatted as array of numbers."""
+    if value is None:
+        return r'\N'
+    if isinstance(value, list):
+        return '{{{0}}}'.format(','.join(str(item) for item in value))
+    return str(value).replace('\\', '\\\\').replace('\t', r'\t').replace(
+        '\n', r'\n'
+    ).replace('\r', r'\r')
+
+
+def copy_vacancies_to_staging(cursor: Cursor, vacancies_data: Iterable[Dict[str, str]]) -> int:
+    """
+    Copy vacancies to staging table with COPY FROM STDIN.
+
+    Missed fields are copied as NULL, content hash is counted if it is missed.
+
+    :return: Number of copied rows.
+    """
+    buffer = io.StringIO()
+    for vacancy in vacancies_data:
+        if vacancy.get('content_hash') is None:
+            vacancy = dict(vacancy, content_hash=get_content_hash(vacancy))
+        buffer.write('\t'.join(_copy_text_value(vacancy.get(c)) for c in STAGING_COLUMNS))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    cursor.copy_expert(
+        'COPY {0} ({1}) FROM STDIN'.format(STAGING_TABLE, ', '.join(STAGING_COLUMNS)),
+        buffer,
+    )
+    return cursor.rowcount
+
+
+def merge_staging_vacancies(cursor: Cursor) -> Dict[str, Tuple[int, int]]:
+    """
+    Create or update vacancies from staging table with one INSERT ... SELECT statement.
+
+    Description and region are kept if staged vacancy has none of them.
+    Existing vacancies with the same content hash are not updated, only their
+    modified_at is touched, they are counted neither as created nor as updated.
+
+    :return: Dict {'source_name': (created, updated)}
+    """
+    today = datetime.utcnow().date()
+    cursor.execute(
+        """
+        WITH upserted AS (
+            INSERT INTO {vacancies} AS v (
+                name, source, source_name, description, region,
+                minhash, lsh_bands, content_hash, created_at, modified_at
+            )
+            SELECT DISTINCT ON (source)
+                name, source, source_name, description, region,
+                minhash, lsh_bands, content_hash, %(today)s, %(today)s
+            FROM {staging}
+            ORDER BY source
+            ON CONFLICT (source) DO UPDATE SET
+                name = EXCLUDED.name,
+                source_name = EXCLUDED.source_name,
+                description = COALESCE(EXCLUDED.description, v.description),
+                region = COALESCE(EXCLUDED.region, v.region),
+                minhash = COALESCE(EXCLUDED.minhash, v.minhash),
+                lsh_bands = COALESCE(EXCLUDED.lsh_bands, v.lsh_bands),
+                content_hash = EXCLUDED.content_hash,
+                modified_at = EXCLUDED.modified_at
+            WHERE v.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+            RETURNING v.source, v.source_name, xmax = 0 AS is_created
+        ),
+        touched AS (
+            UPDATE {vacancies} v SET modified_at = %(today)s
+            FROM {staging} s
+            WHERE v.source = s.source
+                AND v.modified_at IS DISTINCT FROM %(today)s
+                AND NOT EXISTS (SELECT 1 FROM upserted u WHERE u.source = v.source)
+        )
+        SELECT
+            source_name,
+            count(*) FILTER (WHERE is_created),
+            count(*) FILTER (WHERE NOT is_created)
+        FROM upserted
+        GROUP BY source_name
+        """.format(vacancies=vacancies_table.name, staging=STAGING_TABLE),
+        {'today': today},
+    )
+    return {
+        source_name: (created, updated)
+        for source_name, created, updated in cursor.fetchall()
+    }
+
+
+DUPLICATE_ACTIONS = ('link', 'suppress')
+
+_DUPLICATES_QUERY = """
+    WITH duplicates AS (
+        SELECT DISTINCT ON (n.id) n.id, o.id AS original_id
+        FROM {vacancies} n
+        JOIN {vacancies} o
+            ON o.lsh_bands && n.lsh_bands
+            AND o.id < n.id
+            AND o.duplicate_of IS NULL
+        WHERE n.source = ANY({sources})
+            AND n.duplicate_of IS NULL
+            AND NOT EXISTS (SELECT 1 FROM {vacancies} d WHERE d.duplicate_of = n.id)
+            AND (
+                SELECT count(*) FROM unnest(n.minhash, o.minhash) AS m(x, y) WHERE m.x = m.y
+            ) >= %(threshold)s * cardinality(n.minhash)
+        ORDER BY n.id, o.id
+    ),
+    handled AS (
+        {action}
+        RETURNING v.source_name
+    )
+    SELECT source_name, count(*) FROM handled GROUP BY source_name
+"""
+
+_DUPLICATE_ACTION_QUERIES = {
+    'link': (
+        'UPDATE {vacancies} v SET duplicate_of = duplicates.original_id '
+        'FROM duplicates WHERE v.id = duplicates.id'
+    ),
+    'suppress': 'DELETE FROM {vacancies} v USING duplicates WHERE v.id = duplicates.id',
+}
+
+
+def _get_duplicates_query(sources: str, action: str) -> str:
+    """
+    Return query to link or delete near-duplicates of vacancies with sources.
+
+    Vacancy is a duplicate of the oldest vacancy which has a common LSH band
+    and at least threshold share of equal MinHash values.
+    """
+    return _DUPLICATES_QUERY.format(
+        vacancies=vacancies_table.name,
+        sources=sources,
+        action=_DUPLICATE_ACTION_QUERIES[action].format(vacancies=vacancies_table.name),
+    )
+
+
+async def link_duplicate_vacancies(
+    conn: SAConnection,
+    sources: List[str],
+    threshold: float,
+    action: str = 'link'
+) -> Dict[str, int]:
+    """
+    Find near-duplicates among vacancies with passed sources.
+
+    :param threshold: Min share of equal MinHash values of duplicates.
+    :param action: One of DUPLICATE_ACTIONS, "link" sets duplicate_of
+        to id of original vacancy, "suppress" deletes duplicate.
+
+    :return: Dict {'source_name': number of duplicates}
+    """
+    if not sources:
+        return {}
+
+    result = await conn.execute(
+        _get_duplicates_query('%(sources)s', action),
+        {'sources': sources, 'threshold': threshold},
+    )
+    return {row.source_name: row.count for row in await result.fetchall()}
+
+
+def link_staged_duplicate_vacancies(
+    cursor: Cursor,
+    threshold: float,
+    action: str = 'link'
+) -> Dict[str, int]:
+    """
+    Find near-duplicates among vacancies merged from staging table.
+
+    See link_duplicate_vacancies.
+    """
+    cursor.execute(
+        _get_duplicates_query('ARRAY(SELECT source FROM {0})'.format(STAGING_TABLE), action),
+        {'threshold': threshold},
+    )
+    return {source_name: count for source_name, count in cursor.fetchall()}
+
+
 async def create_vacancy_batch(
     conn: SAConnection,
     vacancies_data: List[Dict[str, str]]
@@ -67,7 +404,7 @@ async def filter_vacancies(
     :param offset: Number of vacancies to skip before to collect.
     :param options: Options to filter vacancies.
     """
-    columns = except_tsvector_columns(vacancies_table)
+    columns = except_internal_columns(vacancies_table)
     stmt = select(*columns, func.count().over().label('count'))
     stmt = stmt.filter_by(**options).limit(limit).offset(offset).order_by(
         vacancies_table.c.modified_at, vacancies_table.c.source_name,
@@ -81,6 +418,7 @@ async def search_vacancies(
     date_from: Optional[date] = None,
     date_to: Optional[date] = None, 
     search_query: Optional[str] = None, 
+    region: Optional[str] = None,
     published_only: bool = True, 
     limit: Optional[int] = None,
     offset: int = 0
@@ -91,17 +429,19 @@ async def search_vacancies(
     :param date_from: Collect vacancies with modified_at after this date.
     :param date_to: Collect vacancies with modified_at before this date.
     :param search_query: Search this phrase in indexed fields - name.
-    :param published_only: If true, return only published vacancies.
+    :param region: Collect vacancies of this region.
+    :param published_only: If true, return only published vacancies
+        which are not duplicates of other vacancies.
     :param limit: Number of vacancies to return.
     :param offset: Number of vacancies to skip before to collect.
 
     :return: list of found vacancies and count of all found items.
     """
-    columns = except_tsvector_columns(vacancies_table)
+    columns = except_internal_columns(vacancies_table)
     stmt = select(*columns, func.count().over().label('count'))
     
     if published_only:
-        stmt = stmt.filter_by(is_published=True)
+        stmt = stmt.filter_by(is_published=True, duplicate_of=None)
 
     if date_from is not None:
         stmt = stmt.where(vacancies_table.c.modified_at >= date_from)
@@ -112,6 +452,9 @@ async def search_vacancies(
     if search_query is not None:
         stmt = stmt.where(vacancies_table.c.search_index.match(str(search_query)))
 
+    if region is not None:
+        stmt = stmt.where(vacancies_table.c.region == region)
+
     stmt = stmt.limit(limit).offset(offset).order_by(
         vacancies_table.c.modified_at, vacancies_table.c.source_name
     )
@@ -132,7 +475,7 @@ async def update_vacancy(
 
     If Vacancy does not exists return None.
     """
-    columns = except_tsvector_columns(vacancies_table)
+    columns = except_internal_columns(vacancies_table)
     stmt = update(vacancies_table).where(
         vacancies_table.c.id == vacancy_id
     ).values(**vacancy_data).returning(*columns)
@@ -180,3 +523,65 @@ async def delete_expired_vacancies(conn: SAConnection, expired_delta: timedelta)
     stmt = delete(vacancies_table).where(vacancies_table.c.modified_at <= expired_datetime.date())
     result = await conn.execute(stmt)
     return result.rowcount
+
+
+async def get_max_vacancy_id(conn: SAConnection) -> int:
+    """Return the biggest id of vacancies, 0 if there are no vacancies."""
+    result = await conn.execute(select(func.coalesce(func.max(vacancies_table.c.id), 0)))
+    return await result.scalar()
+
+
+async def get_vacancies_to_enrich(
+    conn: SAConnection,
+    source_name: str,
+    min_id: int,
+    limit: int,
+    shard: int = 0,
+    shards: int = 1,
+    region: Optional[str] = None
+) -> List[RowProxy]:
+    """
+    Return id and source of not enriched vacancies of source created after vacancy with min_id.
+
+    :param shard: Return only vacancies with id % shards == shard.
+    :param region: If passed then only vacancies of region are returned.
+    """
+    stmt = select([vacancies_table.c.id, vacancies_table.c.source]).where(
+        (vacancies_table.c.source_name == source_name)
+        & (vacancies_table.c.id > min_id)
+        & vacancies_table.c.enriched_at.is_(None)
+    )
+    if shards > 1:
+        stmt = stmt.where(vacancies_table.c.id % shards == shard)
+    if region is not None:
+        stmt = stmt.where(vacancies_table.c.region == region)
+    result = await conn.execute(stmt.order_by(vacancies_table.c.id).limit(limit))
+    return await result.fetchall()
+
+
+async def save_vacancies_descriptions(
+    conn: SAConnection,
+    descriptions: Dict[int, Optional[str]]
+) -> int:
+    """
+    Save descriptions of vacancies with one statement and mark vacancies as enriched.
+
+    Description is not cleared if loaded description is None.
+
+    :param descriptions: Dict {vacancy id: description}
+    :return: Number of updated vacancies.
+    """
+    if not descriptions:
+        return 0
+
+    enriched = values(
+        column('id', Integer),
+        column('description', String),
+        name='enriched',
+    ).data(list(descriptions.items()))
+    stmt = update(vacancies_table).values(
+        description=func.coalesce(enriched.c.description, vacancies_table.c.description),
+        enriched_at=func.now(),
+    ).where(vacancies_table.c.id == enriched.c.id)
+    result = await conn.execute(stmt)
+    return result.rowcount
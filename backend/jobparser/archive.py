@@ -0,0 +1,170 @@
+"""
+Content-addressed archive of raw parsers responses.
+
+Every response body is stored once, compressed with gzip, under sha256 of body:
+"objects/ab/ab12...gz". Requests are appended to manifest of their day
+"manifest/2021-06-01.ndjson" as json lines with parser name, url, params,
+time of request, body hash, encoding and region of parser. Secret params (access tokens) are not
+stored in manifest.
+
+Archive is replayed by "python main.py reparse": archived pages of vacancies
+are extracted again with current extractors of parsers in process pool, so
+data fetched in the past can be derived again after fix of parser.
+"""
+import asyncio
+
+import gzip
+import hashlib
+import json
+import threading
+from datetime import date, datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from config import RESPONSE_ARCHIVE_CONFIG
+
+
+# Params of requests which are not written to manifest
+SECRET_PARAMS = ('access_token', 'secret_key')
+
+
+class ArchivedResponse(NamedTuple):
+    """Manifest entry of archived response."""
+
+    parser_name: str
+    url: str
+    params: Dict
+    fetched_at: str
+    digest: str
+    encoding: str
+    # Region of parser, responses archived before regions have no region
+    region: Optional[str] = None
+
+
+class ResponseArchive:
+    """Archive with gzip files of bodies by their hashes and daily manifests."""
+
+    def __init__(self, directory: Path, compresslevel: int = 6) -> None:
+        """
+        Initialization.
+
+        :param directory: Directory of archive, it is created if not exists.
+        :param compresslevel: Gzip compression level of bodies.
+        """
+        self.directory = Path(directory)
+        self.compresslevel = compresslevel
+        self.directory.joinpath('objects').mkdir(parents=True, exist_ok=True)
+        self.directory.joinpath('manifest').mkdir(parents=True, exist_ok=True)
+        # Manifest lines are appended from executor threads
+        self._manifest_lock = threading.Lock()
+
+    def get_object_path(self, digest: str) -> Path:
+        """Return path of body file by its hash."""
+        return self.directory.joinpath('objects', digest[:2], '{0}.gz'.format(digest))
+
+    def get_manifest_path(self, day: date) -> Path:
+        """Return path of manifest of day."""
+        return self.directory.joinpath('manifest', '{0}.ndjson'.format(day.isoformat()))
+
+    def write(
+        self,
+        parser_name: str,
+        url: str,
+        params: Optional[Dict],
+        body: bytes,
+        encoding: str,
+        fetched_at: Optional[datetime] = None,
+        region: Optional[str] = None
+    ) -> ArchivedResponse:
+        """Save body if it is not archived yet and append request to manifest."""
+        if fetched_at is None:
+            fetched_at = datetime.now(tz=timezone.utc)
+        digest = hashlib.sha256(body).hexdigest()
+
+        path = self.get_object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            # Partly written file is never visible under its hash
+            tmp_path = path.with_name('{0}.{1}.tmp'.format(path.name, threading.get_ident()))
+            with gzip.open(tmp_path, 'wb', compresslevel=self.compresslevel) as f:
+                f.write(body)
+            tmp_path.replace(path)
+
+        entry = ArchivedResponse(
+            parser_name=parser_name,
+            url=url,
+            params={
+                key: value for key, value in (params or {}).items()
+                if key not in SECRET_PARAMS
+            },
+            fetched_at=fetched_at.isoformat(),
+            digest=digest,
+            encoding=encoding,
+            region=region,
+        )
+        line = json.dumps(entry._asdict(), ensure_ascii=False, default=str) + '\n'
+        with self._manifest_lock:
+            with open(self.get_manifest_path(fetched_at.date()), 'a', encoding='utf-8') as f:
+                f.write(line)
+        return entry
+
+    async def add(
+        self,
+        parser_name: str,
+        url: str,
+        params: Optional[Dict],
+        body: bytes,
+        encoding: str,
+        region: Optional[str] = None
+    ) -> ArchivedResponse:
+        """Archive response in executor, compression does not block event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, partial(self.write, region=region), parser_name, url, params, body, encoding,
+        )
+
+    def read_body(self, digest: str) -> bytes:
+        """Return body by its hash."""
+        with gzip.open(self.get_object_path(digest), 'rb') as f:
+            return f.read()
+
+    def iter_entries(
+        self,
+        since: Optional[date] = None,
+        parsers: Optional[List[str]] = None
+    ) -> Iterator[ArchivedResponse]:
+        """
+        Yield manifest entries from the oldest day.
+
+        :param since: Only days from this date are read.
+        :param parsers: If passed then only responses of these parsers are yielded.
+        """
+        for path in sorted(self.directory.joinpath('manifest').glob('*.ndjson')):
+            if since is not None and date.fromisoformat(path.stem) < since:
+                continue
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = ArchivedResponse(**json.loads(line))
+                    if not parsers or entry.parser_name in parsers:
+                        yield entry
+
+
+_response_archive = None
+
+
+def get_response_archive() -> Optional[ResponseArchive]:
+    """Return archive configured with RESPONSE_ARCHIVE_CONFIG, None if archive is off."""
+    global _response_archive
+
+    if not RESPONSE_ARCHIVE_CONFIG['is_active']:
+        return None
+
+    if _response_archive is None:
+        _response_archive = ResponseArchive(
+            RESPONSE_ARCHIVE_CONFIG['directory'],
+            RESPONSE_ARCHIVE_CONFIG['compresslevel'],
+        )
+    return _response_archive
@@ -1,9 +1,24 @@
 """
 Base parser class.
 """
-from aiohttp import ClientSession
+from aiohttp import ClientSession, ClientResponseError, ClientTimeout
 
-from typing import Dict, Any, Optional
+from multidict import CIMultiDictProxy
+
+from yarl import URL
+
+import asyncio
+import time
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from jobparser.archive import get_response_archive
+from jobparser.cache import get_response_cache
+from jobparser.client import FetchStats, get_json_decoder
+from jobparser.resilience import get_circuit_breaker, get_backoff_delay, is_retryable
+from jobparser.throttling import get_concurrency_budget, get_rate_limiter
+
+from config import DEFAULT_REGION, HTTP_CLIENT_CONFIG
 
 
 class ParserConfigError(Exception):
@@ -16,6 +31,21 @@ class BaseParser:
     base_url = None
     name = None
 
+    # Parser loads pages with fetch_pages, so pages can be split between processes
+    supports_page_shards = False
+    # Parser loads description of vacancy with get_description, see jobparser.enrichment
+    supports_enrichment = False
+
+    default_concurrency = 4
+
+    # Region params used if config has no "region", see jobparser.regions
+    default_region = {'name': DEFAULT_REGION}
+
+    # Options of ClientTimeout for one request, can be updated with "timeout" in config
+    default_timeout = {'total': 30, 'connect': 10, 'sock_read': 20}
+    # Can be updated with "retry" in config
+    default_retry = {'attempts': 3, 'backoff': 0.5, 'max_backoff': 10}
+
     DEFAULT_USER_AGENT = (
         'Mozilla/5.0 (X11; Linux x86_64) ' 
         'AppleWebKit/537.36 (KHTML, like Gecko) '
@@ -43,53 +73,299 @@ class BaseParser:
 
         self.config = config
         self.session = session
+        self.region = config.get('region', self.default_region)
 
-    async def get_html(self, url: str, **kwargs) -> str:
-        """Load and return html from url."""
-        headers = {
+        # Publication time of the newest vacancy saved by previous run
+        self.checkpoint = None
+        # Publication time of the newest vacancy seen in this run
+        self.high_water_mark = None
+
+        # Parser loads only pages with number % shards == shard
+        self.shard = 0
+        self.shards = 1
+
+        self.fetch_stats = FetchStats()
+        self.json_decoder = get_json_decoder(config.get('json_decoder'))
+
+    @property
+    def region_name(self) -> str:
+        """Return name of region of parser, it is saved to vacancies."""
+        return self.region['name']
+
+    def set_shard(self, shard: int, shards: int) -> None:
+        """Load only every shards-th page starting from shard-th page."""
+        if shards > 1 and not self.supports_page_shards:
+            raise ParserConfigError(
+                'Parser "{0}" does not support page shards.'.format(self.name)
+            )
+        self.shard = shard
+        self.shards = shards
+
+    async def send(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        **kwargs
+    ) -> Tuple[int, bytes, str, CIMultiDictProxy]:
+        """
+        Send one GET request to url through rate limiter of its host
+        and concurrency budget of all parsers.
+
+        :return: Tuple (status, body, encoding, response headers),
+            body of 304 Not Modified response is empty.
+        """
+        timeout = dict(self.default_timeout, **self.config.get('timeout', {}))
+        kwargs.setdefault('timeout', ClientTimeout(**timeout))
+
+        limiter = get_rate_limiter(URL(url).host, self.config)
+        budget = get_concurrency_budget(HTTP_CLIENT_CONFIG['concurrency_budget'])
+        await limiter.acquire()
+        if budget is not None:
+            try:
+                await budget.acquire()
+            except BaseException:
+                await limiter.release()
+                raise
+        started_at = time.monotonic()
+        status = None
+        try:
+            async with self.session.get(
+                url,
+                headers=headers,
+                raise_for_status=True,
+                **kwargs
+            ) as resp:
+                status = resp.status
+                if status == 304:
+                    body, encoding = b'', ''
+                else:
+                    body = await resp.read()
+                    encoding = resp.get_encoding()
+                self.fetch_stats.response_received(time.monotonic() - started_at, len(body))
+                return (status, body, encoding, resp.headers)
+        except ClientResponseError as e:
+            status = e.status
+            raise
+        finally:
+            latency = time.monotonic() - started_at
+            if status is None or status >= 400:
+                self.fetch_stats.request_failed(latency)
+            if budget is not None:
+                budget.release()
+            await limiter.release(latency, status)
+
+    async def request(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs
+    ) -> Tuple[bytes, str]:
+        """
+        Load url, retry on temporary errors with exponential backoff.
+
+        If circuit breaker of source is open, SourceUnavailableError is raised
+        without request. If response cache is on, request is conditional
+        and not modified response body is taken from cache.
+        If response archive is on, body is archived for reparse.
+
+        :return: Tuple (body, encoding)
+        """
+        request_headers = {
             'User-Agent': self.config.get('user_agent', self.DEFAULT_USER_AGENT)
         }
-        async with self.session.get(
-            url,
-            headers=headers,
-            raise_for_status=True,
-            **kwargs
-        ) as resp:
-            html = await resp.text()
-        return html
+        if headers is not None:
+            request_headers.update(headers)
+
+        cache = get_response_cache()
+        cached = None
+        if cache is not None:
+            cache_key = cache.get_key(url, kwargs.get('params'))
+            cached = await cache.get(cache_key)
+            if cached is not None:
+                request_headers.update(cached.get_conditional_headers())
+
+        retry = dict(self.default_retry, **self.config.get('retry', {}))
+        breaker = get_circuit_breaker(self.name, self.config)
+
+        for attempt in range(retry['attempts']):
+            breaker.check()
+            try:
+                status, body, encoding, response_headers = await self.send(
+                    url,
+                    request_headers,
+                    **kwargs
+                )
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                breaker.record_failure()
+                if attempt + 1 == retry['attempts']:
+                    raise
+                await asyncio.sleep(
+                    get_backoff_delay(attempt, retry['backoff'], retry['max_backoff'])
+                )
+            else:
+                breaker.record_success()
+                break
+
+        if status == 304 and cached is not None:
+            body, encoding = cached.body, cached.encoding
+        elif cache is not None:
+            await cache.set(cache_key, body, encoding, response_headers)
+
+        archive = get_response_archive()
+        if archive is not None:
+            await archive.add(
+                self.name, url, kwargs.get('params'), body, encoding, self.region_name,
+            )
+        return (body, encoding)
+
+    async def get_html(self, url: str, **kwargs) -> str:
+        """Load and return html from url."""
+        body, encoding = await self.request(url, **kwargs)
+        return body.decode(encoding)
 
     async def get_json(self, url: str, 
                        params: Optional[Dict[str, str]] = None,
                        headers: Optional[Dict[str, str]] = None,
                        **kwargs) -> Dict:
-        """Get json data from url."""
-        request_headers = {
-            'User-Agent': self.config.get('user_agent', self.DEFAULT_USER_AGENT)
+        """
+        Get json data from url.
+
+        Body is decoded with "json_decoder" of parser config or HTTP_CLIENT_CONFIG.
+        """
+        body, encoding = await self.request(url, params=params, headers=headers, **kwargs)
+        return self.decode_json(body, encoding)
+
+    def decode_json(self, body: bytes, encoding: str) -> Dict:
+        """Decode json body of response."""
+        if encoding.lower().replace('-', '') != 'utf8':
+            body = body.decode(encoding)
+        return self.json_decoder(body)
+
+    def get_published_at(self, item: Dict) -> datetime:
+        """Return publication time of item from source response."""
+        raise NotImplementedError
+
+    async def get_description(self, source: str) -> Optional[str]:
+        """Return description of vacancy by its url, it may contain html."""
+        raise NotImplementedError
+
+    def extract_archived(self, body: bytes, encoding: str) -> Optional[List[Dict[str, str]]]:
+        """
+        Return vacancies of archived response, see jobparser.archive.
+
+        Checkpoint is not applied, all vacancies of page are returned.
+
+        :return: None if response is not a page of vacancies, e.g. description.
+        """
+        raise NotImplementedError
+
+    def filter_new_items(self, items: List[Dict]) -> List[Dict]:
+        """
+        Return items published after checkpoint and move high water mark.
+
+        Item with publication time equal to checkpoint is considered as known.
+        """
+        new_items = []
+        for item in items:
+            published_at = self.get_published_at(item)
+            if self.high_water_mark is None or published_at > self.high_water_mark:
+                self.high_water_mark = published_at
+            if self.checkpoint is None or published_at > self.checkpoint:
+                new_items.append(item)
+        return new_items
+
+    def has_known_items(self, items: List[Dict]) -> bool:
+        """Check whether some of items were seen by previous run."""
+        return self.checkpoint is not None and any(
+            self.get_published_at(item) <= self.checkpoint for item in items
+        )
+
+    async def fetch_pages(
+        self,
+        fetch_page: Callable[[int], Awaitable[Dict]],
+        get_pages_count: Callable[[Dict], int],
+        first_page: int = 0,
+        is_last_page: Optional[Callable[[Dict], bool]] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Fetch paginated API: load first page to learn number of pages,
+        then load the rest concurrently, limited with "concurrency" option of config.
+
+        Pages data is yielded as soon as it is loaded, so order of pages is not kept.
+        Pagination state lives only in this call, so parser can be run again.
+        If parser is a shard, first page is loaded to learn number of pages,
+        but only pages of shard are yielded.
+
+        :param fetch_page: Coroutine function to load page by its number.
+        :param get_pages_count: Function to get number of pages to load from first page data.
+        :param first_page: Number of first page in API.
+        :param is_last_page: Function to check page data, if it returns True,
+            then pages after this one are not loaded, e.g. they contain known vacancies.
+        """
+        data = await fetch_page(first_page)
+        if not data:
+            return
+
+        is_last = is_last_page is not None and is_last_page(data)
+        if self.shard == 0:
+            yield data
+        if is_last:
+            return
+
+        semaphore = asyncio.Semaphore(self.config.get('concurrency', self.default_concurrency))
+
+        async def fetch_with_limit(page: int) -> Tuple[int, Dict]:
+            async with semaphore:
+                return (page, await fetch_page(page))
+
+        tasks = {
+            page: asyncio.ensure_future(fetch_with_limit(page))
+            for page in range(first_page + 1, first_page + get_pages_count(data))
+            if (page - first_page) % self.shards == self.shard
         }
-        if headers is not None:
-            request_headers.update(headers)
+        pending = set(tasks.values())
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        continue  # Page after last page
 
-        async with self.session.get(
-            url,
-            params=params,
-            headers=request_headers,
-            raise_for_status=True,
-            **kwargs
-        ) as resp:
-            data = await resp.json()
-        return data
+                    page, data = task.result()
+                    if not data:
+                        continue
 
+                    if is_last_page is not None and is_last_page(data):
+                        for next_page, next_task in tasks.items():
+                            if next_page > page:
+                                next_task.cancel()
+                    yield data
+        finally:
+            for task in tasks.values():
+                task.cancel()
 
-    async def get_vacancies(self) -> Dict[str, Any]:
+    def iter_vacancies(self) -> AsyncIterator[List[Dict[str, str]]]:
         """
-        Return vacancies data as list of dicts in format:
+        Yield vacancies page by page as soon as each page is loaded.
+
+        Every page is a list of dicts in format:
         [
             {
                 'name': 'vacancy-name', 
                 'source': 'link-to-vacancy', 
-                'source_name': 'source-name'
+                'source_name': 'source-name',
+                'region': 'region-name'
             },
             ...
         ]
         """
         raise NotImplementedError
+
+    async def get_vacancies(self) -> List[Dict[str, str]]:
+        """Return vacancies from all pages as one list."""
+        vacancies = []
+        async for page in self.iter_vacancies():
+            vacancies.extend(page)
+        return vacancies
@@ -0,0 +1,145 @@
+"""
+On-disk cache of parsers responses for conditional requests.
+
+Response is cached only if it has ETag or Last-Modified header. Next request
+to the same url sends If-None-Match/If-Modified-Since and if source answers
+304 Not Modified, then body is taken from cache. Least recently used responses
+are removed when cache exceeds its max size.
+"""
+import aiofiles
+
+import hashlib
+import json
+import os
+import pathlib
+from typing import Dict, NamedTuple, Optional
+
+from multidict import CIMultiDictProxy
+
+from config import PARSERS_CACHE_CONFIG
+
+
+class CachedResponse(NamedTuple):
+    """Cached response body with its validators."""
+
+    body: bytes
+    encoding: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+    def get_conditional_headers(self) -> Dict[str, str]:
+        """Return headers for conditional request."""
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Cache which stores every response as body file and json file with validators."""
+
+    def __init__(self, directory: pathlib.Path, max_size: int) -> None:
+        """
+        Initialization.
+
+        :param directory: Directory for cache files, it is created if not exists.
+        :param max_size: Max size of cache files in bytes.
+        """
+        self.directory = pathlib.Path(directory)
+        self.max_size = max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def get_key(url: str, params: Optional[Dict] = None) -> str:
+        """Return cache key for request, url and params are not stored in cache."""
+        request = json.dumps([url, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(request.encode('utf-8')).hexdigest()
+
+    def _get_paths(self, key: str):
+        return (
+            self.directory.joinpath('{0}.body'.format(key)),
+            self.directory.joinpath('{0}.json'.format(key)),
+        )
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        """Return cached response or None, mark response as recently used."""
+        body_path, meta_path = self._get_paths(key)
+        try:
+            async with aiofiles.open(meta_path, mode='r') as f:
+                meta = json.loads(await f.read())
+            async with aiofiles.open(body_path, mode='rb') as f:
+                body = await f.read()
+            os.utime(body_path)
+        except (OSError, ValueError):
+            return None
+
+        return CachedResponse(
+            body=body,
+            encoding=meta['encoding'],
+            etag=meta.get('etag'),
+            last_modified=meta.get('last_modified'),
+        )
+
+    async def set(
+        self,
+        key: str,
+        body: bytes,
+        encoding: str,
+        headers: CIMultiDictProxy
+    ) -> None:
+        """Save response if it has validators and remove least recently used responses."""
+        meta = {
+            'encoding': encoding,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+        }
+        if meta['etag'] is None and meta['last_modified'] is None:
+            return
+
+        body_path, meta_path = self._get_paths(key)
+        async with aiofiles.open(body_path, mode='wb') as f:
+            await f.write(body)
+        async with aiofiles.open(meta_path, mode='w') as f:
+            await f.write(json.dumps(meta))
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used responses until cache size fits max size."""
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.body'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.name[:-len('.body')]))
+                total_size += stat.st_size
+
+        for _, size, key in sorted(entries):
+            if total_size <= self.max_size:
+                return
+            for path in self._get_paths(key):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            total_size -= size
+
+
+_response_cache = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return cache configured with PARSERS_CACHE_CONFIG, None if cache is off."""
+    global _response_cache
+
+    if not PARSERS_CACHE_CONFIG['is_active']:
+        return None
+
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            PARSERS_CACHE_CONFIG['directory'],
+            PARSERS_CACHE_CONFIG['max_size'],
+        )
+    return _response_cache
@@ -0,0 +1,132 @@
+"""
+HTTP client shared by parsers.
+
+Session is created with connection limits, keep-alive and DNS cache
+from HTTP_CLIENT_CONFIG, compressed responses are negotiated.
+"""
+import aiohttp
+
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from config import HTTP_CLIENT_CONFIG, PARSERS_CONFIG
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # aiohttp decodes "br" responses only with brotli installed
+except ImportError:
+    brotli = None
+
+
+JSON_DECODERS: Dict[str, Callable[[bytes], Any]] = {
+    'json': json.loads,
+}
+if orjson is not None:
+    JSON_DECODERS['orjson'] = orjson.loads
+
+
+def get_json_decoder(name: Optional[str] = None) -> Callable[[bytes], Any]:
+    """
+    Return function to decode json from utf-8 bytes.
+
+    If decoder is not installed, then standard json module is used.
+    """
+    return JSON_DECODERS.get(name or HTTP_CLIENT_CONFIG['json_decoder'], json.loads)
+
+
+def get_accept_encoding() -> str:
+    """Return supported content encodings."""
+    encodings = ['gzip', 'deflate']
+    if brotli is not None:
+        encodings.append('br')
+    return ', '.join(encodings)
+
+
+def get_limit_per_host(parsers_config: Dict[str, Dict]) -> int:
+    """Return max number of concurrent requests of active parsers to one source."""
+    limits = [
+        config.get('rate_limit', {}).get('max_concurrency', config.get('concurrency', 1))
+        for config in parsers_config.values() if config['is_active']
+    ]
+    return max(limits, default=0)
+
+
+def create_client_session(
+    parsers_config: Optional[Dict[str, Dict]] = None,
+    **kwargs
+) -> aiohttp.ClientSession:
+    """
+    Create http session for parsers.
+
+    :param parsers_config: Config of parsers to limit connections per host,
+        PARSERS_CONFIG by default.
+    """
+    if parsers_config is None:
+        parsers_config = PARSERS_CONFIG
+
+    limit_per_host = HTTP_CLIENT_CONFIG['limit_per_host']
+    if limit_per_host is None:
+        limit_per_host = get_limit_per_host(parsers_config)
+
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_CLIENT_CONFIG['limit'],
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=HTTP_CLIENT_CONFIG['ttl_dns_cache'],
+        keepalive_timeout=HTTP_CLIENT_CONFIG['keepalive_timeout'],
+    )
+    headers = {'Accept-Encoding': get_accept_encoding()}
+    return aiohttp.ClientSession(connector=connector, headers=headers, **kwargs)
+
+
+class FetchStats:
+    """Requests of one parser: number, size of response bodies and latencies."""
+
+    def __init__(self) -> None:
+        """Initialization."""
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latencies: List[float] = []
+
+    def response_received(self, latency: float, size: int) -> None:
+        """Count response and its body size in bytes."""
+        self.requests += 1
+        self.bytes += size
+        self.latencies.append(latency)
+
+    def request_failed(self, latency: float) -> None:
+        """Count request without response."""
+        self.requests += 1
+        self.errors += 1
+        self.latencies.append(latency)
+
+    def merge(self, other: 'FetchStats') -> None:
+        """Add requests of other stats, e.g. of other shard of parser."""
+        self.requests += other.requests
+        self.errors += other.errors
+        self.bytes += other.bytes
+        self.latencies.extend(other.latencies)
+
+    def get_latency_percentile(self, percent: float) -> Optional[float]:
+        """Return latency percentile in seconds with nearest-rank method."""
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        rank = max(1, -(-len(latencies) * percent // 100))
+        return latencies[int(rank) - 1]
+
+    def __str__(self) -> str:
+        """Return short report."""
+        if not self.requests:
+            return 'no requests'
+        return '{0} requests, {1} errors, {2:.1f} KB, latency p50 {3:.0f} ms, p90 {4:.0f} ms'.format(
+            self.requests,
+            self.errors,
+            self.bytes / 1024,
+            self.get_latency_percentile(50) * 1000,
+            self.get_latency_percentile(90) * 1000,
+        )
@@ -0,0 +1,120 @@
+"""
+MinHash signatures of vacancies to find near-duplicates across sources.
+
+Text of vacancy is normalized and split to character shingles, MinHash signature
+is computed for batch of vacancies at once with numpy. Signature is split to bands,
+vacancies with a common band hash are candidates to be duplicates, candidates are
+checked by share of equal signature values in database, see
+core.services.vacancies.link_duplicate_vacancies.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from config import DEDUP_CONFIG
+
+
+# Multiplier of polynomial hash of shingle and band
+HASH_MULTIPLIER = np.uint64(1000003)
+
+_NOT_WORD_RE = re.compile(r'[\W_]+')
+
+_permutations: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Return text in lower case with single spaces between words."""
+    if not text:
+        return ''
+    return _NOT_WORD_RE.sub(' ', text.lower().replace('ё', 'е')).strip()
+
+
+def get_vacancy_text(vacancy: Dict[str, str]) -> str:
+    """Return normalized name and description of vacancy."""
+    return normalize_text('{0} {1}'.format(vacancy['name'], vacancy.get('description') or ''))
+
+
+def get_permutations(num_perm: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return parameters of multiply-shift hash functions.
+
+    Functions depend only on seed, so signatures of different runs are comparable.
+    """
+    key = (num_perm, seed)
+    if key not in _permutations:
+        rng = np.random.default_rng(seed)
+        a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        _permutations[key] = (a, b)
+    return _permutations[key]
+
+
+def hash_shingles(texts: List[str], shingle_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return 32-bit hashes of character shingles of all texts as one array.
+
+    Texts shorter than shingle are padded with spaces, so every text has a shingle.
+
+    :return: Tuple (hashes, offsets of texts in hashes)
+    """
+    codes = [
+        np.frombuffer(text.ljust(shingle_size).encode('utf-32-le'), dtype=np.uint32)
+        for text in texts
+    ]
+    lengths = np.array([len(c) for c in codes])
+    counts = lengths - shingle_size + 1
+    text_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    windows = sliding_window_view(np.concatenate(codes).astype(np.uint64), shingle_size)
+    powers = HASH_MULTIPLIER ** np.arange(shingle_size - 1, -1, -1, dtype=np.uint64)
+    # Shingles which do not cross borders of texts
+    starts = np.repeat(text_starts, counts) + np.arange(counts.sum()) - np.repeat(offsets, counts)
+    hashes = (windows[starts] * powers).sum(axis=1, dtype=np.uint64)
+    hashes = (hashes ^ (hashes >> np.uint64(32))) & np.uint64(0xffffffff)
+    return (hashes, offsets)
+
+
+def compute_signatures(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return MinHash signatures and LSH band hashes of texts.
+
+    :return: Tuple (signatures, bands), arrays of shape (texts, "num_perm")
+        of int32 and (texts, "bands") of int64 to be saved in database.
+    """
+    num_perm = DEDUP_CONFIG['num_perm']
+    bands = DEDUP_CONFIG['bands']
+    a, b = get_permutations(num_perm, DEDUP_CONFIG['seed'])
+
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    batch_size = DEDUP_CONFIG['batch_size']
+    for i in range(0, len(texts), batch_size):
+        hashes, offsets = hash_shingles(texts[i:i + batch_size], DEDUP_CONFIG['shingle_size'])
+        values = (a[:, None] * hashes[None, :] + b[:, None]) >> np.uint64(32)
+        signatures[i:i + batch_size] = np.minimum.reduceat(values, offsets, axis=1).T
+
+    rows = signatures.reshape(len(texts), bands, num_perm // bands)
+    band_hashes = np.broadcast_to(np.arange(bands, dtype=np.uint64), (len(texts), bands)).copy()
+    for row in range(rows.shape[2]):
+        band_hashes = band_hashes * HASH_MULTIPLIER + rows[:, :, row]
+
+    return (signatures.astype(np.uint32).view(np.int32), band_hashes.view(np.int64))
+
+
+def add_signatures(vacancies: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Add "minhash" and "lsh_bands" fields to vacancies which have text."""
+    texts = [get_vacancy_text(vacancy) for vacancy in vacancies]
+    with_text = [i for i, text in enumerate(texts) if text]
+    for vacancy in vacancies:
+        vacancy['minhash'] = None
+        vacancy['lsh_bands'] = None
+
+    if with_text:
+        signatures, bands = compute_signatures([texts[i] for i in with_text])
+        for index, signature, vacancy_bands in zip(with_text, signatures.tolist(), bands.tolist()):
+            vacancies[index]['minhash'] = signature
+            vacancies[index]['lsh_bands'] = vacancy_bands
+
+    return vacancies
@@ -0,0 +1,100 @@
+"""
+Enrichment of vacancies created by ingestion run with descriptions.
+
+Parsers save only name and source of vacancy. After run, descriptions of
+vacancies created by this run are loaded from source by parsers which support
+it: concurrently, through rate limiter of source, and saved by batches.
+Vacancy is marked as enriched, so its description is never loaded again.
+"""
+import asyncio
+
+from aiopg.sa import Engine
+
+import html
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+from jobparser.base import BaseParser
+from jobparser.normalization import DESCRIPTION_MAX_LENGTH, clamp_text
+
+from core.services.vacancies import get_vacancies_to_enrich, save_vacancies_descriptions
+
+from config import ENRICHMENT_CONFIG
+
+
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+logger = logging.getLogger(__name__)
+
+
+def html_to_text(markup: Optional[str], max_length: int = DESCRIPTION_MAX_LENGTH) -> Optional[str]:
+    """Return text of html with single spaces, cut to max_length, None for empty text."""
+    if not markup:
+        return None
+    return clamp_text(html.unescape(_TAG_RE.sub(' ', markup)), max_length)
+
+
+async def enrich_parser_vacancies(
+    parser: BaseParser,
+    aio_engine: Engine,
+    min_id: int,
+    deadline: Optional[float] = None
+) -> int:
+    """
+    Load and save descriptions of vacancies of parser region with id greater than min_id.
+
+    Descriptions which failed to load are skipped. If deadline (time of event loop)
+    is reached, not started requests are skipped, loaded descriptions are saved.
+
+    :return: Number of enriched vacancies.
+    """
+    loop = asyncio.get_running_loop()
+    async with aio_engine.acquire() as conn:
+        rows = await get_vacancies_to_enrich(
+            conn,
+            parser.name,
+            min_id,
+            ENRICHMENT_CONFIG['max_vacancies'],
+            parser.shard,
+            parser.shards,
+            parser.region_name,
+        )
+    if not rows:
+        return 0
+
+    semaphore = asyncio.Semaphore(ENRICHMENT_CONFIG['concurrency'])
+
+    async def load_description(row) -> Optional[Tuple[int, Optional[str]]]:
+        async with semaphore:
+            if deadline is not None and loop.time() >= deadline:
+                return None
+            try:
+                markup = await parser.get_description(row.source)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning('{0}. Description of {1} is not loaded: {2!r}'.format(
+                    parser.name, row.source, e,
+                ))
+                return None
+            return (row.id, html_to_text(markup))
+
+    enriched = 0
+    batch: Dict[int, Optional[str]] = {}
+    tasks: List[asyncio.Future] = [asyncio.ensure_future(load_description(row)) for row in rows]
+    try:
+        async with aio_engine.acquire() as conn:
+            for task in asyncio.as_completed(tasks):
+                result = await task
+                if result is not None:
+                    batch[result[0]] = result[1]
+                if len(batch) >= ENRICHMENT_CONFIG['batch_size']:
+                    enriched += await save_vacancies_descriptions(conn, batch)
+                    batch = {}
+            enriched += await save_vacancies_descriptions(conn, batch)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return enriched
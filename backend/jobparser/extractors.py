@@ -0,0 +1,156 @@
+"""
+Extraction of vacancies from html pages.
+
+Extractors are plain functions of markup, so they can be run
+in a process pool without blocking the event loop.
+"""
+from bs4 import BeautifulSoup
+
+from lxml import etree
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import EXTRACTION_CONFIG
+
+
+FEED_CHUNK_SIZE = 16 * 1024
+
+FARPOST_ITEM_CLASS = 'bull-item'
+
+FARPOST_LINK_XPATH = (
+    ".//a[contains(concat(' ', normalize-space(@class), ' '), ' bulletinLink ')]"
+)
+
+FARPOST_DATE_XPATH = (
+    ".//div[contains(concat(' ', normalize-space(@class), ' '), ' date ')]"
+)
+
+FarpostResult = Tuple[List[Dict[str, str]], bool]
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _has_class(element: etree._Element, class_name: str) -> bool:
+    """Check if html element has class."""
+    return class_name in (element.get('class') or '').split()
+
+
+def _is_today_farpost_item(item: etree._Element) -> bool:
+    """
+    Todays vacancies include word 'сегодня' in the item-date node,
+    or have no date at all.
+    """
+    date_divs = item.xpath(FARPOST_DATE_XPATH)
+    return not date_divs or date_divs[0].xpath('string()').find('сегодня') >= 0
+
+
+def extract_farpost_vacancies_lxml(
+    markup: str,
+    base_url: str,
+    source_name: str,
+) -> FarpostResult:
+    """
+    Extract todays vacancies from farpost.ru page with lxml feed parser.
+
+    Page is fed by chunks and every item row is released
+    as soon as vacancy is extracted from it.
+
+    :return: Tuple (vacancies, has_next_page)
+    """
+    vacancies = []
+    is_last_item_today = False
+    items_count = 0
+
+    parser = etree.HTMLPullParser(events=('end',), tag='tr')
+
+    def handle_events():
+        nonlocal is_last_item_today, items_count
+        for _, item in parser.read_events():
+            if not _has_class(item, FARPOST_ITEM_CLASS):
+                continue
+
+            items_count += 1
+            is_last_item_today = _is_today_farpost_item(item)
+            if is_last_item_today:
+                link = item.xpath(FARPOST_LINK_XPATH)[0]
+                vacancies.append({
+                    'name': link.xpath('string()'),
+                    'source': '{0}{1}'.format(base_url, link.get('href')),
+                    'source_name': source_name,
+                })
+
+            item.clear()
+            while item.getprevious() is not None:
+                del item.getparent()[0]
+
+    for start in range(0, len(markup), FEED_CHUNK_SIZE):
+        parser.feed(markup[start:start + FEED_CHUNK_SIZE])
+        handle_events()
+    parser.close()
+    handle_events()
+
+    return (vacancies, items_count > 0 and is_last_item_today)
+
+
+def extract_farpost_vacancies_bs4(
+    markup: str,
+    base_url: str,
+    source_name: str,
+) -> FarpostResult:
+    """
+    Extract todays vacancies from farpost.ru page with BeautifulSoup.
+
+    :return: Tuple (vacancies, has_next_page)
+    """
+    def is_today_vacancy(item) -> bool:
+        date_div = item.find('div', class_='date')
+        return date_div is None or date_div.get_text().find('сегодня') >= 0
+
+    vacancies = []
+    html = BeautifulSoup(markup, 'lxml')
+
+    items = html.find_all('tr', class_=FARPOST_ITEM_CLASS)
+    for item in items:
+        if is_today_vacancy(item):
+            link = item.find('a', class_='bulletinLink')
+            vacancies.append({
+                'name': link.get_text(),
+                'source': '{0}{1}'.format(base_url, link.get('href')),
+                'source_name': source_name,
+            })
+
+    has_next_page = len(items) > 0 and is_today_vacancy(items[-1])
+    return (vacancies, has_next_page)
+
+
+FARPOST_EXTRACTORS: Dict[str, Callable[[str, str, str], FarpostResult]] = {
+    'lxml': extract_farpost_vacancies_lxml,
+    'bs4': extract_farpost_vacancies_bs4,
+}
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return process pool for extraction, it is created on first use."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=EXTRACTION_CONFIG['max_workers'])
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Stop processes of extraction pool."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown()
+        _process_pool = None
+
+
+async def run_extractor(extractor: Callable, *args, in_process: bool = True):
+    """Run extractor in process pool or in current thread."""
+    if not in_process:
+        return extractor(*args)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), extractor, *args)
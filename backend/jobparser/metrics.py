@@ -0,0 +1,94 @@
+"""
+Export of ingestion runs to Prometheus textfile.
+
+File is written for node_exporter textfile collector and contains
+metrics of the last run of every parser in every region.
+"""
+import os
+from pathlib import Path
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+
+METRICS_PREFIX = 'khabjob_ingestion'
+
+# Name, type, help and column of run or function of run
+RUN_METRICS = (
+    ('last_run_timestamp_seconds', 'gauge', 'Time when the last run finished.',
+        lambda run: run['finished_at'].timestamp()),
+    ('duration_seconds', 'gauge', 'Duration of the last run.',
+        lambda run: (run['finished_at'] - run['started_at']).total_seconds()),
+    ('pages', 'gauge', 'Pages parsed by the last run.', 'pages'),
+    ('requests', 'gauge', 'HTTP requests sent by the last run.', 'requests'),
+    ('http_errors', 'gauge', 'HTTP requests failed in the last run.', 'http_errors'),
+    ('response_bytes', 'gauge', 'Size of response bodies in the last run.', 'bytes'),
+    ('failed', 'gauge', '1 if the last run failed.', lambda run: int(run['error'] is not None)),
+    ('truncated', 'gauge', '1 if the last run was stopped by deadline.',
+        lambda run: int(run['is_truncated'])),
+)
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    """Return labels in Prometheus text format."""
+    return ','.join('{0}="{1}"'.format(name, value) for name, value in labels)
+
+
+def _get_run_labels(run: Mapping) -> List[Tuple[str, str]]:
+    """Return labels of parser and region of run, runs without region have no region label."""
+    labels = [('parser', run['parser_name'])]
+    if run.get('region') is not None:
+        labels.append(('region', run['region']))
+    return labels
+
+
+def _format_metric(name: str, metric_type: str, help_text: str, samples: List[str]) -> List[str]:
+    """Return lines of metric family."""
+    full_name = '{0}_{1}'.format(METRICS_PREFIX, name)
+    lines = [
+        '# HELP {0} {1}'.format(full_name, help_text),
+        '# TYPE {0} {1}'.format(full_name, metric_type),
+    ]
+    lines.extend('{0}{1}'.format(full_name, sample) for sample in samples)
+    return lines
+
+
+def format_prometheus_metrics(runs: List[Mapping]) -> str:
+    """Return metrics of runs in Prometheus text format, runs must be of different units."""
+    lines = []
+    for name, metric_type, help_text, value in RUN_METRICS:
+        get_value = value if callable(value) else lambda run, column=value: run[column]
+        lines.extend(_format_metric(name, metric_type, help_text, [
+            '{{{0}}} {1}'.format(_format_labels(_get_run_labels(run)), get_value(run))
+            for run in runs
+        ]))
+
+    lines.extend(_format_metric('fetch_latency_seconds', 'gauge', 'Fetch latency of the last run.', [
+        '{{{0}}} {1}'.format(
+            _format_labels(_get_run_labels(run) + [('quantile', quantile)]),
+            run[column],
+        )
+        for run in runs
+        for quantile, column in (('0.5', 'latency_p50'), ('0.9', 'latency_p90'), ('0.99', 'latency_p99'))
+        if run[column] is not None
+    ]))
+
+    lines.extend(_format_metric('vacancies', 'gauge', 'Vacancies of the last run by result.', [
+        '{{{0}}} {1}'.format(
+            _format_labels(_get_run_labels(run) + [('result', result)]),
+            run[result],
+        )
+        for run in runs
+        for result in ('created', 'updated', 'skipped', 'duplicates', 'enriched', 'rejected')
+    ]))
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus_textfile(path: Optional[Path], runs: List[Mapping]) -> None:
+    """
+    Write metrics of runs to file.
+
+    File is replaced atomically, so collector never reads partial file.
+    """
+    path = Path(path)
+    tmp_path = path.with_name('{0}.tmp'.format(path.name))
+    tmp_path.write_text(format_prometheus_metrics(runs))
+    os.replace(tmp_path, path)
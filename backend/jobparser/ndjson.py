@@ -0,0 +1,208 @@
+"""
+Dumps of vacancies in NDJSON format: one json object per line.
+
+Parsers write vacancies to dump as soon as they yield pages, so memory
+does not grow with size of run and dump can be piped to other tools.
+Dump is compressed with gzip if it is requested or file name ends with ".gz",
+compressed dumps are detected on reading. Dump can be loaded to database
+with the same writers as parsers results.
+"""
+import asyncio
+
+from aiopg.sa import create_engine
+
+import gzip
+import json
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Dict, Iterator, List, Optional
+
+from jobparser.base import BaseParser
+from jobparser.client import create_client_session
+from jobparser.utils import IngestionStats, get_active_parsers, ingest_vacancies
+
+from core.db.utils import get_postgres_dsn
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Path of standard input or output
+STD_STREAM = '-'
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def dump_vacancy(vacancy: Dict[str, str]) -> bytes:
+    """Return vacancy as json line."""
+    if orjson is not None:
+        return orjson.dumps(vacancy, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(vacancy, ensure_ascii=False).encode() + b'\n'
+
+
+def is_gzip_path(path: str) -> bool:
+    """Check if dump file name has gzip extension."""
+    return path != STD_STREAM and Path(path).suffix == '.gz'
+
+
+@contextmanager
+def open_dump_output(path: str = STD_STREAM, compress: bool = False) -> Iterator[BinaryIO]:
+    """
+    Open dump for writing, standard output is flushed, but not closed.
+
+    :param path: File path or "-" for standard output.
+    :param compress: Compress dump with gzip, file with ".gz" extension is always compressed.
+    """
+    if path == STD_STREAM:
+        stream = sys.stdout.buffer
+        output = gzip.GzipFile(fileobj=stream, mode='wb') if compress else stream
+        try:
+            yield output
+        finally:
+            if output is not stream:
+                output.close()
+            stream.flush()
+        return
+
+    if compress or is_gzip_path(path):
+        output = gzip.open(path, 'wb')
+    else:
+        output = open(path, 'wb')
+    with output:
+        yield output
+
+
+@contextmanager
+def open_dump_input(path: str = STD_STREAM) -> Iterator[BinaryIO]:
+    """Open dump for reading, gzip compression is detected by content."""
+    stream = sys.stdin.buffer if path == STD_STREAM else open(path, 'rb')
+    try:
+        if stream.peek(len(GZIP_MAGIC))[:len(GZIP_MAGIC)] == GZIP_MAGIC:
+            with gzip.GzipFile(fileobj=stream, mode='rb') as dump:
+                yield dump
+        else:
+            yield stream
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def read_dump_pages(stream: BinaryIO, page_size: int) -> Iterator[List[Dict[str, str]]]:
+    """Yield vacancies from dump by pages, empty lines are skipped."""
+    loads = orjson.loads if orjson is not None else json.loads
+    page = []
+    for line in stream:
+        if not line.strip():
+            continue
+        page.append(loads(line))
+        if len(page) >= page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+async def write_parser_vacancies(parser: BaseParser, output: BinaryIO) -> int:
+    """Write vacancies of parser to dump as soon as pages are yielded."""
+    count = 0
+    async for vacancies in parser.iter_vacancies():
+        output.write(b''.join(dump_vacancy(vacancy) for vacancy in vacancies))
+        count += len(vacancies)
+    return count
+
+
+async def dump_parsers_vacancies(
+    output: BinaryIO,
+    parsers: Optional[List[str]] = None
+) -> Dict[str, int]:
+    """
+    Run parsers and write their vacancies to dump.
+
+    Parsers are independent: if one of them fails, others are parsed till the end
+    and then error of the first failed parser is raised.
+
+    :return: Number of written vacancies of every parser in all regions.
+    """
+    async with create_client_session() as session:
+        active_parsers = get_active_parsers(session, parsers)
+        results = await asyncio.gather(
+            *[write_parser_vacancies(parser, output) for parser in active_parsers],
+            return_exceptions=True,
+        )
+
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+    counts = {}
+    for parser, count in zip(active_parsers, results):
+        counts[parser.name] = counts.get(parser.name, 0) + count
+    return counts
+
+
+def write_vacancies_dump(output: BinaryIO, results: List[List[Dict[str, str]]]) -> int:
+    """Write vacancies of parsers results to dump."""
+    count = 0
+    for vacancies in results:
+        for vacancy in vacancies:
+            output.write(dump_vacancy(vacancy))
+        count += len(vacancies)
+    return count
+
+
+class DumpReader:
+    """Source of pages from dump with interface of parser for ingest_vacancies."""
+
+    name = 'dump'
+
+    supports_enrichment = False
+
+    # Vacancies keep regions of their parsers
+    region_name = None
+
+    def __init__(self, stream: BinaryIO, page_size: int) -> None:
+        """Initialization."""
+        self.stream = stream
+        self.page_size = page_size
+        self.config = {}
+        self.checkpoint = None
+        self.high_water_mark = None
+        self.fetch_stats = None
+
+    async def iter_vacancies(self) -> AsyncIterator[List[Dict[str, str]]]:
+        """Yield pages of dump, file is read in executor."""
+        loop = asyncio.get_running_loop()
+        pages = read_dump_pages(self.stream, self.page_size)
+        while True:
+            page = await loop.run_in_executor(None, next, pages, None)
+            if page is None:
+                return
+            yield page
+
+
+async def load_vacancies_dump(
+    stream: BinaryIO,
+    mode: str = 'upsert',
+    page_size: int = 500
+) -> IngestionStats:
+    """
+    Save vacancies from dump to database.
+
+    Vacancies are saved by pages with writers of ingestion,
+    checkpoints and ingestion runs are not changed.
+    """
+    async with create_engine(get_postgres_dsn()) as aio_engine:
+        stats, = await ingest_vacancies(
+            [DumpReader(stream, page_size)],
+            aio_engine,
+            mode,
+            use_checkpoints=False,
+            record_results=False,
+        )
+
+    if stats.error is not None:
+        raise stats.error
+    return stats
@@ -0,0 +1,127 @@
+"""
+Normalization of parsed vacancies before saving.
+
+Page is normalized column by column: names and descriptions are trimmed and cut
+to length of their columns, sources are canonicalized (tracking query params
+and fragment are removed). Vacancies which can not be saved (no name, source
+is not http url or is too long, unknown source name) are rejected with reason
+and saved to rejects table instead of failing the whole batch.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from core.db.schema import vacancies_table
+
+
+NAME_MAX_LENGTH = vacancies_table.c.name.type.length
+SOURCE_MAX_LENGTH = vacancies_table.c.source.type.length
+SOURCE_NAME_MAX_LENGTH = vacancies_table.c.source_name.type.length
+DESCRIPTION_MAX_LENGTH = vacancies_table.c.description.type.length
+
+# Query params of links which only track where user came from
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'yclid', '_openstat', 'from', 'hhtmFrom', 'hhtmFromLabel', 'ref',
+})
+TRACKING_PARAMS_PREFIX = 'utm_'
+
+# Fields added to vacancy by writers, they are not saved with rejected vacancy
+INTERNAL_FIELDS = ('minhash', 'lsh_bands', 'content_hash')
+
+_SPACES_RE = re.compile(r'\s+')
+
+
+class VacancyReject(NamedTuple):
+    """Vacancy which can not be saved and reason of it."""
+
+    vacancy: Dict
+    reason: str
+
+    def get_data(self) -> Dict:
+        """Return fields of vacancy as parser returned them."""
+        return {k: v for k, v in self.vacancy.items() if k not in INTERNAL_FIELDS}
+
+
+def clamp_text(text: Optional[str], max_length: int) -> Optional[str]:
+    """Return text with single spaces, cut to max_length with ellipsis, None for empty text."""
+    if not text:
+        return None
+    text = _SPACES_RE.sub(' ', str(text)).strip()
+    if len(text) > max_length:
+        text = text[:max_length - 1].rstrip() + '…'
+    return text or None
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Return url without tracking query params and fragment, scheme and host are lowercased.
+
+    :raises ValueError: If url can not be parsed.
+    """
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith(TRACKING_PARAMS_PREFIX)
+    ]
+    return urlunsplit((
+        parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), '',
+    ))
+
+
+def _normalize_source(source: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Return tuple (canonical source, reason of reject)."""
+    if not source:
+        return (None, 'empty source')
+    try:
+        source = canonicalize_url(str(source))
+    except ValueError:
+        return (None, 'invalid source')
+    if not source.startswith(('http://', 'https://')):
+        return (None, 'source is not http url')
+    if len(source) > SOURCE_MAX_LENGTH:
+        return (None, 'source is longer than {0}'.format(SOURCE_MAX_LENGTH))
+    return (source, None)
+
+
+def _check_source_name(source_name: Optional[str]) -> Optional[str]:
+    """Return reason of reject of source name, None if it is valid."""
+    if not source_name:
+        return 'empty source_name'
+    if len(source_name) > SOURCE_NAME_MAX_LENGTH:
+        return 'source_name is longer than {0}'.format(SOURCE_NAME_MAX_LENGTH)
+    return None
+
+
+def normalize_vacancies(
+    vacancies: List[Dict[str, str]]
+) -> Tuple[List[Dict[str, str]], List[VacancyReject]]:
+    """
+    Normalize page of vacancies, every field is processed for the whole page at once.
+
+    Other fields of vacancies are kept as is.
+
+    :return: Tuple (normalized vacancies, rejected vacancies)
+    """
+    names = [clamp_text(v.get('name'), NAME_MAX_LENGTH) for v in vacancies]
+    sources = [_normalize_source(v.get('source')) for v in vacancies]
+    source_names_errors = [_check_source_name(v.get('source_name')) for v in vacancies]
+    descriptions = [
+        clamp_text(v['description'], DESCRIPTION_MAX_LENGTH) if 'description' in v else None
+        for v in vacancies
+    ]
+
+    normalized = []
+    rejects = []
+    for vacancy, name, (source, source_error), source_name_error, description in zip(
+        vacancies, names, sources, source_names_errors, descriptions
+    ):
+        reason = source_error or source_name_error or (None if name else 'empty name')
+        if reason is not None:
+            rejects.append(VacancyReject(vacancy, reason))
+            continue
+
+        vacancy = dict(vacancy, name=name, source=source)
+        if 'description' in vacancy:
+            vacancy['description'] = description
+        normalized.append(vacancy)
+    return (normalized, rejects)
@@ -1,19 +1,27 @@
 """Parser classes."""
-import asyncio
-
+from aiohttp import ClientSession
 import aiofiles
 
-from bs4 import BeautifulSoup
-
 import json
-from itertools import count
-from random import uniform
-import time
-from typing import List, Dict
+import logging
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import math
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+
+from jobparser.base import BaseParser, ParserConfigError
+from jobparser.extractors import (
+    FARPOST_EXTRACTORS,
+    extract_farpost_vacancies_bs4,
+    run_extractor,
+)
+from jobparser.phrases import get_phrase_filter
+
+from config import BASE_DIR, DEFAULT_REGION
 
-from jobparser.base import BaseParser
 
-from config import BASE_DIR
+logger = logging.getLogger(__name__)
 
 
 class HHParser(BaseParser):
@@ -22,45 +30,87 @@ class HHParser(BaseParser):
     base_url = 'https://hh.ru'
     name = 'hh'
 
+    supports_page_shards = True
+    supports_enrichment = True
+
     per_page = 100
-    _page_count = count(0)
+
+    # Vacancy id in url like https://hh.ru/vacancy/12345
+    source_id_re = re.compile(r'/vacancy/(\d+)')
 
     parse_day_limit = 200
 
-    def get_params(self):
-        """Return params for request to hh.ru API."""
-        return {
-            'area': 102,
-            'period': 1,
-            'text': 'Хабаровск',
-            'per_page': self.per_page,
-            'page': next(self._page_count),
-        }
+    # Region has id of hh.ru area and optional search text
+    default_region = {'name': DEFAULT_REGION, 'area': 102, 'text': 'Хабаровск'}
 
-    async def get_vacancies(self) -> List[Dict[str, str]]:
-        """Return vacancies from hh.ru."""
-        vacancies = []
+    def get_params(self, page: int) -> Dict:
+        """
+        Return params for request to hh.ru API.
 
-        while True:
-            data = await self.get_json(self.parse_url, params=self.get_params())
-
-            if not data:
-                return vacancies
-            
-            for item in data['items']:
-                vacancy = {
-                    'name': item['name'],
-                    'source': item['alternate_url'],
-                    'source_name': self.name,
-                }
-                vacancies.append(vacancy)
-                        
-            if any([
-                ((data['page'] + 1) * self.per_page >= data['found']), 
-                len(vacancies) >= self.parse_day_limit
-            ]):
-                # API numberring starts from 0
-                return vacancies
+        Vacancies are sorted from newest, if parser has checkpoint,
+        then only vacancies published after it are requested.
+        """
+        params = {
+            'area': self.region['area'],
+            'order_by': 'publication_time',
+            'per_page': self.per_page,
+            'page': page,
+        }
+        if self.region.get('text'):
+            params['text'] = self.region['text']
+        if self.checkpoint is None:
+            params['period'] = 1
+        else:
+            params['date_from'] = self.checkpoint.isoformat(timespec='seconds')
+        return params
+
+    def get_published_at(self, item: Dict) -> datetime:
+        """Return publication time of hh.ru vacancy."""
+        return datetime.strptime(item['published_at'], '%Y-%m-%dT%H:%M:%S%z')
+
+    def get_pages_count(self, data: Dict) -> int:
+        """Return number of pages to load, limited with parse_day_limit."""
+        found = min(data['found'], self.parse_day_limit)
+        return math.ceil(found / self.per_page)
+
+    async def fetch_page(self, page: int) -> Dict:
+        """Load page of hh.ru API response, API numbering starts from 0."""
+        return await self.get_json(self.parse_url, params=self.get_params(page))
+
+    def extract_vacancies(self, data: Dict) -> List[Dict[str, str]]:
+        """Extract vacancies from page of hh.ru API response."""
+        return [
+            {
+                'name': item['name'],
+                'source': item['alternate_url'],
+                'source_name': self.name,
+                'region': self.region_name,
+            } for item in data['items']
+        ]
+
+    async def iter_vacancies(self) -> AsyncIterator[List[Dict[str, str]]]:
+        """Yield pages of vacancies from hh.ru, stop on page with known vacancies."""
+        async for data in self.fetch_pages(
+            self.fetch_page,
+            self.get_pages_count,
+            is_last_page=lambda data: self.has_known_items(data['items']),
+        ):
+            data['items'] = self.filter_new_items(data['items'])
+            yield self.extract_vacancies(data)
+
+    def extract_archived(self, body: bytes, encoding: str) -> Optional[List[Dict[str, str]]]:
+        """Return vacancies of archived page of hh.ru API response."""
+        data = self.decode_json(body, encoding)
+        return self.extract_vacancies(data) if 'items' in data else None
+
+    async def get_description(self, source: str) -> Optional[str]:
+        """Load description of hh.ru vacancy from API, it is html."""
+        match = self.source_id_re.search(source)
+        if match is None:
+            return None
+        url = '{0}/{1}'.format(self.parse_url.rstrip('/'), match.group(1))
+        data = await self.get_json(url)
+        return data.get('description')
 
 
 class SuperjobParser(BaseParser):
@@ -69,45 +119,101 @@ class SuperjobParser(BaseParser):
     base_url = 'https://superjob.ru'
     name = 'superjob'
 
+    supports_page_shards = True
+    supports_enrichment = True
+
     per_page = 100
-    _page_count = count(0)
+
+    # Vacancy id in url like https://khabarovsk.superjob.ru/vakansii/programmist-12345.html
+    source_id_re = re.compile(r'-(\d+)\.html')
 
     parse_day_limit = 200
 
-    def get_params(self):
-        """Return params for request to superjob.ru API."""
-        return {
-            'period': 1,
-            'town': 56,
+    # Region has id of superjob.ru town
+    default_region = {'name': DEFAULT_REGION, 'town': 56}
+
+    def get_params(self, page: int) -> Dict:
+        """
+        Return params for request to superjob.ru API.
+
+        Vacancies are sorted from newest, if parser has checkpoint,
+        then only vacancies published after it are requested.
+        """
+        params = {
+            'town': self.region['town'],
+            'order_field': 'date',
+            'order_direction': 'desc',
             'count': self.per_page,
-            'page': next(self._page_count),
+            'page': page,
         }
-
-    async def get_vacancies(self) -> List[Dict[str, str]]:
-        """Return vacancies from superjob.ru."""
-        vacancies = []
-        
+        if self.checkpoint is None:
+            params['period'] = 1
+        else:
+            params['date_published_from'] = int(self.checkpoint.timestamp())
+        return params
+
+    def get_published_at(self, item: Dict) -> datetime:
+        """Return publication time of superjob.ru vacancy."""
+        return datetime.fromtimestamp(item['date_published'], tz=timezone.utc)
+
+    def get_pages_count(self, data: Dict) -> int:
+        """Return number of pages to load, limited with parse_day_limit."""
+        if not data['more']:
+            return 1
+        total = min(data['total'], self.parse_day_limit)
+        return math.ceil(total / self.per_page)
+
+    async def fetch_page(self, page: int) -> Dict:
+        """Load page of superjob.ru API response, API numbering starts from 0."""
         headers = {
             'X-Api-App-Id': self.config.get('secret_key')
         }
         url = '{0}/{1}/vacancies'.format(self.parse_url, self.config.get('v'))
-        
-        while True:
-            data = await self.get_json(url, params=self.get_params(), headers=headers)
-
-            if not data:
-                return vacancies
-
-            for item in data['objects']:
-                vacancy = {
-                    'name': item['profession'],
-                    'source': item['link'],
-                    'source_name': self.name,
-                }
-                vacancies.append(vacancy)
-
-                if not data['more'] or len(vacancies) >= self.parse_day_limit:
-                    return vacancies
+        return await self.get_json(url, params=self.get_params(page), headers=headers)
+
+    def extract_vacancies(self, data: Dict) -> List[Dict[str, str]]:
+        """Extract vacancies from page of superjob.ru API response."""
+        return [
+            {
+                'name': item['profession'],
+                'source': item['link'],
+                'source_name': self.name,
+                'region': self.region_name,
+            } for item in data['objects']
+        ]
+
+    async def iter_vacancies(self) -> AsyncIterator[List[Dict[str, str]]]:
+        """Yield pages of vacancies from superjob.ru, stop on page with known vacancies."""
+        vacancies_count = 0
+
+        async for data in self.fetch_pages(
+            self.fetch_page,
+            self.get_pages_count,
+            is_last_page=lambda data: self.has_known_items(data['objects']),
+        ):
+            data['objects'] = self.filter_new_items(data['objects'])
+            vacancies = self.extract_vacancies(data)
+            vacancies = vacancies[:self.parse_day_limit - vacancies_count]
+            vacancies_count += len(vacancies)
+            if vacancies:
+                yield vacancies
+
+    def extract_archived(self, body: bytes, encoding: str) -> Optional[List[Dict[str, str]]]:
+        """Return vacancies of archived page of superjob.ru API response."""
+        data = self.decode_json(body, encoding)
+        return self.extract_vacancies(data) if 'objects' in data else None
+
+    async def get_description(self, source: str) -> Optional[str]:
+        """Load description of superjob.ru vacancy from API, it may be html."""
+        match = self.source_id_re.search(source)
+        if match is None:
+            return None
+        headers = {
+            'X-Api-App-Id': self.config.get('secret_key')
+        }
+        url = '{0}/{1}/vacancies/{2}/'.format(self.parse_url, self.config.get('v'), match.group(1))
+        data = await self.get_json(url, headers=headers)
+        return data.get('vacancyRichText') or data.get('candidat')
 
 
 class FarpostParser(BaseParser):
@@ -116,11 +222,18 @@ class FarpostParser(BaseParser):
     base_url = 'https://www.farpost.ru'
     name = 'farpost'
 
-    _page_count = count(1)
+    # Region has path of city on farpost.ru, it is put to "{path}" of parse_url
+    default_region = {'name': DEFAULT_REGION, 'path': 'khabarovsk'}
 
-    def get_next_page_url(self) -> str:
-        """Return next paginated url for parse."""
-        return '{0}/?page={1}'.format(self.parse_url, next(self._page_count))
+    def get_page_url(self, page: int) -> str:
+        """Return paginated url of region for parse, numbering starts from 1."""
+        return '{0}/?page={1}'.format(self.parse_url.format(**self.region), page)
+
+    def set_region(self, vacancies: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Add region of parser to vacancies returned by extractor."""
+        for vacancy in vacancies:
+            vacancy['region'] = self.region_name
+        return vacancies
 
     async def load_cookies(self) -> Dict[str, str]:
         """Load cookie from local json-file."""
@@ -129,41 +242,58 @@ class FarpostParser(BaseParser):
             content = await f.read()
         return json.loads(content)
 
-    async def get_vacancies(self) -> List[Dict[str, str]]:
-        """Return vacancies from farpost.ru."""
-        vacancies = []
-        cookies = await self.load_cookies()
+    async def extract_vacancies(self, markup: str) -> Tuple[List[Dict[str, str]], bool]:
+        """
+        Extract todays vacancies from farpost.ru page.
 
-        while True:
+        Extraction runs in process pool unless "extract_in_process" is turned off,
+        BeautifulSoup extractor is used if lxml extractor fails.
 
-            markup = await self.get_html(self.get_next_page_url(), cookies=cookies)
-            html = BeautifulSoup(markup, 'lxml')
+        :return: Tuple (vacancies, has_next_page)
+        """
+        extractor_name = self.config.get('extractor', 'lxml')
+        in_process = self.config.get('extract_in_process', True)
+        args = (markup, self.base_url, self.name)
+
+        try:
+            vacancies, has_next_page = await run_extractor(
+                FARPOST_EXTRACTORS[extractor_name], *args, in_process=in_process,
+            )
+        except Exception:
+            if extractor_name == 'bs4':
+                raise
+            logger.exception('Farpost page extraction with lxml failed, fallback to bs4')
+            vacancies, has_next_page = await run_extractor(
+                extract_farpost_vacancies_bs4, *args, in_process=in_process,
+            )
+        return (self.set_region(vacancies), has_next_page)
+
+    def extract_archived(self, body: bytes, encoding: str) -> Optional[List[Dict[str, str]]]:
+        """
+        Return vacancies of archived farpost.ru page.
 
-            items = html.find_all('tr', class_='bull-item')
-            for item in items:
-                if self.is_today_vacancy(item):
-                    vacancy = {
-                        'name': item.find('a', class_='bulletinLink').get_text(),
-                        'source': '{0}{1}'.format(
-                            self.base_url,
-                            item.find('a', class_='bulletinLink').get('href'),
-                        ),
-                        'source_name': self.name,
-                    }
-                    vacancies.append(vacancy)
+        Extractors keep only vacancies marked as todays on the page,
+        so page is extracted the same way only on the day it was loaded.
+        """
+        extractor = FARPOST_EXTRACTORS[self.config.get('extractor', 'lxml')]
+        vacancies, _ = extractor(body.decode(encoding), self.base_url, self.name)
+        return self.set_region(vacancies)
 
-            if len(items) == 0 or not self.is_today_vacancy(items[-1]):
-                return vacancies
+    async def iter_vacancies(self) -> AsyncIterator[List[Dict[str, str]]]:
+        """Yield pages of vacancies from farpost.ru."""
+        cookies = await self.load_cookies()
+        page = 1
 
-            await asyncio.sleep(uniform(2,3))
+        while True:
 
-    def is_today_vacancy(self, item) -> bool:
-        """
-        Todays vacancies include word 'сегодня' in the item-date node,
-        or have no date at all.
-        """
-        date_div = item.find('div', class_='date')
-        return date_div is None or date_div.get_text().find('сегодня') >= 0
+            markup = await self.get_html(self.get_page_url(page), cookies=cookies)
+            vacancies, has_next_page = await self.extract_vacancies(markup)
+            yield vacancies
+
+            if not has_next_page:
+                return
+
+            page += 1
 
 
 class VkParser(BaseParser):
@@ -172,31 +302,100 @@ class VkParser(BaseParser):
     base_url = 'https://vk.com'
     name = 'vk'
 
-    async def get_vacancies(self) -> List[Dict[str, str]]:
-        """Return vacancies from farpost.ru."""
+    # Region has query of newsfeed search, usually hashtag of city
+    default_region = {'name': DEFAULT_REGION, 'query': '#РаботаХабаровск'}
+
+    def __init__(self, session: ClientSession, config: Dict) -> None:
+        """Initialization, phrases of posts filter are compiled once."""
+        super().__init__(session, config)
+        filter_config = config.get('posts_filter') or {}
+        try:
+            self.posts_filter = get_phrase_filter(filter_config)
+        except ValueError as e:
+            raise ParserConfigError('Invalid "posts_filter" of vk parser config: {0}'.format(e))
+        self.block_reposts = filter_config.get('block_reposts', False)
+        # Number of posts matched by every rule of filter in this run
+        self.filter_counts = Counter()
+
+    def filter_posts(self, posts: List[Dict]) -> List[Dict]:
+        """
+        Return posts which are not blocked by filter, the whole page is matched at once.
+
+        Reposts are counted by "repost" rule.
+        """
+        if self.posts_filter is None and not self.block_reposts:
+            return posts
+
+        if self.posts_filter is not None:
+            kept, counts = self.posts_filter.filter_page([post.get('text') or '' for post in posts])
+        else:
+            kept, counts = ([True] * len(posts), Counter())
+        if self.block_reposts:
+            for i, post in enumerate(posts):
+                if post.get('copy_history'):
+                    kept[i] = False
+                    counts['repost'] += 1
+
+        self.filter_counts.update(counts)
+        if counts:
+            logger.info(
+                '%s (%s). Posts kept: %s of %s, matches by rules: %s',
+                self.name,
+                self.region_name,
+                sum(kept),
+                len(posts),
+                ', '.join('{0}: {1}'.format(rule, count) for rule, count in sorted(counts.items())),
+            )
+        return [post for post, is_kept in zip(posts, kept) if is_kept]
+
+    def extract_vacancies(self, data: Dict) -> List[Dict[str, str]]:
+        """Extract vacancies from vk.com newsfeed search response, posts are filtered first."""
         vacancies = []
+        for post in self.filter_posts(data['response']['items']):
+            # The first line of post, the whole text if it is one line
+            name = post.get('text').partition('\n')[0]
+            vacancy = {
+                'name': name,
+                'source': '{0}/wall{1}_{2}'.format(
+                    self.base_url,
+                    str(post.get('owner_id')), 
+                    post.get('id'),
+                ),
+                'source_name': self.name,
+                'region': self.region_name,
+            }
+            vacancies.append(vacancy)
+        return vacancies
+
+    def extract_archived(self, body: bytes, encoding: str) -> Optional[List[Dict[str, str]]]:
+        """Return vacancies of archived vk.com newsfeed search response."""
+        data = self.decode_json(body, encoding)
+        return self.extract_vacancies(data) if 'response' in data else None
+
+    def get_published_at(self, item: Dict) -> datetime:
+        """Return publication time of vk.com post."""
+        return datetime.fromtimestamp(item['date'], tz=timezone.utc)
+
+    async def iter_vacancies(self) -> AsyncIterator[List[Dict[str, str]]]:
+        """
+        Yield vacancies from vk.com, search API returns them as single page.
+
+        Posts are requested from checkpoint or for the last day if parser has no checkpoint.
+        """
+        if self.checkpoint is None:
+            start_time = datetime.now(tz=timezone.utc) - timedelta(days=1)
+        else:
+            start_time = self.checkpoint
 
         params = {
-            'q': r'#РаботаХабаровск',
+            'q': self.region['query'],
             'access_token': self.config.get('access_token'),
             'v': self.config.get('v'),
-            'start_time': int(time.time()) - 86400,
+            'start_time': int(start_time.timestamp()),
         }
 
         data = await self.get_json(self.parse_url, params=params)
 
         if data:
-            for post in data['response']['items']:
-                name_end_index = post.get('text').find('\n')
-                vacancy = {
-                    'name': post.get('text')[:name_end_index],
-                    'source': '{0}/wall{1}_{2}'.format(
-                        self.base_url,
-                        str(post.get('owner_id')), 
-                        post.get('id'),
-                    ),
-                    'source_name': self.name,
-                }
-                vacancies.append(vacancy)
-        return vacancies
-        
+            data['response']['items'] = self.filter_new_items(data['response']['items'])
+            yield self.extract_vacancies(data)
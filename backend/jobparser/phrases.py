@@ -0,0 +1,93 @@
+"""
+Filter of texts by block and allow phrases.
+
+All phrases of all rules are compiled to one regular expression, every phrase
+is a named group, so rule of match is known by name of matched group.
+Longer phrases are tried first, phrases match only whole words, case is ignored.
+Page of texts is joined and scanned once, matches are mapped to texts
+by their offsets. Text is blocked if it matches some block rule and no allow rule.
+"""
+import re
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# Texts of page are joined with it, phrases can not contain it
+SEPARATOR = '\x00'
+
+
+class PhraseFilter:
+    """Compiled block and allow rules, rule is a name and list of phrases."""
+
+    def __init__(
+        self,
+        block: Dict[str, List[str]],
+        allow: Optional[Dict[str, List[str]]] = None
+    ) -> None:
+        """
+        Initialization.
+
+        :raises ValueError: If rule is both block and allow rule, or phrase is empty.
+        """
+        allow = allow or {}
+        if set(block) & set(allow):
+            raise ValueError('Rules {0} are both block and allow rules.'.format(
+                sorted(set(block) & set(allow))
+            ))
+        self.block_rules = frozenset(block)
+        self.allow_rules = frozenset(allow)
+
+        phrases = []
+        for rule, rule_phrases in list(block.items()) + list(allow.items()):
+            for phrase in rule_phrases:
+                phrase = phrase.strip()
+                if not phrase or SEPARATOR in phrase:
+                    raise ValueError('Invalid phrase {0!r} of rule "{1}".'.format(phrase, rule))
+                phrases.append((phrase, rule))
+        phrases.sort(key=lambda item: len(item[0]), reverse=True)
+
+        # Rule of every group, group names must be identifiers
+        self.group_rules = {'p{0}'.format(i): rule for i, (_, rule) in enumerate(phrases)}
+        alternatives = '|'.join(
+            '(?P<p{0}>{1})'.format(i, re.escape(phrase)) for i, (phrase, _) in enumerate(phrases)
+        )
+        self.pattern = re.compile(r'(?<!\w)(?:{0})(?!\w)'.format(alternatives or '(?!)'), re.IGNORECASE)
+
+    def match_page(self, texts: List[str]) -> List[Set[str]]:
+        """Return names of rules matched by every text, page is scanned once."""
+        matches = [set() for _ in texts]
+        if not texts:
+            return matches
+
+        # Offset of every text in joined page
+        starts = list(accumulate((len(text) + len(SEPARATOR) for text in texts[:-1]), initial=0))
+        for match in self.pattern.finditer(SEPARATOR.join(texts)):
+            matches[bisect_right(starts, match.start()) - 1].add(self.group_rules[match.lastgroup])
+        return matches
+
+    def is_blocked(self, rules: Set[str]) -> bool:
+        """Check whether text with matched rules is blocked."""
+        return bool(rules & self.block_rules) and not rules & self.allow_rules
+
+    def filter_page(self, texts: List[str]) -> Tuple[List[bool], Counter]:
+        """
+        Return whether every text is kept and number of texts matched by every rule.
+
+        Text is counted once for every its rule, matched allow rules are counted
+        even if text is not blocked.
+        """
+        counts = Counter()
+        kept = []
+        for rules in self.match_page(texts):
+            counts.update(rules)
+            kept.append(not self.is_blocked(rules))
+        return (kept, counts)
+
+
+def get_phrase_filter(config: Optional[Dict]) -> Optional[PhraseFilter]:
+    """Return filter of "block" and "allow" rules of config, None if config has no rules."""
+    if not config or not (config.get('block') or config.get('allow')):
+        return None
+    return PhraseFilter(config.get('block', {}), config.get('allow'))
@@ -0,0 +1,68 @@
+"""
+Prefilter of vacancies saved by recent runs.
+
+Most vacancies returned by parser were saved by previous run and are not changed,
+but every one of them still costs upsert. Content hashes of vacancies modified
+in recent days are loaded once per run by hashes of their sources, then pages
+are split before sending to database: known unchanged vacancies are only touched,
+new and changed ones are upserted.
+"""
+from aiopg.sa import Engine
+
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.services.vacancies import get_content_hash, get_recent_content_hashes
+
+
+def get_source_key(source: str) -> int:
+    """
+    Return 64-bit hash of vacancy source.
+
+    Keys are much smaller than sources. Collision of keys with equal
+    content hashes is negligible, at worst vacancy is touched instead of upsert.
+    """
+    return int.from_bytes(hashlib.blake2b(source.encode(), digest_size=8).digest(), 'big')
+
+
+class KnownVacancies:
+    """Content hashes of known vacancies by keys of their sources."""
+
+    def __init__(self, content_hashes: Optional[Dict[int, int]] = None) -> None:
+        """Initialization."""
+        self.content_hashes = content_hashes if content_hashes is not None else {}
+
+    def __len__(self) -> int:
+        return len(self.content_hashes)
+
+    def split(self, vacancies: List[Dict[str, str]]) -> Tuple[List[str], List[Dict[str, str]]]:
+        """
+        Split vacancies to known unchanged and others.
+
+        :return: Tuple (sources to touch, vacancies to upsert)
+        """
+        touch = []
+        upsert = []
+        for vacancy in vacancies:
+            known_hash = self.content_hashes.get(get_source_key(vacancy['source']))
+            if known_hash is not None and known_hash == get_content_hash(vacancy):
+                touch.append(vacancy['source'])
+            else:
+                upsert.append(vacancy)
+        return (touch, upsert)
+
+    def add(self, vacancies: Iterable[Dict[str, str]]) -> None:
+        """Remember saved vacancies, so they are touched if they are seen again."""
+        for vacancy in vacancies:
+            self.content_hashes[get_source_key(vacancy['source'])] = get_content_hash(vacancy)
+
+
+async def load_known_vacancies(aio_engine: Engine, days: int) -> KnownVacancies:
+    """Load vacancies modified in the last days."""
+    since = datetime.utcnow().date() - timedelta(days=days)
+    async with aio_engine.acquire() as conn:
+        rows = await get_recent_content_hashes(conn, since)
+    return KnownVacancies({
+        get_source_key(source): content_hash for source, content_hash in rows
+    })
@@ -0,0 +1,93 @@
+"""
+Regions of parsers.
+
+Parser config lists its regions in "regions" option: every region has "name",
+which is saved to vacancies, and params of source for this region, e.g. "area"
+of hh.ru. Parser is instantiated once per unit (parser, region) with params
+of region in "region" option of config, so units of all regions are run
+by one deployment. Only regions from REGIONS of config are parsed.
+"""
+from typing import Dict, List, NamedTuple, Optional
+
+from config import PARSERS_CONFIG, REGIONS, DEFAULT_REGION
+
+
+class ParserUnit(NamedTuple):
+    """Parser of one region."""
+
+    parser_name: str
+    region: str
+    config: Dict
+
+
+def get_region_configs(config: Dict, regions: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Return config of parser for every region to parse.
+
+    Config without "regions" is returned as is, parser uses its default region.
+
+    :param regions: Names of regions to parse, REGIONS by default.
+    """
+    if 'regions' not in config:
+        return [config]
+
+    if regions is None:
+        regions = REGIONS
+    base_config = {key: value for key, value in config.items() if key != 'regions'}
+    return [
+        dict(base_config, region=region)
+        for region in config['regions'] if region['name'] in regions
+    ]
+
+
+def get_region_config(config: Dict, region: Optional[str]) -> Dict:
+    """
+    Return config of parser for region by its name, e.g. region of archived response.
+
+    Region which is not in "regions" of config has only name.
+    If region is None, parser uses its default region.
+    """
+    base_config = {key: value for key, value in config.items() if key != 'regions'}
+    if region is None:
+        return base_config
+
+    for region_config in config.get('regions', []):
+        if region_config['name'] == region:
+            return dict(base_config, region=region_config)
+    return dict(base_config, region={'name': region})
+
+
+def get_parser_units(
+    parsers: Optional[List[str]] = None,
+    parsers_config: Optional[Dict[str, Dict]] = None,
+    regions: Optional[List[str]] = None
+) -> List[ParserUnit]:
+    """
+    Return units of active parsers.
+
+    Units of one parser are not adjacent, so units of the same source
+    are spread between workers and do not start at once.
+
+    :param parsers: If passed then only passed parsers will be returned.
+    :param regions: Names of regions to parse, REGIONS by default.
+    """
+    if parsers_config is None:
+        parsers_config = PARSERS_CONFIG
+
+    parsers_units = [
+        [
+            ParserUnit(
+                parser_name,
+                region_config.get('region', {}).get('name', DEFAULT_REGION),
+                region_config,
+            )
+            for region_config in get_region_configs(config, regions)
+        ]
+        for parser_name, config in parsers_config.items()
+        if config['is_active'] and (not parsers or parser_name in parsers)
+    ]
+
+    units = []
+    for i in range(max(map(len, parsers_units), default=0)):
+        units.extend(parser_units[i] for parser_units in parsers_units if i < len(parser_units))
+    return units
@@ -0,0 +1,79 @@
+"""
+Registry of parsers classes.
+
+Classes are imported only when parser is requested, so commands which
+do not run parsers do not import parsers modules and their dependencies.
+Parser class is resolved in order:
+
+- "class" option of parser config, dotted path like "package.module:ParserClass";
+- PARSERS_REGISTRY of built-in parsers;
+- entry points of "khabjob.parsers" group of installed packages,
+  entry point name is parser name.
+"""
+from importlib import import_module
+from importlib.metadata import entry_points
+from typing import Dict, Optional, Type
+
+from jobparser.base import BaseParser, ParserConfigError
+
+
+PARSERS_ENTRY_POINTS_GROUP = 'khabjob.parsers'
+
+# Dotted paths of built-in parsers, parser class may be registered as is
+PARSERS_REGISTRY: Dict[str, object] = {
+    'farpost': 'jobparser.parsers:FarpostParser',
+    'superjob': 'jobparser.parsers:SuperjobParser',
+    'hh': 'jobparser.parsers:HHParser',
+    'vk': 'jobparser.parsers:VkParser',
+}
+
+_imported_classes: Dict[str, Type[BaseParser]] = {}
+
+
+def import_parser_class(path: str) -> Type[BaseParser]:
+    """
+    Import parser class by dotted path "package.module:ParserClass",
+    "package.module.ParserClass" is accepted too.
+    """
+    if path not in _imported_classes:
+        module_name, sep, class_name = path.partition(':')
+        if not sep:
+            module_name, _, class_name = path.rpartition('.')
+        try:
+            parser_class = getattr(import_module(module_name), class_name)
+        except (ImportError, AttributeError, ValueError) as e:
+            raise ParserConfigError('Can not import parser "{0}": {1}'.format(path, e))
+        _imported_classes[path] = parser_class
+    return _imported_classes[path]
+
+
+def get_entry_points() -> Dict[str, object]:
+    """Return entry points of parsers of installed packages by parser name."""
+    points = entry_points()
+    if hasattr(points, 'select'):
+        group = points.select(group=PARSERS_ENTRY_POINTS_GROUP)
+    else:
+        # Python < 3.10 returns dict of groups
+        group = points.get(PARSERS_ENTRY_POINTS_GROUP, ())
+    return {point.name: point for point in group}
+
+
+def get_parser_class(parser_name: str, config: Optional[Dict] = None) -> Type[BaseParser]:
+    """
+    Return class of parser.
+
+    :param config: Config of parser, its "class" option overrides registry.
+    """
+    if config is not None and config.get('class'):
+        return import_parser_class(config['class'])
+
+    parser_class = PARSERS_REGISTRY.get(parser_name)
+    if parser_class is None:
+        point = get_entry_points().get(parser_name)
+        if point is None:
+            raise ParserConfigError('Unknown parser "{0}".'.format(parser_name))
+        parser_class = point.value
+
+    if isinstance(parser_class, str):
+        return import_parser_class(parser_class)
+    return parser_class
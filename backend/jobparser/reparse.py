@@ -0,0 +1,171 @@
+"""
+Extraction of vacancies from response archive without requests to sources.
+
+Archived responses of every parser and region are split to chunks, chunks are extracted
+with current extractors of parsers in process pool, so replay is limited only
+by CPU. Body archived several times is extracted once. Vacancies are saved
+to database with writers of ingestion or written to NDJSON dump.
+"""
+import asyncio
+
+from aiopg.sa import create_engine
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from datetime import date
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Dict, List, NamedTuple, Optional, Type
+
+from jobparser.archive import ArchivedResponse, ResponseArchive
+from jobparser.base import BaseParser
+from jobparser.ndjson import write_vacancies_dump
+from jobparser.regions import get_region_config
+from jobparser.registry import get_parser_class
+from jobparser.utils import IngestionStats, ingest_vacancies
+
+from core.db.utils import get_postgres_dsn
+
+from config import PARSERS_CONFIG
+
+
+class ReparseChunk(NamedTuple):
+    """Archived responses of parser of one region to be extracted in worker process."""
+
+    parser_class: Type[BaseParser]
+    config: Dict
+    directory: Path
+    entries: List[ArchivedResponse]
+
+
+def plan_chunks(
+    archive: ResponseArchive,
+    since: Optional[date] = None,
+    parsers: Optional[List[str]] = None,
+    chunk_size: int = 50,
+    parsers_config: Optional[Dict[str, Dict]] = None
+) -> List[ReparseChunk]:
+    """
+    Split archived responses of parsers to chunks by regions,
+    responses of region with the same body are skipped.
+
+    Inactive parsers and regions are replayed too, their responses
+    were archived when they were active.
+    """
+    if parsers_config is None:
+        parsers_config = PARSERS_CONFIG
+
+    entries = {}
+    for entry in archive.iter_entries(since, parsers):
+        unit = (entry.parser_name, entry.region)
+        entries.setdefault(unit, {}).setdefault(entry.digest, entry)
+
+    chunks = []
+    for (parser_name, region), parser_entries in entries.items():
+        config = get_region_config(parsers_config.get(parser_name, {}), region)
+        parser_class = get_parser_class(parser_name, config)
+        parser_entries = list(parser_entries.values())
+        chunks.extend(
+            ReparseChunk(parser_class, config, archive.directory, parser_entries[i:i + chunk_size])
+            for i in range(0, len(parser_entries), chunk_size)
+        )
+    return chunks
+
+
+def extract_chunk(chunk: ReparseChunk) -> List[Dict[str, str]]:
+    """Return vacancies of archived responses of chunk, responses of other kinds are skipped."""
+    config = dict(chunk.config)
+    config.setdefault('parse_url', chunk.parser_class.base_url)
+    parser = chunk.parser_class(None, config)
+    archive = ResponseArchive(chunk.directory)
+
+    vacancies = []
+    for entry in chunk.entries:
+        page = parser.extract_archived(archive.read_body(entry.digest), entry.encoding)
+        if page is not None:
+            vacancies.extend(page)
+    return vacancies
+
+
+async def iter_archive_pages(
+    chunks: List[ReparseChunk],
+    workers: int
+) -> AsyncIterator[List[Dict[str, str]]]:
+    """Yield vacancies of chunks extracted in worker processes as soon as chunk is done."""
+    loop = asyncio.get_running_loop()
+    # Child processes must not inherit event loop and connections of parent
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = [loop.run_in_executor(executor, extract_chunk, chunk) for chunk in chunks]
+        try:
+            for future in asyncio.as_completed(futures):
+                vacancies = await future
+                if vacancies:
+                    yield vacancies
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+class ArchiveReader:
+    """Source of pages from response archive with interface of parser for ingest_vacancies."""
+
+    name = 'archive'
+
+    supports_enrichment = False
+
+    # Vacancies keep regions of their parsers
+    region_name = None
+
+    def __init__(self, chunks: List[ReparseChunk], workers: int) -> None:
+        """Initialization."""
+        self.chunks = chunks
+        self.workers = workers
+        self.config = {}
+        self.checkpoint = None
+        self.high_water_mark = None
+        self.fetch_stats = None
+
+    def iter_vacancies(self) -> AsyncIterator[List[Dict[str, str]]]:
+        """Yield pages extracted from archive."""
+        return iter_archive_pages(self.chunks, self.workers)
+
+
+async def reparse_archive_to_db(
+    archive: ResponseArchive,
+    workers: int,
+    since: Optional[date] = None,
+    parsers: Optional[List[str]] = None,
+    mode: str = 'upsert'
+) -> IngestionStats:
+    """
+    Extract vacancies from archive and save them to database.
+
+    Checkpoints and ingestion runs are not changed.
+    """
+    reader = ArchiveReader(plan_chunks(archive, since, parsers), workers)
+    async with create_engine(get_postgres_dsn()) as aio_engine:
+        stats, = await ingest_vacancies(
+            [reader],
+            aio_engine,
+            mode,
+            use_checkpoints=False,
+            record_results=False,
+        )
+
+    if stats.error is not None:
+        raise stats.error
+    return stats
+
+
+async def reparse_archive_to_dump(
+    archive: ResponseArchive,
+    output: BinaryIO,
+    workers: int,
+    since: Optional[date] = None,
+    parsers: Optional[List[str]] = None
+) -> int:
+    """Extract vacancies from archive and write them to NDJSON dump."""
+    count = 0
+    async for vacancies in iter_archive_pages(plan_chunks(archive, since, parsers), workers):
+        count += write_vacancies_dump(output, [vacancies])
+    return count
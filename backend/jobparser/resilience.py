@@ -0,0 +1,96 @@
+"""
+Retries and circuit breakers for parsers requests.
+
+Failed request is retried with exponential backoff and full jitter if error
+is temporary: connection error, timeout or 429/5xx response. Every source has
+circuit breaker: after number of failures in a row requests to the source
+fail immediately until reset timeout passes, then one request is let through
+to check whether source is alive again.
+"""
+from aiohttp import ClientConnectionError, ClientResponseError
+
+import asyncio
+from random import uniform
+import time
+from typing import Dict, Optional
+
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class SourceUnavailableError(Exception):
+    """Exception for request to source with open circuit breaker."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Check whether request failed with temporary error."""
+    if isinstance(error, ClientResponseError):
+        return error.status in RETRY_STATUSES
+    return isinstance(error, (ClientConnectionError, asyncio.TimeoutError))
+
+
+def get_backoff_delay(attempt: int, backoff: float, max_backoff: float) -> float:
+    """Return random delay before retry, upper bound grows exponentially with attempt."""
+    return uniform(0, min(max_backoff, backoff * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Circuit breaker of one source."""
+
+    def __init__(self, source_name: str, failures: int = 5, reset_timeout: float = 60) -> None:
+        """
+        Initialization.
+
+        :param failures: Number of failures in a row to open breaker.
+        :param reset_timeout: Seconds to wait before let request through open breaker.
+        """
+        self.source_name = source_name
+        self.failures_threshold = failures
+        self.reset_timeout = reset_timeout
+
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self) -> bool:
+        """Breaker is open if source failed too many times and reset timeout did not pass."""
+        return self.opened_at is not None and (
+            time.monotonic() - self.opened_at < self.reset_timeout
+        )
+
+    def check(self) -> None:
+        """Raise SourceUnavailableError if breaker is open."""
+        if self.is_open:
+            raise SourceUnavailableError(
+                'Source "{0}" failed {1} times in a row, requests are paused.'.format(
+                    self.source_name,
+                    self.failures,
+                )
+            )
+
+    def record_success(self) -> None:
+        """Close breaker."""
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        """Count failure, open breaker if there are too many failures."""
+        self.failures += 1
+        if self.failures >= self.failures_threshold:
+            self.opened_at = time.monotonic()
+
+
+_circuit_breakers = {}
+
+
+def get_circuit_breaker(source_name: str, config: Optional[Dict] = None) -> CircuitBreaker:
+    """
+    Return circuit breaker of source, breaker lives as long as process,
+    so it keeps state between runs of parser.
+
+    :param config: Parser config, breaker options are taken from "circuit_breaker".
+    """
+    if source_name not in _circuit_breakers:
+        options = (config or {}).get('circuit_breaker', {})
+        _circuit_breakers[source_name] = CircuitBreaker(source_name, **options)
+    return _circuit_breakers[source_name]
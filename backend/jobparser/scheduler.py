@@ -0,0 +1,128 @@
+"""
+Long-running scheduler of parsers and clean up of expired vacancies.
+
+Scheduler keeps one http session and one database engine for all runs.
+Every unit (parser and region, see jobparser.regions) runs on its own interval:
+interval is halved after run which created many vacancies and increased after
+run without new vacancies. Requests of all units are limited with concurrency
+budget of HTTP_CLIENT_CONFIG.
+"""
+import asyncio
+
+import aiohttp
+
+from aiopg.sa import Engine
+
+import logging
+from typing import Dict, List, Optional
+
+from jobparser.regions import ParserUnit, get_parser_units
+from jobparser.registry import get_parser_class
+from jobparser.utils import ingest_vacancies
+
+from core.services.vacancies import delete_expired_vacancies
+
+from config import SCHEDULER_CONFIG, VACANCY_EXPIRED
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_schedule(config: Dict) -> Dict:
+    """Return schedule of parser, defaults are taken from SCHEDULER_CONFIG."""
+    return dict(SCHEDULER_CONFIG['parsers'], **config.get('schedule', {}))
+
+
+def get_next_interval(interval: float, created: int, schedule: Dict) -> float:
+    """
+    Return interval before next run of parser.
+
+    :param interval: Interval before last run.
+    :param created: Number of vacancies created by last run.
+    :param schedule: Schedule of parser.
+    """
+    if created >= schedule['busy_threshold']:
+        interval = interval / 2
+    elif created == 0:
+        interval = interval * schedule['idle_factor']
+    return min(schedule['max_interval'], max(schedule['min_interval'], interval))
+
+
+class Scheduler:
+    """Run parsers and clean up on intervals until cancelled."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        aio_engine: Engine,
+        parsers: Optional[List[str]] = None
+    ) -> None:
+        """
+        Initialization.
+
+        :param parsers: If passed then only passed parsers will be run.
+        """
+        self.session = session
+        self.aio_engine = aio_engine
+        self.units = get_parser_units(parsers)
+        # Intervals by parser name and region
+        self.intervals = {
+            (unit.parser_name, unit.region): get_schedule(unit.config)['interval']
+            for unit in self.units
+        }
+
+    async def run_parser(self, unit: ParserUnit) -> int:
+        """Run parser of region once and return number of created vacancies."""
+        parser = get_parser_class(unit.parser_name, unit.config)(self.session, unit.config)
+        parsers_stats = await ingest_vacancies([parser], self.aio_engine)
+        return sum(stats.created for stats in parsers_stats)
+
+    async def schedule_parser(self, unit: ParserUnit) -> None:
+        """Run parser of region on adaptive interval, errors of run do not stop schedule."""
+        schedule = get_schedule(unit.config)
+        key = (unit.parser_name, unit.region)
+
+        while True:
+            try:
+                created = await self.run_parser(unit)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Scheduled run of parser "{0}" in region "{1}" failed'.format(
+                    unit.parser_name, unit.region,
+                ))
+            else:
+                self.intervals[key] = get_next_interval(self.intervals[key], created, schedule)
+
+            logger.info('Next run of parser "{0}" in region "{1}" in {2:.0f} seconds'.format(
+                unit.parser_name,
+                unit.region,
+                self.intervals[key],
+            ))
+            await asyncio.sleep(self.intervals[key])
+
+    async def schedule_clean_up(self) -> None:
+        """Delete expired vacancies on interval."""
+        while True:
+            try:
+                async with self.aio_engine.acquire() as conn:
+                    deleted_count = await delete_expired_vacancies(conn, VACANCY_EXPIRED)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Scheduled clean up of expired vacancies failed')
+            else:
+                logger.info('{0} expired vacancies were deleted'.format(deleted_count))
+
+            await asyncio.sleep(SCHEDULER_CONFIG['expire_interval'])
+
+    async def run(self) -> None:
+        """Run all schedules until cancelled."""
+        tasks = [asyncio.create_task(self.schedule_parser(unit)) for unit in self.units]
+        tasks.append(asyncio.create_task(self.schedule_clean_up()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
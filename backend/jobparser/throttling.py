@@ -0,0 +1,148 @@
+"""
+Rate limiting of parsers requests.
+
+Every host has its own limiter shared by all parsers of the event loop.
+Limiter combines token bucket, that keeps requests rate, and adaptive
+concurrency: number of simultaneous requests grows additively while
+responses are fast and is halved on 429/503 or slow response (AIMD).
+Requests to all hosts are also limited with concurrency budget of event loop,
+so number of regions does not multiply number of requests in flight.
+"""
+import asyncio
+
+import time
+from typing import Dict, Optional
+from weakref import WeakKeyDictionary
+
+
+OVERLOAD_STATUSES = (429, 503)
+
+
+class RateLimiter:
+    """Token bucket with adaptive concurrency for one host."""
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        max_concurrency: int = 4,
+        min_concurrency: int = 1,
+        latency_threshold: Optional[float] = None
+    ) -> None:
+        """
+        Initialization.
+
+        :param rate: Max number of requests per second, None means no limit.
+        :param burst: Max number of requests which can be sent at once within rate.
+        :param max_concurrency: Max number of simultaneous requests.
+        :param min_concurrency: Concurrency is never decreased below this value.
+        :param latency_threshold: Response slower than this seconds means host is overloaded.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.latency_threshold = latency_threshold
+
+        self.concurrency = float(min_concurrency)
+        self.in_flight = 0
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+        self._concurrency_condition = asyncio.Condition()
+        self._tokens_lock = asyncio.Lock()
+
+    def _refill_tokens(self) -> None:
+        """Add tokens for time passed since last refill."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def _take_token(self) -> None:
+        """Wait till token is available and take it."""
+        if self.rate is None:
+            return
+
+        async with self._tokens_lock:
+            self._refill_tokens()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill_tokens()
+            self.tokens -= 1
+
+    async def acquire(self) -> None:
+        """Wait for free concurrency slot and token to send request."""
+        async with self._concurrency_condition:
+            await self._concurrency_condition.wait_for(
+                lambda: self.in_flight < int(self.concurrency)
+            )
+            self.in_flight += 1
+        try:
+            await self._take_token()
+        except BaseException:
+            await self.release()
+            raise
+
+    async def release(self, latency: Optional[float] = None, status: Optional[int] = None) -> None:
+        """
+        Free concurrency slot and adapt concurrency to response.
+
+        :param latency: Seconds spent on request, None if request was not sent.
+        :param status: HTTP status of response, None if there is no response.
+        """
+        if latency is not None:
+            is_overloaded = status in OVERLOAD_STATUSES or (
+                self.latency_threshold is not None and latency > self.latency_threshold
+            )
+            if is_overloaded:
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+                self.tokens = 0
+            elif status is not None and status < 400:
+                self.concurrency = min(
+                    self.max_concurrency,
+                    self.concurrency + 1 / int(self.concurrency),
+                )
+
+        async with self._concurrency_condition:
+            self.in_flight -= 1
+            self._concurrency_condition.notify_all()
+
+
+_limiters = WeakKeyDictionary()
+
+
+def get_rate_limiter(host: str, config: Dict) -> RateLimiter:
+    """
+    Return limiter for host, limiter is created with config on first call in event loop.
+
+    :param config: Parser config, limiter options are taken from "rate_limit",
+        max concurrency defaults to "concurrency" option.
+    """
+    loop_limiters = _limiters.setdefault(asyncio.get_running_loop(), {})
+
+    if host not in loop_limiters:
+        options = dict(config.get('rate_limit', {}))
+        options.setdefault('max_concurrency', config.get('concurrency', 4))
+        loop_limiters[host] = RateLimiter(**options)
+
+    return loop_limiters[host]
+
+
+_budgets = WeakKeyDictionary()
+
+
+def get_concurrency_budget(limit: Optional[int]) -> Optional[asyncio.Semaphore]:
+    """
+    Return semaphore of requests in flight of all parsers of event loop.
+
+    Semaphore is created with limit on first call in event loop.
+
+    :param limit: Max number of requests in flight, None means no limit.
+    """
+    if limit is None:
+        return None
+
+    loop = asyncio.get_running_loop()
+    if loop not in _budgets:
+        _budgets[loop] = asyncio.Semaphore(limit)
+    return _budgets[loop]
@@ -3,84 +3,678 @@ import asyncio
 
 import aiohttp
 
-from aiopg.sa import create_engine
+from aiopg.sa import Engine, SAConnection, create_engine
+
+import psycopg2
 
 import logging
-from typing import List, Dict, Optional
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple
 
-from jobparser.parsers import HHParser, SuperjobParser, VkParser, FarpostParser
+from jobparser.base import BaseParser
+from jobparser.client import FetchStats, create_client_session
+from jobparser.dedup import add_signatures
+from jobparser.enrichment import enrich_parser_vacancies
+from jobparser.metrics import write_prometheus_textfile
+from jobparser.normalization import VacancyReject, normalize_vacancies
+from jobparser.prefilter import KnownVacancies, load_known_vacancies
+from jobparser.regions import get_parser_units
+from jobparser.registry import PARSERS_REGISTRY, get_parser_class
 
-from core.services.vacancies import create_or_update_vacancy
+from core.services.checkpoints import get_checkpoint, save_checkpoint
+from core.services.ingestion import get_last_ingestion_runs, save_ingestion_runs
+from core.services.rejects import save_vacancy_rejects
+from core.services.vacancies import (
+    create_or_update_vacancy_batch,
+    create_vacancies_staging,
+    copy_vacancies_to_staging,
+    link_duplicate_vacancies,
+    link_staged_duplicate_vacancies,
+    merge_staging_vacancies,
+    get_max_vacancy_id,
+    touch_vacancies,
+)
 from core.db.utils import get_postgres_dsn
 
-from config import PARSERS_CONFIG
+from config import (
+    INGESTION_CONFIG,
+    INGESTION_MODES,
+    DEDUP_CONFIG,
+    ENRICHMENT_CONFIG,
+    METRICS_CONFIG,
+)
+
 
+logger = logging.getLogger(__name__)
 
-PARSERS_REGISTRY = {
-    'farpost': FarpostParser,
-    'superjob': SuperjobParser,
-    'hh': HHParser,
-    'vk': VkParser,
-}
 
+class IngestionStats:
+    """Results of saving vacancies of one parser of region to database."""
 
-logger = logging.getLogger(__name__)
+    def __init__(
+        self,
+        parser_name: str,
+        fetch_stats: Optional[FetchStats] = None,
+        region: Optional[str] = None
+    ) -> None:
+        """Initialization."""
+        self.parser_name = parser_name
+        self.region = region
+        self.fetch_stats = fetch_stats
+        self.started_at = datetime.now(tz=timezone.utc)
+        self.finished_at = None
+        self.pages = 0
+        self.vacancies = 0
+        self.created = 0
+        self.updated = 0
+        self.duplicates = 0
+        self.enriched = 0
+        self.rejected = 0
+        # Rejected vacancies which are not saved to rejects table yet
+        self.rejects: List[VacancyReject] = []
+        self.pending_pages = 0
+        self.is_parsed = False
+        self.is_truncated = False
+        self.error = None
+        # Publication time of the newest vacancy parsed in this run
+        self.high_water_mark = None
+
+    @property
+    def label(self) -> str:
+        """Return name of parser with region for logs."""
+        if self.region is None:
+            return self.parser_name
+        return '{0} ({1})'.format(self.parser_name, self.region)
+
+    @property
+    def skipped(self) -> int:
+        """Number of parsed vacancies which were neither created, updated nor rejected."""
+        return max(0, self.vacancies - self.created - self.updated - self.rejected)
+
+    def page_queued(self, vacancies_count: int = 0) -> None:
+        """Count page which is put to queue."""
+        self.pages += 1
+        self.vacancies += vacancies_count
+        self.pending_pages += 1
+
+    def page_saved(self, created: int, updated: int, duplicates: int = 0) -> None:
+        """Count saved page, log results if it was the last page of parser."""
+        self.created += created
+        self.updated += updated
+        self.duplicates += duplicates
+        self.pending_pages -= 1
+        self.log_if_complete()
+
+    def vacancies_rejected(self, rejects: List[VacancyReject]) -> None:
+        """Count vacancies which can not be saved, they are saved to rejects table after run."""
+        self.rejected += len(rejects)
+        self.rejects.extend(rejects)
+
+    def parsing_finished(self, error: Optional[BaseException] = None) -> None:
+        """Mark that parser has no more pages, log results if all pages are saved."""
+        self.is_parsed = True
+        self.error = error
+        self.log_if_complete()
+
+    def log_if_complete(self) -> None:
+        """Log results when parser is finished and all of its pages are saved."""
+        if not self.is_parsed or self.pending_pages > 0:
+            return
+
+        self.finished_at = datetime.now(tz=timezone.utc)
+        message = (
+            '{0}. Created: {1}, updated: {2}, skipped: {3}, duplicates: {4}, '
+            'rejected: {5} vacancies'
+        ).format(
+            self.label,
+            self.created,
+            self.updated,
+            self.skipped,
+            self.duplicates,
+            self.rejected,
+        )
+        if self.fetch_stats is not None:
+            message = '{0}. Fetched: {1}'.format(message, self.fetch_stats)
+        if self.is_truncated:
+            message = '{0}. Stopped by deadline'.format(message)
+        if self.error is None:
+            logger.info(message)
+        else:
+            logger.error('{0}. Parser failed: {1!r}'.format(message, self.error))
+
+    def merge(self, other: 'IngestionStats') -> None:
+        """Add results of other shard of the same parser and region."""
+        self.started_at = min(self.started_at, other.started_at)
+        if other.finished_at is not None:
+            self.finished_at = max(filter(None, (self.finished_at, other.finished_at)))
+        self.pages += other.pages
+        self.vacancies += other.vacancies
+        self.created += other.created
+        self.updated += other.updated
+        self.duplicates += other.duplicates
+        self.enriched += other.enriched
+        self.rejected += other.rejected
+        self.rejects.extend(other.rejects)
+        if self.error is None:
+            self.error = other.error
+        self.is_truncated = self.is_truncated or other.is_truncated
+        if self.high_water_mark is None or (
+            other.high_water_mark is not None and other.high_water_mark > self.high_water_mark
+        ):
+            self.high_water_mark = other.high_water_mark
+        if other.fetch_stats is not None:
+            if self.fetch_stats is None:
+                self.fetch_stats = FetchStats()
+            self.fetch_stats.merge(other.fetch_stats)
+
+    def get_run_data(self) -> Dict:
+        """Return record of run for ingestion runs ledger."""
+        fetch_stats = self.fetch_stats or FetchStats()
+        return {
+            'parser_name': self.parser_name,
+            'region': self.region,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at or datetime.now(tz=timezone.utc),
+            'pages': self.pages,
+            'requests': fetch_stats.requests,
+            'http_errors': fetch_stats.errors,
+            'bytes': fetch_stats.bytes,
+            'latency_p50': fetch_stats.get_latency_percentile(50),
+            'latency_p90': fetch_stats.get_latency_percentile(90),
+            'latency_p99': fetch_stats.get_latency_percentile(99),
+            'created': self.created,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'duplicates': self.duplicates,
+            'enriched': self.enriched,
+            'rejected': self.rejected,
+            'error': None if self.error is None else repr(self.error),
+            'is_truncated': self.is_truncated,
+        }
+
+
+def get_active_parsers(
+    session: aiohttp.ClientSession,
+    parsers: Optional[List[str]] = None
+) -> List[BaseParser]:
+    """
+    Return instances of active parsers, parser is instantiated for every its region.
+
+    :param parsers: If passed then only passed parsers will be returned.
+    """
+    return [
+        get_parser_class(unit.parser_name, unit.config)(session, unit.config)
+        for unit in get_parser_units(parsers)
+    ]
+
+
+def get_deadline(
+    started_at: float,
+    deadline: Optional[float],
+    parser_config: Dict
+) -> Optional[float]:
+    """Return time of event loop when parser must stop fetching, None if it is not limited."""
+    budgets = [budget for budget in (deadline, parser_config.get('deadline')) if budget is not None]
+    if not budgets:
+        return None
+    return started_at + min(budgets)
+
+
+async def produce_vacancies(
+    parser: BaseParser,
+    queue: asyncio.Queue,
+    stats: IngestionStats,
+    deadline: Optional[float] = None
+) -> None:
+    """
+    Put pages of vacancies to queue as soon as parser yields them.
+
+    Pages are normalized, vacancies which can not be saved are rejected.
+    Parser error is saved to stats and does not stop other parsers.
+    If deadline (time of event loop) is reached, parser stops fetching,
+    already queued pages are saved and stats are marked as truncated.
+    """
+    loop = asyncio.get_running_loop()
+    pages = parser.iter_vacancies()
+    try:
+        while True:
+            timeout = None if deadline is None else max(0, deadline - loop.time())
+            try:
+                vacancies = await asyncio.wait_for(pages.__anext__(), timeout)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                stats.is_truncated = True
+                break
+
+            if not vacancies:
+                continue
+            vacancies, rejects = normalize_vacancies(vacancies)
+            if rejects:
+                stats.vacancies += len(rejects)
+                stats.vacancies_rejected(rejects)
+            if vacancies:
+                stats.page_queued(len(vacancies))
+                await queue.put((stats, vacancies))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        stats.high_water_mark = parser.high_water_mark
+        stats.parsing_finished(error=e)
+    else:
+        stats.high_water_mark = parser.high_water_mark
+        stats.parsing_finished()
+    finally:
+        await pages.aclose()
+
+
+# Errors of data of row, other rows of batch can be saved
+ROW_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+
+
+def _get_error_message(error: Exception) -> str:
+    """Return the first line of database error."""
+    return (str(error).strip().splitlines() or [repr(error)])[0]
+
+
+async def save_vacancies_by_rows(
+    conn: SAConnection,
+    stats: IngestionStats,
+    vacancies: List[Dict[str, str]]
+) -> Tuple[int, int, List[Dict[str, str]]]:
+    """
+    Upsert vacancies one by one, vacancies with errors of data are rejected.
+
+    :return: Tuple (created, updated, saved vacancies)
+    """
+    created = 0
+    updated = 0
+    saved = []
+    for vacancy in vacancies:
+        try:
+            row_created, row_updated = await create_or_update_vacancy_batch(conn, [vacancy])
+        except ROW_ERRORS as e:
+            stats.vacancies_rejected([VacancyReject(vacancy, _get_error_message(e))])
+            continue
+        created += row_created
+        updated += row_updated
+        saved.append(vacancy)
+    return (created, updated, saved)
+
+
+async def save_rejects(parsers_stats: List[IngestionStats], aio_engine: Engine) -> None:
+    """Save rejected vacancies of parsers to rejects table."""
+    rejects_data = []
+    for stats in parsers_stats:
+        rejects_data.extend(
+            {
+                'parser_name': stats.parser_name,
+                'reason': reject.reason[:256],
+                'data': reject.get_data(),
+            } for reject in stats.rejects
+        )
+        stats.rejects = []
+
+    if rejects_data:
+        async with aio_engine.acquire() as conn:
+            await save_vacancy_rejects(conn, rejects_data)
+
+
+async def write_vacancies(
+    aio_engine: Engine,
+    queue: asyncio.Queue,
+    known: Optional[KnownVacancies] = None
+) -> None:
+    """
+    Save pages of vacancies from queue to database until None is received.
+
+    If known vacancies are passed, known unchanged vacancies of page are only touched
+    and only other ones are upserted. If upsert of page fails because of data of some row,
+    page is saved row by row and failed rows are rejected.
+    If DEDUP_CONFIG is active, near-duplicates of saved vacancies are linked or deleted.
+    """
+    loop = asyncio.get_running_loop()
+    async with aio_engine.acquire() as conn:
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+
+                stats, vacancies = item
+                if known is not None:
+                    touched, vacancies = known.split(vacancies)
+                    await touch_vacancies(conn, touched, datetime.utcnow().date())
+                    if not vacancies:
+                        stats.page_saved(0, 0)
+                        continue
+
+                if DEDUP_CONFIG['is_active']:
+                    await loop.run_in_executor(None, add_signatures, vacancies)
+
+                try:
+                    created, updated = await create_or_update_vacancy_batch(
+                        conn,
+                        vacancies,
+                        chunk_size=INGESTION_CONFIG['chunk_size'],
+                    )
+                except ROW_ERRORS as e:
+                    logger.warning('{0}. Page is saved by rows after error: {1}'.format(
+                        stats.label, _get_error_message(e),
+                    ))
+                    created, updated, vacancies = await save_vacancies_by_rows(
+                        conn, stats, vacancies,
+                    )
+
+                duplicates = {}
+                if DEDUP_CONFIG['is_active']:
+                    duplicates = await link_duplicate_vacancies(
+                        conn,
+                        [vacancy['source'] for vacancy in vacancies],
+                        DEDUP_CONFIG['threshold'],
+                        DEDUP_CONFIG['action'],
+                    )
+                if known is not None:
+                    known.add(vacancies)
+                stats.page_saved(created, updated, sum(duplicates.values()))
+            finally:
+                queue.task_done()
+
+
+async def copy_vacancies(dsn: str, queue: asyncio.Queue) -> None:
+    """
+    Copy pages of vacancies from queue to staging table until None is received,
+    then merge staging table to vacancies with one statement
+    and handle near-duplicates of merged vacancies.
+
+    Everything is done in one transaction with blocking psycopg2 connection
+    run in executor, because COPY is not supported by async connections.
+    """
+    loop = asyncio.get_running_loop()
+    staged = {}
+
+    conn = await loop.run_in_executor(None, psycopg2.connect, dsn)
+    try:
+        cursor = conn.cursor()
+        await loop.run_in_executor(None, create_vacancies_staging, cursor)
+
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    break
+
+                stats, vacancies = item
+                if DEDUP_CONFIG['is_active']:
+                    await loop.run_in_executor(None, add_signatures, vacancies)
+                await loop.run_in_executor(None, copy_vacancies_to_staging, cursor, vacancies)
+                pages_count, sources = staged.get(stats, (0, set()))
+                sources.update(vacancy['source_name'] for vacancy in vacancies)
+                staged[stats] = (pages_count + 1, sources)
+            finally:
+                queue.task_done()
 
+        results = await loop.run_in_executor(None, merge_staging_vacancies, cursor)
+        duplicates = {}
+        if DEDUP_CONFIG['is_active']:
+            duplicates = await loop.run_in_executor(
+                None,
+                link_staged_duplicate_vacancies,
+                cursor,
+                DEDUP_CONFIG['threshold'],
+                DEDUP_CONFIG['action'],
+            )
+        await loop.run_in_executor(None, conn.commit)
+    finally:
+        await loop.run_in_executor(None, conn.close)
 
-async def parse_vacancies_to_db(parsers: Optional[List[str]] = None):
+    # Results are counted by source name, pages of parser may have several sources
+    for stats, (pages_count, sources) in staged.items():
+        created = sum(results.get(source, (0, 0))[0] for source in sources)
+        updated = sum(results.get(source, (0, 0))[1] for source in sources)
+        stats.page_saved(created, updated, sum(duplicates.get(source, 0) for source in sources))
+        for _ in range(pages_count - 1):
+            stats.page_saved(0, 0)
+
+
+async def _stop_writers(writers: List[asyncio.Task]) -> None:
+    """Cancel writers and raise error of failed one."""
+    for writer in writers:
+        writer.cancel()
+    await asyncio.gather(*writers, return_exceptions=True)
+
+    for writer in writers:
+        if not writer.cancelled() and writer.exception() is not None:
+            raise writer.exception()
+
+
+async def _wait_or_writer_failed(
+    aw: asyncio.Future,
+    writers: List[asyncio.Task]
+) -> Tuple[bool, List[asyncio.Task]]:
+    """
+    Wait for awaitable while writers are alive.
+
+    Writers leave the loop only on None, so writer finished earlier has failed.
+
+    :return: Tuple (is_awaited, writers which are done)
+    """
+    done, _ = await asyncio.wait([aw, *writers], return_when=asyncio.FIRST_COMPLETED)
+    return (aw in done, [w for w in writers if w in done])
+
+
+async def load_checkpoints(parsers: List[BaseParser], aio_engine: Engine) -> None:
+    """Set checkpoints saved by previous runs of regions to parsers."""
+    async with aio_engine.acquire() as conn:
+        for parser in parsers:
+            parser.checkpoint = await get_checkpoint(conn, parser.name, parser.region_name)
+
+
+async def save_checkpoints(parsers_stats: List[IngestionStats], aio_engine: Engine) -> None:
+    """
+    Save high water marks of parsers of regions which finished without errors.
+
+    Checkpoint of parser stopped by deadline is not saved, because its older
+    vacancies were not fetched and would be skipped by the next run.
+    """
+    async with aio_engine.acquire() as conn:
+        for stats in parsers_stats:
+            if stats.error is None and not stats.is_truncated and stats.high_water_mark is not None:
+                await save_checkpoint(
+                    conn, stats.parser_name, stats.region, stats.high_water_mark,
+                )
+
+
+async def record_ingestion_runs(
+    parsers_stats: List[IngestionStats],
+    aio_engine: Engine
+) -> None:
+    """
+    Save runs of parsers to ledger.
+
+    If METRICS_CONFIG has "textfile", then metrics of the last runs are exported to it.
+    """
+    async with aio_engine.acquire() as conn:
+        await save_ingestion_runs(conn, [stats.get_run_data() for stats in parsers_stats])
+        if METRICS_CONFIG['textfile'] is not None:
+            runs = await get_last_ingestion_runs(conn)
+            write_prometheus_textfile(METRICS_CONFIG['textfile'], runs)
+
+
+async def ingest_vacancies(
+    parsers: List[BaseParser],
+    aio_engine: Engine,
+    mode: str = 'upsert',
+    use_checkpoints: bool = True,
+    record_results: bool = True,
+    deadline: Optional[float] = None
+) -> List[IngestionStats]:
+    """
+    Run parsers as producers of pages and database writers as consumers.
+
+    If use_checkpoints is True, parsers request only vacancies published after
+    the newest vacancy of previous run. Checkpoints are saved after all pages
+    of parser are saved, if parser did not fail. Results of parsers are saved
+    to ingestion runs ledger.
+
+    In "upsert" mode pages are saved by concurrent writers with batched upsert,
+    vacancies modified in the last "prefilter_days" of INGESTION_CONFIG are loaded
+    before run, so known unchanged vacancies are only touched.
+    In "copy" mode single writer copies pages to staging table and merges it
+    at the end, that is faster for large runs.
+
+    Parsers are independent: if one of them fails, others are parsed till the end,
+    all fetched pages are saved and then error of the first failed parser is raised.
+    If any writer fails, then parsing is stopped and writer error is raised.
+
+    If record_results is False, then checkpoints and runs are not saved
+    and parser errors are not raised, e.g. results of shards are merged by caller.
+
+    Fetching is limited with deadline in seconds ("deadline" of INGESTION_CONFIG
+    by default) and "deadline" option of parser config, whichever is earlier.
+    Parser which reached deadline stops fetching, its fetched pages are saved
+    and run is recorded as truncated.
+
+    Vacancies rejected by normalization or by database are saved
+    to rejects table when writers are finished.
+
+    :param deadline: Seconds of fetching for all parsers.
+
+    :return: Ingestion stats of every parser.
+    """
+    queue = asyncio.Queue(maxsize=INGESTION_CONFIG['queue_size'])
+    parsers_stats = [
+        IngestionStats(parser.name, parser.fetch_stats, parser.region_name)
+        for parser in parsers
+    ]
+
+    if use_checkpoints:
+        await load_checkpoints(parsers, aio_engine)
+
+    if deadline is None:
+        deadline = INGESTION_CONFIG['deadline']
+    started_at = asyncio.get_running_loop().time()
+
+    # Vacancies with greater id are created by this run
+    enrichment_min_id = None
+    if ENRICHMENT_CONFIG['is_active'] and any(p.supports_enrichment for p in parsers):
+        async with aio_engine.acquire() as conn:
+            enrichment_min_id = await get_max_vacancy_id(conn)
+
+    if mode == 'copy':
+        writers = [asyncio.create_task(copy_vacancies(get_postgres_dsn(), queue))]
+    else:
+        known = None
+        if INGESTION_CONFIG['prefilter_days'] is not None:
+            known = await load_known_vacancies(aio_engine, INGESTION_CONFIG['prefilter_days'])
+        writers = [
+            asyncio.create_task(write_vacancies(aio_engine, queue, known))
+            for _ in range(INGESTION_CONFIG['writers'])
+        ]
+    producing = asyncio.gather(*[
+        produce_vacancies(parser, queue, stats, get_deadline(started_at, deadline, parser.config))
+        for parser, stats in zip(parsers, parsers_stats)
+    ])
+    draining = None
+
+    try:
+        is_produced, failed_writers = await _wait_or_writer_failed(producing, writers)
+        if is_produced:
+            draining = asyncio.ensure_future(queue.join())
+            _, failed_writers = await _wait_or_writer_failed(draining, writers)
+
+        if failed_writers:
+            await _stop_writers(writers)
+
+        # Queue is empty and all writers are alive
+        for _ in writers:
+            await queue.put(None)
+        await asyncio.gather(*writers)
+    finally:
+        for future in (producing, draining):
+            if future is not None and not future.done():
+                future.cancel()
+        if not all(w.done() for w in writers):
+            await _stop_writers(writers)
+
+    await save_rejects(parsers_stats, aio_engine)
+
+    if enrichment_min_id is not None:
+        await enrich_vacancies(parsers, parsers_stats, aio_engine, enrichment_min_id, [
+            get_deadline(started_at, deadline, parser.config) for parser in parsers
+        ])
+
+    if record_results:
+        await record_ingestion_results(parsers_stats, aio_engine)
+    return parsers_stats
+
+
+async def enrich_vacancies(
+    parsers: List[BaseParser],
+    parsers_stats: List[IngestionStats],
+    aio_engine: Engine,
+    min_id: int,
+    deadlines: List[Optional[float]]
+) -> None:
+    """Load descriptions of vacancies created by run, parsers are enriched concurrently."""
+    enriched = [
+        (parser, stats, deadline)
+        for parser, stats, deadline in zip(parsers, parsers_stats, deadlines)
+        if parser.supports_enrichment
+    ]
+    counts = await asyncio.gather(*[
+        enrich_parser_vacancies(parser, aio_engine, min_id, deadline)
+        for parser, _, deadline in enriched
+    ])
+    for (parser, stats, _), count in zip(enriched, counts):
+        stats.enriched = count
+        logger.info('{0}. Enriched: {1} vacancies'.format(stats.label, count))
+
+
+async def record_ingestion_results(
+    parsers_stats: List[IngestionStats],
+    aio_engine: Engine
+) -> None:
+    """Save checkpoints and runs of parsers, then raise error of the first failed parser."""
+    await save_checkpoints(parsers_stats, aio_engine)
+    await record_ingestion_runs(parsers_stats, aio_engine)
+
+    for stats in parsers_stats:
+        if stats.error is not None:
+            raise stats.error
+
+
+async def parse_vacancies_to_db(
+    parsers: Optional[List[str]] = None,
+    mode: str = 'upsert',
+    use_checkpoints: bool = True,
+    deadline: Optional[float] = None
+):
     """
     Parse vacancies and save to database.
+
+    Parsers put pages of vacancies to bounded queue, so network fetches
+    and database writes overlap and only few pages are kept in memory.
     
     :param parsers: If passed then only passed parsers will be run.
+    :param mode: Saving mode, one of INGESTION_MODES.
+    :param use_checkpoints: If False, parsers ignore checkpoints of previous runs.
+    :param deadline: Seconds of fetching, see ingest_vacancies.
     """
-    if parsers:
-        configs = dict(filter(lambda x: x[0] in parsers, PARSERS_CONFIG.items()))
-    else:
-        configs = PARSERS_CONFIG
-    
-    tasks = []
-
-    async with aiohttp.ClientSession() as session:
-        for parser_name in configs.keys():
-            if configs[parser_name]['is_active']:
-                parser_class = PARSERS_REGISTRY[parser_name]
-                parser = parser_class(session, configs[parser_name])
-                tasks.append(parser.get_vacancies())
-        
+    async with create_client_session() as session:
         async with create_engine(get_postgres_dsn()) as aio_engine:
-            async with aio_engine.acquire() as conn:
-                for task in asyncio.as_completed(tasks):
-                    vacancies = await task
-                    created = 0
-                    updated = 0
-                    for vacancy in vacancies:
-                        is_created, v = await create_or_update_vacancy(conn, **vacancy)
-
-                        if is_created:
-                            created += 1
-                        else:
-                            updated +=1
-
-                    logger.info('Created: {0}, updated: {1} vacancies'.format(
-                        created,
-                        updated,
-                    ))
+            await ingest_vacancies(
+                get_active_parsers(session, parsers),
+                aio_engine,
+                mode,
+                use_checkpoints,
+                deadline=deadline,
+            )
 
                     
 async def run_parsers(parsers: Optional[List[str]] = None) -> List[Dict[str, str]]:
     """Run parser and return results as list of dicts."""
-    if parsers:
-        configs = dict(filter(lambda x: x[0] in parsers, PARSERS_CONFIG.items()))
-    else:
-        configs = PARSERS_CONFIG
-
-    tasks = []
-
-    async with aiohttp.ClientSession() as session:
-        for parser_name in configs.keys():
-            if configs[parser_name]['is_active']:
-                parser_class = PARSERS_REGISTRY[parser_name]
-                parser = parser_class(session, configs[parser_name])
-                tasks.append(parser.get_vacancies())
+    async with create_client_session() as session:
+        tasks = [parser.get_vacancies() for parser in get_active_parsers(session, parsers)]
         vacancies = await asyncio.gather(*tasks)
     return vacancies
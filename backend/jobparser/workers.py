@@ -0,0 +1,257 @@
+"""
+Running parsers in several worker processes.
+
+Units of active parsers (parser and region, see jobparser.regions) are split
+to shards: parser which supports page shards (see BaseParser.fetch_pages) is split
+to several shards with every N-th page, other parsers are run as one shard.
+Shards are distributed between workers, every worker has own event loop,
+http session and database engine. Concurrency budget of HTTP_CLIENT_CONFIG
+is split between workers. Results of shards are merged by parent process.
+"""
+import asyncio
+
+from aiopg.sa import create_engine
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import pickle
+from typing import Dict, List, NamedTuple, Optional, Type
+
+from jobparser.base import BaseParser
+from jobparser.client import create_client_session
+from jobparser.regions import get_parser_units
+from jobparser.registry import get_parser_class
+from jobparser.utils import (
+    IngestionStats,
+    ingest_vacancies,
+    record_ingestion_results,
+)
+
+from core.db.utils import get_postgres_dsn
+
+from config import HTTP_CLIENT_CONFIG, POSTGRES_CONFIG
+
+
+class ShardSpec(NamedTuple):
+    """Shard of parser of region to be run in worker process."""
+
+    parser_class: Type[BaseParser]
+    config: Dict
+    shard: int
+    shards: int
+
+
+def plan_shards(
+    workers: int,
+    parsers: Optional[List[str]] = None,
+    parsers_config: Optional[Dict[str, Dict]] = None,
+    regions: Optional[List[str]] = None
+) -> List[List[ShardSpec]]:
+    """
+    Split units of active parsers to shards and distribute them between workers.
+
+    Parser which supports page shards is split to "max_shards" shards
+    from its config, by default to number of workers.
+    Shards are distributed round-robin, so shards of one unit and units
+    of one parser are in different workers.
+
+    :param parsers: If passed then only passed parsers will be run.
+    :param regions: Names of regions to parse, REGIONS by default.
+    :return: Shards of every worker, workers without shards are omitted.
+    """
+    shards = []
+    for unit in get_parser_units(parsers, parsers_config, regions):
+        parser_class = get_parser_class(unit.parser_name, unit.config)
+        shards_count = 1
+        if parser_class.supports_page_shards:
+            shards_count = max(1, min(workers, unit.config.get('max_shards', workers)))
+        shards.extend(
+            ShardSpec(parser_class, unit.config, shard, shards_count)
+            for shard in range(shards_count)
+        )
+
+    plan = [[] for _ in range(workers)]
+    for index, spec in enumerate(shards):
+        plan[index % workers].append(spec)
+    return [worker_shards for worker_shards in plan if worker_shards]
+
+
+def get_worker_budget(budget: Optional[int], workers: int) -> Optional[int]:
+    """Return concurrency budget of one of workers, every worker has at least one request."""
+    if budget is None:
+        return None
+    return max(1, budget // workers)
+
+
+def _create_parsers(session, shards: List[ShardSpec]) -> List[BaseParser]:
+    """Return parsers of shards."""
+    parsers = []
+    for spec in shards:
+        parser = spec.parser_class(session, spec.config)
+        parser.set_shard(spec.shard, spec.shards)
+        parsers.append(parser)
+    return parsers
+
+
+def _make_error_picklable(stats: IngestionStats) -> None:
+    """Replace parser error, which can not be sent to parent process, with its repr."""
+    if stats.error is None:
+        return
+    try:
+        pickle.dumps(stats.error)
+    except Exception:
+        stats.error = RuntimeError(repr(stats.error))
+
+
+async def _ingest_shards(
+    shards: List[ShardSpec],
+    mode: str,
+    use_checkpoints: bool,
+    deadline: Optional[float]
+) -> List[IngestionStats]:
+    """Save vacancies of shards to database without recording results."""
+    parsers_config = {spec.parser_class.name: spec.config for spec in shards}
+    async with create_client_session(parsers_config) as session:
+        async with create_engine(get_postgres_dsn()) as aio_engine:
+            parsers_stats = await ingest_vacancies(
+                _create_parsers(session, shards),
+                aio_engine,
+                mode,
+                use_checkpoints,
+                record_results=False,
+                deadline=deadline,
+            )
+
+    for stats in parsers_stats:
+        # Session is closed, stats are sent to parent process
+        _make_error_picklable(stats)
+    return parsers_stats
+
+
+async def _parse_shards(shards: List[ShardSpec]) -> List[List[Dict[str, str]]]:
+    """Return vacancies of every shard."""
+    parsers_config = {spec.parser_class.name: spec.config for spec in shards}
+    async with create_client_session(parsers_config) as session:
+        tasks = [parser.get_vacancies() for parser in _create_parsers(session, shards)]
+        return await asyncio.gather(*tasks)
+
+
+def ingest_shards_worker(
+    shards: List[ShardSpec],
+    http_config: Dict,
+    postgres_config: Dict[str, str],
+    mode: str,
+    use_checkpoints: bool,
+    deadline: Optional[float]
+) -> List[IngestionStats]:
+    """Run shards in worker process, http client and database configs of parent are used."""
+    HTTP_CLIENT_CONFIG.update(http_config)
+    POSTGRES_CONFIG.update(postgres_config)
+    return asyncio.run(_ingest_shards(shards, mode, use_checkpoints, deadline))
+
+
+def parse_shards_worker(
+    shards: List[ShardSpec],
+    http_config: Dict
+) -> List[List[Dict[str, str]]]:
+    """Run shards in worker process and return their vacancies."""
+    HTTP_CLIENT_CONFIG.update(http_config)
+    return asyncio.run(_parse_shards(shards))
+
+
+def merge_shards_stats(parsers_stats: List[IngestionStats]) -> List[IngestionStats]:
+    """
+    Merge stats of shards of the same parser and region.
+
+    Merged stats have error of any failed shard, so checkpoint of parser
+    in region is saved only if all its shards finished without errors.
+    """
+    merged = {}
+    for stats in parsers_stats:
+        unit = (stats.parser_name, stats.region)
+        if unit in merged:
+            merged[unit].merge(stats)
+        else:
+            merged[unit] = stats
+    return list(merged.values())
+
+
+def get_workers_http_config(workers: int) -> Dict:
+    """Return http client config of worker with its part of concurrency budget."""
+    return dict(
+        HTTP_CLIENT_CONFIG,
+        concurrency_budget=get_worker_budget(HTTP_CLIENT_CONFIG['concurrency_budget'], workers),
+    )
+
+
+async def _run_workers(workers_shards: List[List[ShardSpec]], worker, *args) -> List:
+    """
+    Run worker function for shards of every worker in separate process.
+
+    Worker function gets shards, http client config and args.
+    """
+    http_config = get_workers_http_config(len(workers_shards))
+    loop = asyncio.get_running_loop()
+    # Child processes must not inherit event loop and connections of parent
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=len(workers_shards), mp_context=context) as executor:
+        return await asyncio.gather(*[
+            loop.run_in_executor(executor, worker, shards, http_config, *args)
+            for shards in workers_shards
+        ])
+
+
+async def parse_vacancies_to_db_in_workers(
+    workers: int,
+    parsers: Optional[List[str]] = None,
+    mode: str = 'upsert',
+    use_checkpoints: bool = True,
+    deadline: Optional[float] = None
+) -> List[IngestionStats]:
+    """
+    Parse vacancies in worker processes and save to database.
+
+    Every worker writes its pages to database itself. When all workers finished,
+    stats of shards are merged, checkpoints and runs are saved by parent
+    and error of the first failed parser is raised.
+    Deadline is counted in every worker from its start.
+
+    :return: Ingestion stats of every parser in every region.
+    """
+    workers_shards = plan_shards(workers, parsers)
+    if not workers_shards:
+        return []
+
+    results = await _run_workers(
+        workers_shards,
+        ingest_shards_worker,
+        dict(POSTGRES_CONFIG),
+        mode,
+        use_checkpoints,
+        deadline,
+    )
+    parsers_stats = merge_shards_stats(
+        [stats for worker_stats in results for stats in worker_stats]
+    )
+
+    async with create_engine(get_postgres_dsn()) as aio_engine:
+        await record_ingestion_results(parsers_stats, aio_engine)
+    return parsers_stats
+
+
+async def run_parsers_in_workers(
+    workers: int,
+    parsers: Optional[List[str]] = None
+) -> List[List[Dict[str, str]]]:
+    """Run parsers in worker processes and return vacancies of every parser in every region."""
+    workers_shards = plan_shards(workers, parsers)
+    if not workers_shards:
+        return []
+
+    results = await _run_workers(workers_shards, parse_shards_worker)
+    vacancies = {}
+    for shards, shards_vacancies in zip(workers_shards, results):
+        for spec, shard_vacancies in zip(shards, shards_vacancies):
+            unit = (spec.parser_class.name, spec.config.get('region', {}).get('name'))
+            vacancies.setdefault(unit, []).extend(shard_vacancies)
+    return list(vacancies.values())
@@ -1,41 +1,106 @@
-"""Entrypoint."""
-from aiohttp import web
-
-from aiopg.sa import create_engine
-
-from pydantic import (
-    BaseModel, 
-    validator,
-)
+"""
+Entrypoint.
 
+Modules are imported inside commands, so every command imports only
+what it uses, e.g. "create_user" does not import parsers and API.
+"""
 import asyncio
 import click
 import logging
+import os
+import signal
+from datetime import date, datetime
 from logging.config import dictConfig
 from typing import List, Optional
 
-from api.app import init_app
-from api.validation.auth import validate_password_format
-
-from core.db.utils import create_db, apply_migrations, get_postgres_dsn
-from core.services.auth import create_user
-from core.services.vacancies import delete_expired_vacancies
+from config import LOG_CONFIG, DEBUG, INGESTION_MODES, VACANCY_EXPIRED
 
-from jobparser.utils import parse_vacancies_to_db, run_parsers
 
-from config import LOG_CONFIG, DEBUG, VACANCY_EXPIRED
-
-
-async def echo_parsers_results(parsers: Optional[List[str]] = None):
+async def echo_parsers_results(parsers: Optional[List[str]] = None, workers: int = 1):
     """Output parses results."""
+    from jobparser.utils import run_parsers
+    from jobparser.workers import run_parsers_in_workers
+
     if parsers is None:
         parsers = []
-    results = await run_parsers(parsers)
+    if workers > 1:
+        results = await run_parsers_in_workers(workers, parsers)
+    else:
+        results = await run_parsers(parsers)
     click.echo(results)
 
 
+async def dump_parsers_results(
+    output: str,
+    compress: bool,
+    parsers: Optional[List[str]] = None,
+    workers: int = 1
+):
+    """Write parsers results as NDJSON, one vacancy per line."""
+    from jobparser.ndjson import dump_parsers_vacancies, open_dump_output, write_vacancies_dump
+    from jobparser.workers import run_parsers_in_workers
+
+    with open_dump_output(output, compress) as dump:
+        if workers > 1:
+            # Results of workers are written after all of them finished
+            count = write_vacancies_dump(dump, await run_parsers_in_workers(workers, parsers))
+        else:
+            count = sum((await dump_parsers_vacancies(dump, parsers)).values())
+    click.echo('Vacancies written: {0}'.format(count), err=True)
+
+
+async def load_vacancies(dump_path: str, mode: str, page_size: int):
+    """Save vacancies from NDJSON dump to database and output results."""
+    from jobparser.ndjson import load_vacancies_dump, open_dump_input
+
+    with open_dump_input(dump_path) as dump:
+        stats = await load_vacancies_dump(dump, mode, page_size)
+    click.echo('Loaded: {0}, created: {1}, updated: {2}, skipped: {3}'.format(
+        stats.vacancies,
+        stats.created,
+        stats.updated,
+        stats.skipped,
+    ))
+
+
+async def reparse_archive(
+    archive_path: Optional[str],
+    since: Optional[date],
+    parsers: List[str],
+    workers: int,
+    mode: str,
+    output: Optional[str]
+):
+    """Extract vacancies from response archive, save them to database or NDJSON dump."""
+    from jobparser.archive import ResponseArchive
+    from jobparser.ndjson import open_dump_output
+    from jobparser.reparse import reparse_archive_to_db, reparse_archive_to_dump
+
+    from config import RESPONSE_ARCHIVE_CONFIG
+
+    archive = ResponseArchive(archive_path or RESPONSE_ARCHIVE_CONFIG['directory'])
+    if output is not None:
+        with open_dump_output(output) as dump:
+            count = await reparse_archive_to_dump(archive, dump, workers, since, parsers)
+        click.echo('Vacancies written: {0}'.format(count), err=True)
+        return
+
+    stats = await reparse_archive_to_db(archive, workers, since, parsers, mode)
+    click.echo('Extracted: {0}, created: {1}, updated: {2}, skipped: {3}'.format(
+        stats.vacancies,
+        stats.created,
+        stats.updated,
+        stats.skipped,
+    ))
+
+
 async def add_user(username: str, password: str):
     """Create new user and output message."""
+    from aiopg.sa import create_engine
+
+    from core.db.utils import get_postgres_dsn
+    from core.services.auth import create_user
+
     async with create_engine(get_postgres_dsn()) as aio_engine:
         async with aio_engine.acquire() as conn:
             await create_user(conn, username, password)
@@ -45,6 +110,11 @@ async def add_user(username: str, password: str):
 
 async def clean_up_expired_vacancies():
     """Clean up dtatabase and output message."""
+    from aiopg.sa import create_engine
+
+    from core.db.utils import get_postgres_dsn
+    from core.services.vacancies import delete_expired_vacancies
+
     async with create_engine(get_postgres_dsn()) as aio_engine:
         async with aio_engine.acquire() as conn:
             deleted_count = await delete_expired_vacancies(conn, VACANCY_EXPIRED)
@@ -54,23 +124,79 @@ async def clean_up_expired_vacancies():
     )
 
 
-class UserCredentials(BaseModel):
-    """Validate user credentials to create user."""
+async def run_scheduler(parsers: Optional[List[str]] = None):
+    """Run scheduler until SIGINT or SIGTERM."""
+    from aiopg.sa import create_engine
+
+    from core.db.utils import get_postgres_dsn
+
+    from jobparser.client import create_client_session
+    from jobparser.scheduler import Scheduler
+
+    task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, task.cancel)
+
+    async with create_client_session() as session:
+        async with create_engine(get_postgres_dsn()) as aio_engine:
+            try:
+                await Scheduler(session, aio_engine, parsers).run()
+            except asyncio.CancelledError:
+                click.echo('Scheduler is stopped.')
+
 
-    username: str
-    password1: str
-    password2: str
+def format_latency(latency: Optional[float]) -> str:
+    """Format latency in seconds as milliseconds."""
+    return '-' if latency is None else '{0:.0f}'.format(latency * 1000)
 
-    @validator('password1')
-    def validate_password_strength(cls, password):
-        validate_password_format(password)
-        return password
 
-    @validator('password2')
-    def validate_passwords_match(cls, password2, values):
-        password1 = values.get('password1')
-        if password1 != password2:
-            raise ValueError('Passwords mismatch.')  
+async def echo_ingestion_report(
+    parser_name: Optional[str] = None,
+    limit: int = 20,
+    prometheus: Optional[str] = None
+):
+    """Output the last ingestion runs, export metrics of them if path is passed."""
+    from aiopg.sa import create_engine
+
+    from core.db.utils import get_postgres_dsn
+    from core.services.ingestion import get_ingestion_runs, get_last_ingestion_runs
+
+    from jobparser.metrics import write_prometheus_textfile
+
+    async with create_engine(get_postgres_dsn()) as aio_engine:
+        async with aio_engine.acquire() as conn:
+            runs = await get_ingestion_runs(conn, parser_name, limit)
+            if prometheus is not None:
+                write_prometheus_textfile(prometheus, await get_last_ingestion_runs(conn))
+
+    click.echo(
+        '{0:<17} {1:<10} {2:<12} {3:>7} {4:>5} {5:>9} {6:>16} {7:>7} {8:>7} {9:>7} {10:>5} {11:>8} {12:>8}  {13}'.format(
+            'started', 'parser', 'region', 'time, s', 'pages', 'KB', 'p50/p90/p99, ms',
+            'created', 'updated', 'skipped', 'dups', 'enriched', 'rejected', 'error',
+        )
+    )
+    for run in runs:
+        click.echo(
+            '{0:%Y-%m-%d %H:%M} {1:<10} {2:<12} {3:>7.1f} {4:>5} {5:>9.1f} {6:>16} {7:>7} {8:>7} {9:>7} {10:>5} {11:>8} {12:>8}  {13}'.format(
+                run.started_at,
+                run.parser_name,
+                run.region or '-',
+                (run.finished_at - run.started_at).total_seconds(),
+                run.pages,
+                run.bytes / 1024,
+                '/'.join(format_latency(l) for l in (run.latency_p50, run.latency_p90, run.latency_p99)),
+                run.created,
+                run.updated,
+                run.skipped,
+                run.duplicates,
+                run.enriched,
+                run.rejected,
+                click.style(run.error, fg='red') if run.error else (
+                    click.style('truncated', fg='yellow') if run.is_truncated else ''
+                ),
+            )
+        )
 
 
 @click.group()
@@ -81,6 +207,9 @@ def cli():
 @click.command(name='init_db')
 def initdb():
     """Create databse and apply migrations."""
+    from core.db.utils import create_db, apply_migrations
+    from jobparser.utils import parse_vacancies_to_db
+
     create_db()
     apply_migrations()
     asyncio.run(parse_vacancies_to_db())
@@ -88,16 +217,152 @@ def initdb():
 
 @click.command(name='update_vacancies')
 @click.option('-p', '--parsers', multiple=True, help='Names of parsers to run.')
-def updatevacancies(parsers: List[str]):
+@click.option(
+    '-m', '--mode',
+    type=click.Choice(INGESTION_MODES),
+    default='upsert',
+    help='Saving mode, "copy" is faster for large runs.',
+)
+@click.option(
+    '--full',
+    is_flag=True,
+    help='Ignore checkpoints and parse all vacancies of the last day.',
+)
+@click.option(
+    '-w', '--workers',
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help='Number of processes, pages of large sources are split between them.',
+)
+@click.option(
+    '--deadline',
+    type=click.FloatRange(min=0),
+    help='Seconds of fetching, then fetched pages are saved and parsers are stopped.',
+)
+def updatevacancies(
+    parsers: List[str],
+    mode: str,
+    full: bool,
+    workers: int,
+    deadline: Optional[float]
+):
     """Parse vacancies and save it yo database."""
-    asyncio.run(parse_vacancies_to_db(parsers))
+    from jobparser.utils import parse_vacancies_to_db
+    from jobparser.workers import parse_vacancies_to_db_in_workers
+
+    if workers > 1:
+        asyncio.run(parse_vacancies_to_db_in_workers(
+            workers, parsers, mode, use_checkpoints=not full, deadline=deadline,
+        ))
+    else:
+        asyncio.run(parse_vacancies_to_db(parsers, mode, use_checkpoints=not full, deadline=deadline))
     
 
 @click.command(name='run_parsers')
 @click.option('-p', '--parsers', multiple=True, help='Names of parsers to run.')
-def runparsers(parsers: List[str]):
+@click.option(
+    '-w', '--workers',
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help='Number of processes, pages of large sources are split between them.',
+)
+@click.option(
+    '-f', '--format', 'output_format',
+    type=click.Choice(['repr', 'ndjson']),
+    default='repr',
+    show_default=True,
+    help='"ndjson" streams one json line per vacancy as parsers yield pages.',
+)
+@click.option(
+    '-o', '--output',
+    default='-',
+    show_default=True,
+    help='File for "ndjson" format, "-" is standard output.',
+)
+@click.option('--gzip', 'compress', is_flag=True, help='Compress "ndjson" output with gzip.')
+def runparsers(parsers: List[str], workers: int, output_format: str, output: str, compress: bool):
     """Run parsers."""
-    asyncio.run(echo_parsers_results(parsers))
+    if output_format == 'ndjson':
+        asyncio.run(dump_parsers_results(output, compress, parsers, workers))
+    else:
+        asyncio.run(echo_parsers_results(parsers, workers))
+
+
+@click.command(name='load_vacancies')
+@click.argument('dump_path', default='-')
+@click.option(
+    '-m', '--mode',
+    type=click.Choice(INGESTION_MODES),
+    default='upsert',
+    help='Saving mode, "copy" is faster for large dumps.',
+)
+@click.option('--page-size', type=click.IntRange(min=1), default=500, show_default=True)
+def loadvacancies(dump_path: str, mode: str, page_size: int):
+    """Save vacancies from NDJSON dump of run_parsers to database, gzip is detected."""
+    asyncio.run(load_vacancies(dump_path, mode, page_size))
+
+
+@click.command(name='reparse')
+@click.option('-p', '--parsers', multiple=True, help='Replay responses of these parsers only.')
+@click.option(
+    '--since',
+    type=click.DateTime(formats=['%Y-%m-%d']),
+    help='Replay responses archived since this day.',
+)
+@click.option(
+    '-w', '--workers',
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    show_default=True,
+    help='Number of extraction processes.',
+)
+@click.option(
+    '-m', '--mode',
+    type=click.Choice(INGESTION_MODES),
+    default='upsert',
+    help='Saving mode, "copy" is faster for large archives.',
+)
+@click.option('-o', '--output', help='Write vacancies to NDJSON dump instead of database.')
+@click.option('--archive', 'archive_path', help='Archive directory, RESPONSE_ARCHIVE_DIR by default.')
+def reparse(
+    parsers: List[str],
+    since: Optional[datetime],
+    workers: int,
+    mode: str,
+    output: Optional[str],
+    archive_path: Optional[str]
+):
+    """Extract vacancies from archived responses with current parsers."""
+    asyncio.run(reparse_archive(
+        archive_path,
+        since.date() if since is not None else None,
+        parsers,
+        workers,
+        mode,
+        output,
+    ))
+
+
+@click.command(name='schedule')
+@click.option('-p', '--parsers', multiple=True, help='Names of parsers to run.')
+def schedule(parsers: List[str]):
+    """Run parsers and clean up expired vacancies on intervals."""
+    asyncio.run(run_scheduler(parsers))
+
+
+@click.command(name='ingest_report')
+@click.option('-p', '--parser', 'parser_name', help='Show runs of this parser only.')
+@click.option('-n', '--limit', type=int, default=20, show_default=True, help='Number of runs.')
+@click.option(
+    '--prometheus',
+    type=click.Path(dir_okay=False),
+    help='Write metrics of the last run of every parser to Prometheus textfile.',
+)
+def ingestreport(parser_name: Optional[str], limit: int, prometheus: Optional[str]):
+    """Show the last runs of parsers."""
+    asyncio.run(echo_ingestion_report(parser_name, limit, prometheus))
 
 
 @click.command(name='run_app')
@@ -106,6 +371,10 @@ def runparsers(parsers: List[str]):
 @click.option('--path', type=str)
 def runapp(host, port, path):
     """Start API server."""
+    from aiohttp import web
+
+    from api.app import init_app
+
     app = init_app()
     web.run_app(app, host=host, port=port, path=path)
 
@@ -113,11 +382,13 @@ def runapp(host, port, path):
 @click.command(name='create_user')
 def createuser():
     """Create user."""
+    from api.validation.auth import NewUserCredentials
+
     username = click.prompt('Username', type=str)
     password1 = click.prompt('Password', type=str, hide_input=True)
     password2 = click.prompt('Confirm passwrod', type=str, hide_input=True)
 
-    user_credentials = UserCredentials(
+    user_credentials = NewUserCredentials(
         username=username,
         password1=password1,
         password2=password2,
@@ -134,10 +405,14 @@ def dropexpired():
 
 cli.add_command(updatevacancies)
 cli.add_command(runparsers)
+cli.add_command(loadvacancies)
+cli.add_command(reparse)
 cli.add_command(initdb)
 cli.add_command(runapp)
 cli.add_command(createuser)
 cli.add_command(dropexpired)
+cli.add_command(schedule)
+cli.add_command(ingestreport)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,299 @@
+from jobparser import ndjson, regions, reparse, utils, workers
+from jobparser.archive import ResponseArchive
+from jobparser.base import BaseParser
+from core.db.schema import vacancies_table
+from core.services.checkpoints import get_checkpoint
+from core.services.ingestion import get_ingestion_runs
+from core.services.rejects import get_vacancy_rejects
+
+from sqlalchemy import select
+
+import asyncio
+import json
+import pytest
+from datetime import datetime, timezone
+
+
+class FakeParser(BaseParser):
+
+    base_url = 'https://fake.ru'
+    name = 'fake'
+
+    pages = []
+
+    async def iter_vacancies(self):
+        for page in self.pages:
+            yield page
+
+
+class BrokenParser(FakeParser):
+
+    name = 'broken'
+
+    async def iter_vacancies(self):
+        yield self.pages[0]
+        raise RuntimeError('Source is down')
+
+
+class HangingParser(FakeParser):
+
+    name = 'hanging'
+
+    async def iter_vacancies(self):
+        yield self.pages[0]
+        await asyncio.sleep(10)
+
+
+class ConfigPagesParser(BaseParser):
+    """Parser with pages in config, so it is the same in worker processes."""
+
+    base_url = 'https://fake.ru'
+    name = 'config'
+
+    async def iter_vacancies(self):
+        for page in self.config['pages']:
+            yield page
+        if self.config.get('error'):
+            raise RuntimeError(self.config['error'])
+
+
+class BrokenConfigPagesParser(ConfigPagesParser):
+
+    name = 'broken_config'
+
+
+class RegionalParser(BaseParser):
+    """Parser which yields one vacancy of its region."""
+
+    base_url = 'https://fake.ru'
+    name = 'regional'
+
+    async def iter_vacancies(self):
+        self.high_water_mark = self.config['last_seen_at']
+        yield [{
+            'name': 'Job',
+            'source': 'https://fake.ru/{0}'.format(self.region_name),
+            'source_name': self.name,
+            'region': self.region_name,
+        }]
+
+
+@pytest.fixture
+def fake_pages(fake_vacancies_data):
+    vacancies_data = fake_vacancies_data(1, 9)
+    for vacancy in vacancies_data:
+        vacancy['source_name'] = FakeParser.name
+    return [vacancies_data[i:i+3] for i in range(0, 9, 3)]
+
+
+@pytest.fixture
+def broken_pages(fake_vacancies_data):
+    vacancies_data = fake_vacancies_data(1, 3)
+    for vacancy in vacancies_data:
+        vacancy['source_name'] = BrokenParser.name
+    return [vacancies_data]
+
+
+@pytest.fixture
+def fake_parsers(mocker, fake_pages, broken_pages):
+    mocker.patch.object(FakeParser, 'pages', fake_pages)
+    mocker.patch.object(BrokenParser, 'pages', broken_pages)
+    mocker.patch.dict(utils.PARSERS_REGISTRY, {'fake': FakeParser, 'broken': BrokenParser})
+    mocker.patch.dict(regions.PARSERS_CONFIG, {
+        'fake': {'parse_url': 'https://fake.ru', 'is_active': True},
+        'broken': {'parse_url': 'https://fake.ru', 'is_active': True},
+    })
+
+
+async def get_saved_sources(aio_engine):
+    async with aio_engine.acquire() as conn:
+        cursor = await conn.execute(select(vacancies_table))
+        results = await cursor.fetchall()
+    return {r.source for r in results}
+
+
+@pytest.mark.parametrize('mode', utils.INGESTION_MODES)
+async def test_parse_vacancies_to_db(aio_engine, fake_parsers, fake_pages, mode):
+    await asyncio.wait_for(utils.parse_vacancies_to_db(['fake'], mode), 10)
+
+    expected = {v['source'] for page in fake_pages for v in page}
+    assert await get_saved_sources(aio_engine) == expected
+
+
+@pytest.mark.parametrize('mode', utils.INGESTION_MODES)
+async def test_parse_vacancies_to_db_saves_all_pages_on_parser_error(
+    aio_engine, fake_parsers, fake_pages, broken_pages, mode
+):
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(utils.parse_vacancies_to_db(['broken', 'fake'], mode), 10)
+
+    expected = {v['source'] for page in fake_pages + broken_pages for v in page}
+    assert await get_saved_sources(aio_engine) == expected
+
+
+async def test_parse_vacancies_to_db_records_runs(aio_engine, fake_parsers, mocker, tmp_path):
+    textfile = tmp_path.joinpath('khabjob.prom')
+    mocker.patch.dict(utils.METRICS_CONFIG, {'textfile': textfile})
+
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(utils.parse_vacancies_to_db(['broken', 'fake']), 10)
+
+    async with aio_engine.acquire() as conn:
+        runs = {r.parser_name: r for r in await get_ingestion_runs(conn)}
+
+    assert (runs['fake'].pages, runs['fake'].created, runs['fake'].skipped) == (3, 9, 0)
+    assert runs['fake'].error is None
+    assert runs['broken'].error == "RuntimeError('Source is down')"
+    assert runs['fake'].finished_at >= runs['fake'].started_at
+    assert 'khabjob_ingestion_failed{parser="broken",region="khabarovsk"} 1' in textfile.read_text()
+
+
+async def test_parse_vacancies_to_db_touches_known_vacancies(
+    aio_engine, fake_parsers, fake_pages, mocker
+):
+    await asyncio.wait_for(utils.parse_vacancies_to_db(['fake']), 10)
+    fake_pages[1][0]['name'] = 'Jedi Master'
+    upsert = mocker.spy(utils, 'create_or_update_vacancy_batch')
+
+    await asyncio.wait_for(utils.parse_vacancies_to_db(['fake']), 10)
+
+    async with aio_engine.acquire() as conn:
+        run, _ = await get_ingestion_runs(conn)
+
+    assert upsert.call_count == 1
+    assert [v['source'] for v in upsert.call_args.args[1]] == [fake_pages[1][0]['source']]
+    assert (run.created, run.updated, run.skipped) == (0, 1, 8)
+
+
+async def test_parse_vacancies_to_db_rejects_invalid_vacancies(
+    aio_engine, fake_parsers, fake_pages
+):
+    fake_pages[0][0]['name'] = 'Jedi ' * 100
+    fake_pages[0][1]['source'] = 'not a link'
+
+    await asyncio.wait_for(utils.parse_vacancies_to_db(['fake']), 10)
+
+    async with aio_engine.acquire() as conn:
+        rejects = await get_vacancy_rejects(conn, 'fake')
+        run, = await get_ingestion_runs(conn)
+        cursor = await conn.execute(
+            select(vacancies_table).where(vacancies_table.c.source == fake_pages[0][0]['source'])
+        )
+        clamped = await cursor.first()
+
+    assert [(r.reason, r.data['source']) for r in rejects] == [
+        ('source is not http url', 'not a link'),
+    ]
+    assert (run.created, run.rejected, run.skipped) == (8, 1, 0)
+    assert len(clamped.name) == vacancies_table.c.name.type.length
+
+
+async def test_parse_vacancies_to_db_in_workers(aio_engine, fake_pages, mocker):
+    mocker.patch.dict(utils.PARSERS_REGISTRY, {
+        'config': ConfigPagesParser,
+        'broken_config': BrokenConfigPagesParser,
+    })
+    mocker.patch.dict(regions.PARSERS_CONFIG, {
+        'config': {'parse_url': 'https://fake.ru', 'is_active': True, 'pages': fake_pages[:2]},
+        'broken_config': {
+            'parse_url': 'https://fake.ru',
+            'is_active': True,
+            'pages': fake_pages[2:],
+            'error': 'Source is down',
+        },
+    })
+
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(
+            workers.parse_vacancies_to_db_in_workers(2, ['broken_config', 'config']),
+            60,
+        )
+
+    async with aio_engine.acquire() as conn:
+        runs = {r.parser_name: r for r in await get_ingestion_runs(conn)}
+
+    assert (runs['config'].pages, runs['config'].created) == (2, 6)
+    assert runs['broken_config'].error == "RuntimeError('Source is down')"
+    expected = {v['source'] for page in fake_pages for v in page}
+    assert await get_saved_sources(aio_engine) == expected
+
+
+@pytest.mark.parametrize('mode', utils.INGESTION_MODES)
+async def test_load_vacancies_dump(aio_engine, fake_pages, mode, tmp_path):
+    path = str(tmp_path.joinpath('vacancies.ndjson.gz'))
+    with ndjson.open_dump_output(path) as dump:
+        ndjson.write_vacancies_dump(dump, fake_pages)
+
+    with ndjson.open_dump_input(path) as dump:
+        stats = await asyncio.wait_for(ndjson.load_vacancies_dump(dump, mode, page_size=4), 10)
+
+    assert (stats.pages, stats.created) == (3, 9)
+    expected = {v['source'] for page in fake_pages for v in page}
+    assert await get_saved_sources(aio_engine) == expected
+
+
+async def test_reparse_archive_to_db(aio_engine, mocker, tmp_path):
+    mocker.patch.dict(reparse.PARSERS_CONFIG, {
+        'hh': {'parse_url': 'https://api.hh.ru/vacancies', 'is_active': True},
+    })
+    response_archive = ResponseArchive(tmp_path)
+    page = {'items': [
+        {'name': 'Job {0}'.format(i), 'alternate_url': 'https://hh.ru/vacancy/{0}'.format(i)}
+        for i in range(3)
+    ]}
+    response_archive.write('hh', 'https://api.hh.ru/vacancies', {}, json.dumps(page).encode(), 'utf-8')
+
+    stats = await asyncio.wait_for(reparse.reparse_archive_to_db(response_archive, workers=1), 30)
+
+    assert (stats.vacancies, stats.created) == (3, 3)
+    assert await get_saved_sources(aio_engine) == {item['alternate_url'] for item in page['items']}
+
+
+async def test_parse_vacancies_to_db_records_truncated_run(aio_engine, fake_pages, mocker):
+    mocker.patch.object(HangingParser, 'pages', fake_pages)
+    mocker.patch.dict(utils.PARSERS_REGISTRY, {'hanging': HangingParser})
+    mocker.patch.dict(regions.PARSERS_CONFIG, {
+        'hanging': {'parse_url': 'https://fake.ru', 'is_active': True, 'deadline': 0.1},
+    })
+
+    await asyncio.wait_for(utils.parse_vacancies_to_db(['hanging']), 10)
+
+    async with aio_engine.acquire() as conn:
+        run, = await get_ingestion_runs(conn)
+
+    assert (run.parser_name, run.created, run.is_truncated) == ('hanging', 3, True)
+    assert await get_saved_sources(aio_engine) == {v['source'] for v in fake_pages[0]}
+
+
+async def test_parse_vacancies_to_db_by_regions(aio_engine, mocker):
+    last_seen_at = datetime(2021, 9, 1, 12, tzinfo=timezone.utc)
+    mocker.patch.dict(utils.PARSERS_REGISTRY, {'regional': RegionalParser})
+    mocker.patch.dict(regions.PARSERS_CONFIG, {
+        'regional': {
+            'parse_url': 'https://fake.ru',
+            'is_active': True,
+            'last_seen_at': last_seen_at,
+            'regions': [{'name': 'khabarovsk'}, {'name': 'vladivostok'}, {'name': 'magadan'}],
+        },
+    })
+    mocker.patch.object(regions, 'REGIONS', ['khabarovsk', 'vladivostok'])
+
+    await asyncio.wait_for(utils.parse_vacancies_to_db(['regional']), 10)
+
+    async with aio_engine.acquire() as conn:
+        cursor = await conn.execute(select(vacancies_table))
+        saved = {r.source: r.region for r in await cursor.fetchall()}
+        runs = {r.region: r for r in await get_ingestion_runs(conn, 'regional')}
+        checkpoints = [
+            await get_checkpoint(conn, 'regional', region)
+            for region in ('khabarovsk', 'vladivostok', 'magadan')
+        ]
+
+    assert saved == {
+        'https://fake.ru/khabarovsk': 'khabarovsk',
+        'https://fake.ru/vladivostok': 'vladivostok',
+    }
+    assert {region: run.created for region, run in runs.items()} == {
+        'khabarovsk': 1, 'vladivostok': 1,
+    }
+    assert checkpoints == [last_seen_at, last_seen_at, None]
@@ -0,0 +1,45 @@
+from core.services import checkpoints
+
+from datetime import datetime, timedelta, timezone
+
+
+async def test_get_checkpoint_not_exists(aio_engine):
+    async with aio_engine.acquire() as conn:
+        result = await checkpoints.get_checkpoint(conn, 'hh', 'khabarovsk')
+
+    assert result is None
+
+
+async def test_save_checkpoint(aio_engine):
+    last_seen_at = datetime(2021, 9, 1, 12, tzinfo=timezone.utc)
+
+    async with aio_engine.acquire() as conn:
+        await checkpoints.save_checkpoint(conn, 'hh', 'khabarovsk', last_seen_at)
+        await checkpoints.save_checkpoint(conn, 'vk', 'khabarovsk', last_seen_at - timedelta(days=1))
+        result = await checkpoints.get_checkpoint(conn, 'hh', 'khabarovsk')
+
+    assert result == last_seen_at
+
+
+async def test_save_checkpoint_is_never_moved_back(aio_engine):
+    last_seen_at = datetime(2021, 9, 1, 12, tzinfo=timezone.utc)
+
+    async with aio_engine.acquire() as conn:
+        await checkpoints.save_checkpoint(conn, 'hh', 'khabarovsk', last_seen_at)
+        await checkpoints.save_checkpoint(conn, 'hh', 'khabarovsk', last_seen_at - timedelta(hours=1))
+        result = await checkpoints.get_checkpoint(conn, 'hh', 'khabarovsk')
+
+    assert result == last_seen_at
+
+
+async def test_save_checkpoints_of_regions(aio_engine):
+    last_seen_at = datetime(2021, 9, 1, 12, tzinfo=timezone.utc)
+
+    async with aio_engine.acquire() as conn:
+        await checkpoints.save_checkpoint(conn, 'hh', 'khabarovsk', last_seen_at)
+        await checkpoints.save_checkpoint(conn, 'hh', 'vladivostok', last_seen_at - timedelta(days=1))
+        khabarovsk = await checkpoints.get_checkpoint(conn, 'hh', 'khabarovsk')
+        vladivostok = await checkpoints.get_checkpoint(conn, 'hh', 'vladivostok')
+
+    assert khabarovsk == last_seen_at
+    assert vladivostok == last_seen_at - timedelta(days=1)
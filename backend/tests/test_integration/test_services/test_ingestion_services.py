@@ -0,0 +1,61 @@
+from core.services import ingestion
+
+from datetime import datetime, timedelta, timezone
+
+
+STARTED_AT = datetime(2021, 9, 1, 12, tzinfo=timezone.utc)
+
+
+def make_run_data(parser_name, started_at, **data):
+    run_data = {
+        'parser_name': parser_name,
+        'started_at': started_at,
+        'finished_at': started_at + timedelta(seconds=30),
+        'pages': 2,
+        'requests': 3,
+        'http_errors': 1,
+        'bytes': 2048,
+        'latency_p50': 0.1,
+        'latency_p90': 0.5,
+        'latency_p99': 0.9,
+        'created': 10,
+        'updated': 5,
+        'skipped': 1,
+        'duplicates': 0,
+        'error': None,
+    }
+    run_data.update(data)
+    return run_data
+
+
+async def test_save_and_get_ingestion_runs(aio_engine):
+    runs_data = [
+        make_run_data('hh', STARTED_AT),
+        make_run_data('hh', STARTED_AT + timedelta(hours=1), error="RuntimeError('down')"),
+        make_run_data('vk', STARTED_AT + timedelta(minutes=30)),
+    ]
+
+    async with aio_engine.acquire() as conn:
+        await ingestion.save_ingestion_runs(conn, runs_data)
+        all_runs = await ingestion.get_ingestion_runs(conn)
+        hh_runs = await ingestion.get_ingestion_runs(conn, 'hh', limit=1)
+
+    assert [(r.parser_name, r.started_at) for r in all_runs] == [
+        ('hh', STARTED_AT + timedelta(hours=1)),
+        ('vk', STARTED_AT + timedelta(minutes=30)),
+        ('hh', STARTED_AT),
+    ]
+    assert len(hh_runs) == 1
+    assert hh_runs[0].error == "RuntimeError('down')"
+
+
+async def test_get_last_ingestion_runs(aio_engine):
+    async with aio_engine.acquire() as conn:
+        await ingestion.save_ingestion_runs(conn, [
+            make_run_data('hh', STARTED_AT),
+            make_run_data('hh', STARTED_AT + timedelta(hours=1), created=0),
+            make_run_data('vk', STARTED_AT),
+        ])
+        runs = await ingestion.get_last_ingestion_runs(conn)
+
+    assert [(r.parser_name, r.created) for r in runs] == [('hh', 0), ('vk', 10)]
@@ -0,0 +1,20 @@
+from core.services import rejects
+
+
+async def test_save_and_get_vacancy_rejects(aio_engine):
+    rejects_data = [
+        {'parser_name': 'vk', 'reason': 'empty name', 'data': {'name': '', 'source': 'https://vk.com/wall1_1'}},
+        {'parser_name': 'hh', 'reason': 'empty source', 'data': {'name': 'Job', 'source': None}},
+    ]
+
+    async with aio_engine.acquire() as conn:
+        await rejects.save_vacancy_rejects(conn, rejects_data)
+        await rejects.save_vacancy_rejects(conn, [])
+        all_rejects = await rejects.get_vacancy_rejects(conn)
+        vk_rejects = await rejects.get_vacancy_rejects(conn, 'vk', limit=1)
+
+    assert [r.parser_name for r in all_rejects] == ['hh', 'vk']
+    assert [(r.reason, r.data) for r in vk_rejects] == [
+        ('empty name', {'name': '', 'source': 'https://vk.com/wall1_1'}),
+    ]
+    assert all(r.created_at is not None for r in all_rejects)
@@ -1,9 +1,11 @@
 from core.services import vacancies
+from jobparser.dedup import add_signatures
 from core.db.schema import vacancies_table
-from core.db.utils import except_tsvector_columns
+from core.db.utils import except_internal_columns
 
 from datetime import timedelta, datetime
-from sqlalchemy import select
+from sqlalchemy import select, update
+import psycopg2
 
 
 async def test_create_vacancy(aio_engine, fake_vacancies_data):
@@ -13,7 +15,7 @@ async def test_create_vacancy(aio_engine, fake_vacancies_data):
         vacancy = await vacancies.create_vacancy(conn, **vacancy_data)
 
     async with aio_engine.acquire() as conn:
-        columns = except_tsvector_columns(vacancies_table)
+        columns = except_internal_columns(vacancies_table)
         cursor = await conn.execute(
             select(*columns).where(vacancies_table.c.source == vacancy_data['source'])
         )
@@ -174,6 +176,18 @@ async def test_search_vacancies_by_query(aio_engine, create_vacancy_return_data)
     assert not 'search_index' in result[0].keys()
     
 
+async def test_search_vacancies_by_region(aio_engine, create_vacancy_return_data):
+    expected = await create_vacancy_return_data(region='vladivostok')
+    await create_vacancy_return_data(region='khabarovsk')
+    await create_vacancy_return_data()
+
+    async with aio_engine.acquire() as conn:
+        result = await vacancies.search_vacancies(conn, region='vladivostok')
+
+    assert [r['source'] for r in result] == [expected['source']]
+    assert result[0]['region'] == 'vladivostok'
+
+
 async def test_search_vacancies_by_dates_and_query(aio_engine, create_vacancy_return_data):
     today = datetime.utcnow().date()
     date_from = today - timedelta(days=5)
@@ -263,7 +277,7 @@ async def test_update_vacancy_success(aio_engine, create_vacancy_return_data):
 
     async with aio_engine.acquire() as conn:
         cursor = await conn.execute(
-            select(*except_tsvector_columns(vacancies_table)).where(
+            select(*except_internal_columns(vacancies_table)).where(
                 vacancies_table.c.name == expedted['name']
             )
         )
@@ -346,3 +360,263 @@ async def test_delete_expired_vacancies(aio_engine, create_vacancy):
     assert actual_vacancies == existed_vacancies
     assert result == 3
 
+
+
+async def test_create_or_update_vacancy_batch(aio_engine, create_vacancy_return_data, fake_vacancies_data):
+    existed_data = await create_vacancy_return_data(
+        created_at=datetime.utcnow()-timedelta(days=5),
+        modified_at=datetime.utcnow()-timedelta(days=5)
+    )
+    existed_data.pop('created_at')
+    existed_data.pop('modified_at')
+    existed_data['name'] = 'Jedi Master'
+    new_data = fake_vacancies_data(1, 4)
+
+    async with aio_engine.acquire() as conn:
+        created, updated = await vacancies.create_or_update_vacancy_batch(
+            conn, new_data + [existed_data], chunk_size=2
+        )
+
+    async with aio_engine.acquire() as conn:
+        cursor = await conn.execute(select(vacancies_table))
+        results = {r.source: r for r in await cursor.fetchall()}
+
+    assert (created, updated) == (4, 1)
+    assert len(results) == 5
+    assert results[existed_data['source']].name == 'Jedi Master'
+    assert results[existed_data['source']].modified_at == datetime.utcnow().date()
+    for vacancy in new_data:
+        assert results[vacancy['source']].name == vacancy['name']
+
+
+async def test_create_or_update_vacancy_batch_duplicated_source(aio_engine, fake_vacancies_data):
+    vacancy_data = fake_vacancies_data(1, 1)[0]
+    duplicate = dict(vacancy_data, name='Jedi Master')
+
+    async with aio_engine.acquire() as conn:
+        created, updated = await vacancies.create_or_update_vacancy_batch(
+            conn, [vacancy_data, duplicate]
+        )
+        cursor = await conn.execute(select(vacancies_table))
+        results = await cursor.fetchall()
+
+    assert (created, updated) == (1, 0)
+    assert [r.name for r in results] == ['Jedi Master']
+
+
+async def test_create_or_update_vacancy_batch_unchanged(aio_engine, fake_vacancies_data):
+    vacancies_data = fake_vacancies_data(1, 3)
+    changed = dict(vacancies_data[0], name='Jedi Master')
+
+    async with aio_engine.acquire() as conn:
+        await vacancies.create_or_update_vacancy_batch(conn, vacancies_data)
+        await conn.execute(
+            update(vacancies_table).values(modified_at=datetime.utcnow() - timedelta(days=5))
+        )
+        cursor = await conn.execute(select(vacancies_table.c.source, vacancies_table.c.content_hash))
+        hashes = {r.source: r.content_hash for r in await cursor.fetchall()}
+
+        created, updated = await vacancies.create_or_update_vacancy_batch(
+            conn, [changed] + vacancies_data[1:]
+        )
+        cursor = await conn.execute(select(vacancies_table))
+        results = {r.source: r for r in await cursor.fetchall()}
+        touched = await vacancies.touch_vacancies(
+            conn, list(results), datetime.utcnow().date()
+        )
+
+    assert (created, updated) == (0, 1)
+    assert results[changed['source']].name == 'Jedi Master'
+    assert results[changed['source']].content_hash != hashes[changed['source']]
+    for vacancy in vacancies_data[1:]:
+        assert results[vacancy['source']].content_hash == hashes[vacancy['source']]
+    assert {r.modified_at for r in results.values()} == {datetime.utcnow().date()}
+    assert touched == 0
+
+
+def test_get_content_hash(fake_vacancies_data):
+    vacancy = fake_vacancies_data(1, 1)[0]
+    vacancy['description'] = None
+
+    assert vacancies.get_content_hash(vacancy) == vacancies.get_content_hash(
+        {k: v for k, v in vacancy.items() if k != 'description'}
+    )
+    assert vacancies.get_content_hash(vacancy) != vacancies.get_content_hash(
+        dict(vacancy, description='Use the force')
+    )
+    assert -2 ** 63 <= vacancies.get_content_hash(vacancy) < 2 ** 63
+
+
+async def test_copy_and_merge_staging_vacancies(
+    aio_engine, migrated_postgres, create_vacancy_return_data, fake_vacancies_data
+):
+    existed_data = await create_vacancy_return_data(description='Use the force')
+    existed_data['name'] = 'Jedi\tMaster\\n'
+    new_data = fake_vacancies_data(1, 3)
+    for vacancy in new_data:
+        vacancy['source_name'] = existed_data['source_name']
+
+    conn = psycopg2.connect(migrated_postgres)
+    try:
+        cursor = conn.cursor()
+        vacancies.create_vacancies_staging(cursor)
+        copied = vacancies.copy_vacancies_to_staging(cursor, new_data + [existed_data])
+        results = vacancies.merge_staging_vacancies(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+
+    async with aio_engine.acquire() as conn:
+        cursor = await conn.execute(select(vacancies_table))
+        saved = {r.source: r for r in await cursor.fetchall()}
+
+    assert copied == 4
+    assert results == {existed_data['source_name']: (3, 1)}
+    assert saved[existed_data['source']].name == 'Jedi\tMaster\\n'
+    assert saved[existed_data['source']].description == 'Use the force'
+    for vacancy in new_data:
+        assert saved[vacancy['source']].name == vacancy['name']
+        assert saved[vacancy['source']].created_at == datetime.utcnow().date()
+
+
+def test_merge_staging_vacancies_unchanged(migrated_postgres, fake_vacancies_data):
+    vacancies_data = fake_vacancies_data(1, 3)
+    changed = dict(vacancies_data[0], name='Jedi Master')
+
+    conn = psycopg2.connect(migrated_postgres)
+    try:
+        cursor = conn.cursor()
+        vacancies.create_vacancies_staging(cursor)
+        vacancies.copy_vacancies_to_staging(cursor, vacancies_data)
+        vacancies.merge_staging_vacancies(cursor)
+        cursor.execute("UPDATE vacancies SET modified_at = now() - interval '5 days'")
+        conn.commit()
+
+        vacancies.create_vacancies_staging(cursor)
+        vacancies.copy_vacancies_to_staging(cursor, [changed] + vacancies_data[1:])
+        results = vacancies.merge_staging_vacancies(cursor)
+        conn.commit()
+        cursor.execute('SELECT source, name, modified_at FROM vacancies')
+        saved = {source: (name, modified_at) for source, name, modified_at in cursor.fetchall()}
+    finally:
+        conn.close()
+
+    assert results == {changed['source_name']: (0, 1)}
+    assert saved[changed['source']][0] == 'Jedi Master'
+    assert {modified_at for _, modified_at in saved.values()} == {datetime.utcnow().date()}
+
+
+def make_duplicates_data(fake_vacancies_data):
+    """Return original vacancy, its near-duplicate from other source and other vacancy."""
+    vacancies_data = fake_vacancies_data(3, 1)
+    vacancies_data[0].update(
+        name='Продавец-консультант в магазин одежды',
+        description='График 2/2, зарплата от 35000, ТЦ Броско Молл',
+    )
+    vacancies_data[1].update(
+        name='Продавец консультант (магазин одежды)',
+        description='График 2/2, зарплата от 35 000 руб., ТЦ Броско Молл',
+    )
+    vacancies_data[2].update(name='Водитель категории C', description='Опыт от 3 лет')
+    return add_signatures(vacancies_data)
+
+
+async def test_link_duplicate_vacancies(aio_engine, fake_vacancies_data):
+    original, duplicate, other = make_duplicates_data(fake_vacancies_data)
+
+    async with aio_engine.acquire() as conn:
+        await vacancies.create_or_update_vacancy_batch(conn, [original])
+        await vacancies.create_or_update_vacancy_batch(conn, [duplicate, other])
+        results = await vacancies.link_duplicate_vacancies(
+            conn, [duplicate['source'], other['source']], threshold=0.7,
+        )
+        cursor = await conn.execute(select(vacancies_table))
+        saved = {r.source: r for r in await cursor.fetchall()}
+        found = await vacancies.search_vacancies(conn)
+
+    assert results == {duplicate['source_name']: 1}
+    assert saved[duplicate['source']].duplicate_of == saved[original['source']].id
+    assert saved[original['source']].duplicate_of is None
+    assert saved[other['source']].duplicate_of is None
+    assert {r.source for r in found} == {original['source'], other['source']}
+
+
+async def test_link_duplicate_vacancies_suppress(aio_engine, fake_vacancies_data):
+    original, duplicate, other = make_duplicates_data(fake_vacancies_data)
+
+    async with aio_engine.acquire() as conn:
+        await vacancies.create_or_update_vacancy_batch(conn, [original, duplicate, other])
+        results = await vacancies.link_duplicate_vacancies(
+            conn,
+            [original['source'], duplicate['source'], other['source']],
+            threshold=0.7,
+            action='suppress',
+        )
+        cursor = await conn.execute(select(vacancies_table.c.source))
+        saved = {r.source for r in await cursor.fetchall()}
+
+    assert results == {duplicate['source_name']: 1}
+    assert saved == {original['source'], other['source']}
+
+
+async def test_link_staged_duplicate_vacancies(aio_engine, migrated_postgres, fake_vacancies_data):
+    original, duplicate, other = make_duplicates_data(fake_vacancies_data)
+    async with aio_engine.acquire() as conn:
+        await vacancies.create_or_update_vacancy_batch(conn, [original])
+
+    conn = psycopg2.connect(migrated_postgres)
+    try:
+        cursor = conn.cursor()
+        vacancies.create_vacancies_staging(cursor)
+        vacancies.copy_vacancies_to_staging(cursor, [duplicate, other])
+        vacancies.merge_staging_vacancies(cursor)
+        results = vacancies.link_staged_duplicate_vacancies(cursor, threshold=0.7)
+        conn.commit()
+    finally:
+        conn.close()
+
+    async with aio_engine.acquire() as conn:
+        cursor = await conn.execute(select(vacancies_table))
+        saved = {r.source: r for r in await cursor.fetchall()}
+
+    assert results == {duplicate['source_name']: 1}
+    assert saved[duplicate['source']].minhash == duplicate['minhash']
+    assert saved[duplicate['source']].duplicate_of == saved[original['source']].id
+
+
+async def test_get_vacancies_to_enrich_and_save_descriptions(aio_engine, fake_vacancies_data):
+    vacancies_data = fake_vacancies_data(1, 4)
+    for vacancy in vacancies_data:
+        vacancy.update(source_name='hh', description=None)
+
+    async with aio_engine.acquire() as conn:
+        old, *created = await vacancies.create_vacancy_batch(conn, vacancies_data)
+        to_enrich = await vacancies.get_vacancies_to_enrich(conn, 'hh', old.id, limit=10)
+        saved = await vacancies.save_vacancies_descriptions(conn, {
+            created[0].id: 'Разработка агрегатора вакансий',
+            created[1].id: None,
+        })
+        not_enriched = await vacancies.get_vacancies_to_enrich(conn, 'hh', old.id, limit=10)
+        found = await vacancies.search_vacancies(conn, search_query='агрегатор')
+        cursor = await conn.execute(
+            select(vacancies_table).where(vacancies_table.c.id == created[1].id)
+        )
+        empty = await cursor.first()
+
+    assert [r.id for r in to_enrich] == [r.id for r in created]
+    assert saved == 2
+    assert [r.id for r in not_enriched] == [created[2].id]
+    assert [r['source'] for r in found] == [created[0].source]
+    assert empty.description is None and empty.enriched_at is not None
+
+
+async def test_get_vacancies_to_enrich_of_shard(aio_engine, fake_vacancies_data):
+    vacancies_data = fake_vacancies_data(1, 4)
+    for vacancy in vacancies_data:
+        vacancy['source_name'] = 'hh'
+
+    async with aio_engine.acquire() as conn:
+        created = await vacancies.create_vacancy_batch(conn, vacancies_data)
+        shard = await vacancies.get_vacancies_to_enrich(conn, 'hh', 0, limit=10, shard=1, shards=2)
+
+    assert [r.id for r in shard] == [r.id for r in created if r.id % 2 == 1]
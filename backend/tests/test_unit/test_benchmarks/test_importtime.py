@@ -0,0 +1,57 @@
+from benchmarks import importtime
+
+import subprocess
+import sys
+
+import pytest
+
+
+# Modules of parsers and API, commands which do not use them must not import them
+HEAVY_MODULES = {
+    'aiofiles',
+    'api.app',
+    'bs4',
+    'jobparser.parsers',
+    'lxml',
+    'numpy',
+    'pydantic',
+}
+
+
+@pytest.fixture(scope='module')
+def commands_modules():
+    return importtime.get_commands_modules(importtime.MAIN_PATH.read_text())
+
+
+def get_imported_modules(modules):
+    code = 'import sys, main; {0}; print(" ".join(sorted(sys.modules)))'.format(
+        '; '.join('import {0}'.format(module) for module in modules) or 'pass'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=importtime.MAIN_PATH.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+def test_all_commands_are_found(commands_modules):
+    assert set(commands_modules) == set(importtime.IMPORT_BUDGETS)
+    assert commands_modules['update_vacancies'] == {'jobparser.utils', 'jobparser.workers'}
+
+
+def test_main_does_not_import_heavy_modules():
+    assert not get_imported_modules([]) & HEAVY_MODULES
+
+
+@pytest.mark.parametrize('command_name', ['drop_expired_vacancies', 'ingest_report'])
+def test_database_commands_do_not_import_heavy_modules(commands_modules, command_name):
+    assert not get_imported_modules(commands_modules[command_name]) & HEAVY_MODULES
+
+
+def test_create_user_does_not_import_parsers(commands_modules):
+    modules = get_imported_modules(commands_modules['create_user'])
+
+    assert not modules & {'jobparser.parsers', 'bs4', 'lxml', 'aiofiles', 'api.app'}
@@ -0,0 +1,98 @@
+from aiohttp import web, ClientSession
+
+from benchmarks.fixtures import FixtureStore, get_response_key, record_responses
+from benchmarks.standin import StandinState, create_standin_app, get_standin_configs
+
+from jobparser.parsers import HHParser
+
+from yarl import URL
+
+from datetime import datetime, timedelta, timezone
+import pytest
+
+
+NOW = datetime.now(tz=timezone.utc)
+
+FOUND = 150
+
+
+def make_hh_page(page):
+    per_page = HHParser.per_page
+    return {
+        'found': FOUND,
+        'items': [
+            {
+                'name': 'job {0}'.format(page * per_page + i),
+                'alternate_url': 'https://hh.ru/vacancy/{0}'.format(page * per_page + i),
+                'published_at': (
+                    NOW - timedelta(minutes=page * per_page + i)
+                ).strftime('%Y-%m-%dT%H:%M:%S%z'),
+            }
+            for i in range(min(per_page, FOUND - page * per_page))
+        ],
+    }
+
+
+@pytest.fixture
+def hh_source(loop, aiohttp_server):
+    async def handler(request):
+        return web.json_response(make_hh_page(int(request.query['page'])))
+
+    app = web.Application()
+    app.router.add_get('/vacancies/', handler)
+    return loop.run_until_complete(aiohttp_server(app))
+
+
+@pytest.mark.parametrize('parse_url,url', [
+    ('https://api.hh.ru/vacancies/', 'https://api.hh.ru/vacancies/?page=1&date_from=x'),
+    ('http://127.0.0.1:80/hh/', 'http://127.0.0.1:80/hh/?page=1'),
+    ('https://farpost.ru/job', 'https://farpost.ru/job/?page=1'),
+])
+def test_get_response_key_is_relative_to_parse_url(parse_url, url):
+    assert get_response_key(parse_url, URL(url)) == '?page=1'
+
+
+async def test_recorded_responses_are_replayed(hh_source, aiohttp_server, tmp_path):
+    config = {'parse_url': str(hh_source.make_url('/vacancies/'))}
+    store = FixtureStore(tmp_path)
+
+    async with ClientSession() as session:
+        parser = HHParser(session, config)
+        record_responses(parser, store)
+        recorded = await parser.get_vacancies()
+    store.save_manifest()
+
+    state = StandinState(FixtureStore(tmp_path))
+    standin = await aiohttp_server(create_standin_app(state))
+    standin_config = get_standin_configs(
+        {'hh': str(standin.make_url('/'))},
+        {'hh': config},
+    )['hh']
+
+    async with ClientSession() as session:
+        replayed = await HHParser(session, standin_config).get_vacancies()
+
+    assert len(recorded) == FOUND
+    assert sorted(replayed, key=lambda v: v['source']) == sorted(recorded, key=lambda v: v['source'])
+    assert state.pages['hh'] == 2
+    assert not state.missing
+
+
+async def test_standin_failures_are_retried(hh_source, aiohttp_server, tmp_path):
+    config = {'parse_url': str(hh_source.make_url('/vacancies/'))}
+    store = FixtureStore(tmp_path)
+    async with ClientSession() as session:
+        parser = HHParser(session, config)
+        record_responses(parser, store)
+        await parser.get_vacancies()
+
+    state = StandinState(store, failure_rate=0.3, seed=1)
+    standin = await aiohttp_server(create_standin_app(state))
+    standin_config = get_standin_configs({'hh': str(standin.make_url('/'))}, {'hh': config})['hh']
+    standin_config['retry'] = {'attempts': 10, 'backoff': 0.001, 'max_backoff': 0.001}
+
+    async with ClientSession() as session:
+        replayed = await HHParser(session, standin_config).get_vacancies()
+
+    assert len(replayed) == FOUND
+    assert sum(state.failures.values()) > 0
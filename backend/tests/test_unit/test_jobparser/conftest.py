@@ -0,0 +1,11 @@
+from jobparser import archive, cache, resilience
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolate_parsers_state(mocker):
+    """Turn off response cache and archive and reset circuit breakers."""
+    mocker.patch.dict(cache.PARSERS_CACHE_CONFIG, {'is_active': False})
+    mocker.patch.dict(archive.RESPONSE_ARCHIVE_CONFIG, {'is_active': False})
+    mocker.patch.dict(resilience._circuit_breakers, clear=True)
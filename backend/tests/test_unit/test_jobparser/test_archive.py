@@ -0,0 +1,77 @@
+from aiohttp import web, ClientSession
+
+from jobparser import archive
+from jobparser.base import BaseParser
+
+from datetime import date, datetime, timezone
+import gzip
+
+import pytest
+
+
+class JsonParser(BaseParser):
+
+    base_url = 'https://fake.ru'
+    name = 'fake'
+
+
+@pytest.fixture
+def response_archive(tmp_path):
+    return archive.ResponseArchive(tmp_path)
+
+
+def test_response_archive_stores_body_once(response_archive):
+    fetched_at = datetime(2021, 9, 1, 12, tzinfo=timezone.utc)
+
+    first = response_archive.write('hh', 'https://api.hh.ru', {'page': 0}, b'body', 'utf-8', fetched_at)
+    second = response_archive.write('hh', 'https://api.hh.ru', {'page': 1}, b'body', 'utf-8', fetched_at)
+
+    assert first.digest == second.digest
+    objects = list(response_archive.directory.joinpath('objects').rglob('*.gz'))
+    assert len(objects) == 1
+    assert gzip.decompress(objects[0].read_bytes()) == b'body'
+    assert response_archive.read_body(first.digest) == b'body'
+    assert list(response_archive.iter_entries()) == [first, second]
+
+
+def test_response_archive_does_not_store_secret_params(response_archive):
+    entry = response_archive.write(
+        'vk', 'https://api.vk.com', {'q': 'job', 'access_token': 'secret'}, b'{}', 'utf-8',
+    )
+
+    manifest = response_archive.get_manifest_path(datetime.now(tz=timezone.utc).date())
+    assert entry.params == {'q': 'job'}
+    assert 'secret' not in manifest.read_text()
+
+
+def test_response_archive_iter_entries_filters(response_archive):
+    for day, parser_name in [(1, 'hh'), (2, 'hh'), (2, 'vk')]:
+        response_archive.write(
+            parser_name, 'https://fake.ru', None, b'body', 'utf-8',
+            datetime(2021, 9, day, tzinfo=timezone.utc),
+        )
+
+    entries = list(response_archive.iter_entries(since=date(2021, 9, 2), parsers=['hh']))
+
+    assert [(e.parser_name, e.fetched_at[:10]) for e in entries] == [('hh', '2021-09-02')]
+
+
+async def test_parser_archives_responses(loop, aiohttp_server, mocker, response_archive):
+    async def handler(request):
+        return web.json_response({'page': request.query['page']})
+
+    app = web.Application()
+    app.router.add_get('/', handler)
+    server = await aiohttp_server(app)
+    mocker.patch.object(archive, '_response_archive', response_archive)
+    mocker.patch.dict(archive.RESPONSE_ARCHIVE_CONFIG, {'is_active': True})
+
+    async with ClientSession() as session:
+        parser = JsonParser(session, {'parse_url': str(server.make_url('/'))})
+        await parser.get_json(parser.parse_url, params={'page': '1'})
+
+    entry, = response_archive.iter_entries()
+    assert (entry.parser_name, entry.params) == ('fake', {'page': '1'})
+    assert parser.decode_json(response_archive.read_body(entry.digest), entry.encoding) == {
+        'page': '1',
+    }
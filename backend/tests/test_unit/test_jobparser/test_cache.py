@@ -0,0 +1,83 @@
+from aiohttp import web, ClientSession
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from jobparser import cache
+from jobparser.base import BaseParser
+
+import os
+import pytest
+
+
+class JsonParser(BaseParser):
+
+    base_url = 'https://fake.ru'
+    name = 'fake'
+
+
+def make_headers(**headers):
+    return CIMultiDictProxy(CIMultiDict(headers))
+
+
+@pytest.fixture
+def response_cache(tmp_path):
+    return cache.ResponseCache(tmp_path, max_size=100)
+
+
+async def test_response_cache_set_and_get(loop, response_cache):
+    key = response_cache.get_key('https://fake.ru', {'page': 1})
+
+    await response_cache.set(key, b'body', 'utf-8', make_headers(ETag='"v1"'))
+    cached = await response_cache.get(key)
+
+    assert cached.body == b'body'
+    assert cached.get_conditional_headers() == {'If-None-Match': '"v1"'}
+    assert response_cache.get_key('https://fake.ru', {'page': 2}) != key
+
+
+async def test_response_cache_skips_response_without_validators(loop, response_cache):
+    key = response_cache.get_key('https://fake.ru')
+
+    await response_cache.set(key, b'body', 'utf-8', make_headers())
+
+    assert await response_cache.get(key) is None
+
+
+async def test_response_cache_evicts_least_recently_used(loop, response_cache):
+    headers = make_headers(**{'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+    keys = [response_cache.get_key('https://fake.ru', {'page': i}) for i in range(3)]
+
+    for i, key in enumerate(keys[:2]):
+        await response_cache.set(key, b'x' * 40, 'utf-8', headers)
+        body_path = response_cache.directory.joinpath('{0}.body'.format(key))
+        os.utime(body_path, (i, i))
+    await response_cache.get(keys[0])  # First response becomes recently used
+    await response_cache.set(keys[2], b'x' * 40, 'utf-8', headers)
+
+    assert await response_cache.get(keys[0]) is not None
+    assert await response_cache.get(keys[1]) is None
+    assert await response_cache.get(keys[2]) is not None
+
+
+async def test_parser_sends_conditional_request(loop, aiohttp_server, mocker, tmp_path):
+    requests_headers = []
+
+    async def handler(request):
+        requests_headers.append(request.headers)
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304)
+        return web.json_response({'page': 1}, headers={'ETag': '"v1"'})
+
+    app = web.Application()
+    app.router.add_get('/', handler)
+    server = await aiohttp_server(app)
+    mocker.patch.object(cache, '_response_cache', cache.ResponseCache(tmp_path, 1000))
+    mocker.patch.dict(cache.PARSERS_CACHE_CONFIG, {'is_active': True})
+
+    async with ClientSession() as session:
+        parser = JsonParser(session, {'parse_url': str(server.make_url('/'))})
+        first = await parser.get_json(parser.parse_url)
+        second = await parser.get_json(parser.parse_url)
+
+    assert first == second == {'page': 1}
+    assert 'If-None-Match' not in requests_headers[0]
+    assert requests_headers[1]['If-None-Match'] == '"v1"'
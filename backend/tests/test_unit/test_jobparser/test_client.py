@@ -0,0 +1,116 @@
+from aiohttp import web
+
+from jobparser import base, client
+from jobparser.base import BaseParser
+
+import asyncio
+import json
+import pytest
+
+
+class JsonParser(BaseParser):
+
+    base_url = 'https://fake.ru'
+    name = 'fake'
+
+
+@pytest.fixture
+def gzip_server(loop, aiohttp_server):
+    """Return server which answers with compressed json if client accepts it."""
+    async def make_server(data):
+        requests = []
+
+        async def handler(request):
+            requests.append(request)
+            response = web.json_response(data)
+            response.enable_compression()
+            return response
+
+        app = web.Application()
+        app.router.add_get('/', handler)
+        server = await aiohttp_server(app)
+        return (server, requests)
+    return make_server
+
+
+async def test_client_session_negotiates_compression(gzip_server):
+    data = {'items': [{'name': 'Вакансия {0}'.format(i)} for i in range(100)]}
+    server, requests = await gzip_server(data)
+
+    async with client.create_client_session() as session:
+        parser = JsonParser(session, {'parse_url': str(server.make_url('/'))})
+        result = await parser.get_json(parser.parse_url)
+
+    assert result == data
+    assert 'gzip' in requests[0].headers['Accept-Encoding']
+    assert parser.fetch_stats.requests == 1
+    assert parser.fetch_stats.errors == 0
+    assert parser.fetch_stats.bytes == len(json.dumps(data).encode())
+
+
+async def test_client_session_connector_limits(loop, mocker):
+    mocker.patch.dict(client.HTTP_CLIENT_CONFIG, {'limit': 10, 'limit_per_host': None})
+    parsers_config = {
+        'a': {'is_active': True, 'concurrency': 4},
+        'b': {'is_active': True, 'rate_limit': {'max_concurrency': 6}},
+        'c': {'is_active': False, 'concurrency': 20},
+    }
+
+    async with client.create_client_session(parsers_config) as session:
+        assert session.connector.limit == 10
+        assert session.connector.limit_per_host == 6
+
+
+async def test_concurrency_budget_is_shared_by_hosts(loop, aiohttp_server, mocker):
+    mocker.patch.dict(base.HTTP_CLIENT_CONFIG, {'concurrency_budget': 2})
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handler(request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_get('/', handler)
+    server = await aiohttp_server(app)
+    urls = [str(server.make_url('/')), str(server.make_url('/')).replace('127.0.0.1', 'localhost')]
+    config = {'parse_url': urls[0], 'rate_limit': {'min_concurrency': 4, 'max_concurrency': 4}}
+
+    async with client.create_client_session() as session:
+        parser = JsonParser(session, config)
+        await asyncio.gather(*[parser.get_json(urls[i % 2]) for i in range(8)])
+
+    assert max_in_flight == 2
+
+
+@pytest.mark.parametrize('name,expected', [
+    ('json', json.loads),
+    ('missing', json.loads),
+])
+def test_get_json_decoder(name, expected):
+    assert client.get_json_decoder(name) is expected
+
+
+def test_get_json_decoder_prefers_orjson():
+    orjson = pytest.importorskip('orjson')
+
+    assert client.get_json_decoder('orjson') is orjson.loads
+
+
+def test_fetch_stats():
+    stats = client.FetchStats()
+    for i in range(1, 11):
+        stats.response_received(i / 10, 100)
+    stats.request_failed(5)
+
+    assert stats.requests == 11
+    assert stats.errors == 1
+    assert stats.bytes == 1000
+    assert stats.get_latency_percentile(50) == 0.6
+    assert stats.get_latency_percentile(90) == 1.0
+    assert stats.get_latency_percentile(100) == 5
+    assert str(client.FetchStats()) == 'no requests'
@@ -0,0 +1,65 @@
+from jobparser import dedup
+
+import numpy as np
+import pytest
+
+
+VACANCY = {
+    'name': 'Продавец-консультант в магазин одежды',
+    'description': 'График 2/2, зарплата от 35000, ТЦ Броско Молл',
+}
+
+NEAR_DUPLICATE = {
+    'name': 'Продавец консультант (магазин одежды)',
+    'description': 'График 2/2, зарплата от 35 000 руб., ТЦ Броско Молл',
+}
+
+OTHER = {
+    'name': 'Водитель категории C',
+    'description': 'Грузоперевозки по городу, опыт от 3 лет',
+}
+
+
+def similarity(a, b):
+    return np.mean(np.array(a['minhash']) == np.array(b['minhash']))
+
+
+def test_normalize_text():
+    assert dedup.normalize_text('  Ёлка-Палка, (ООО) ') == 'елка палка ооо'
+    assert dedup.normalize_text(None) == ''
+
+
+def test_add_signatures_finds_near_duplicates():
+    vacancies = dedup.add_signatures([dict(VACANCY), dict(NEAR_DUPLICATE), dict(OTHER)])
+
+    assert similarity(vacancies[0], vacancies[1]) >= dedup.DEDUP_CONFIG['threshold']
+    assert similarity(vacancies[0], vacancies[2]) < 0.2
+    assert set(vacancies[0]['lsh_bands']) & set(vacancies[1]['lsh_bands'])
+    assert not set(vacancies[0]['lsh_bands']) & set(vacancies[2]['lsh_bands'])
+
+
+def test_add_signatures_is_stable_between_batches(mocker):
+    mocker.patch.dict(dedup.DEDUP_CONFIG, {'batch_size': 2})
+    single = dedup.add_signatures([dict(VACANCY)])[0]
+    batch = dedup.add_signatures([dict(OTHER), dict(NEAR_DUPLICATE), dict(VACANCY)])[2]
+
+    assert single['minhash'] == batch['minhash']
+    assert single['lsh_bands'] == batch['lsh_bands']
+
+
+def test_add_signatures_skips_empty_text():
+    vacancies = dedup.add_signatures([{'name': '--'}, {'name': 'IT'}])
+
+    assert vacancies[0]['minhash'] is None
+    assert vacancies[0]['lsh_bands'] is None
+    assert len(vacancies[1]['minhash']) == dedup.DEDUP_CONFIG['num_perm']
+    assert len(vacancies[1]['lsh_bands']) == dedup.DEDUP_CONFIG['bands']
+
+
+@pytest.mark.parametrize('text', ['a', 'abcdefghij'])
+def test_hash_shingles_offsets(text):
+    hashes, offsets = dedup.hash_shingles([text, text], shingle_size=5)
+
+    assert len(hashes) == 2 * max(1, len(text) - 4)
+    assert list(offsets) == [0, len(hashes) // 2]
+    assert list(hashes[:offsets[1]]) == list(hashes[offsets[1]:])
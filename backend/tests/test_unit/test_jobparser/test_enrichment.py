@@ -0,0 +1,101 @@
+from jobparser import enrichment
+from jobparser.base import BaseParser
+
+import asyncio
+from collections import namedtuple
+from unittest import mock
+
+import pytest
+
+
+Row = namedtuple('Row', ['id', 'source'])
+
+
+class EnrichedParser(BaseParser):
+
+    base_url = 'https://fake.ru'
+    name = 'fake'
+
+    supports_enrichment = True
+
+    def __init__(self, descriptions):
+        super().__init__(None, {'parse_url': self.base_url})
+        self.descriptions = descriptions
+
+    async def get_description(self, source):
+        await asyncio.sleep(0)
+        description = self.descriptions[source]
+        if isinstance(description, Exception):
+            raise description
+        return description
+
+
+class FakeEngine:
+
+    def acquire(self):
+        class Acquire:
+            async def __aenter__(self):
+                return mock.Mock()
+
+            async def __aexit__(self, *args):
+                pass
+
+        return Acquire()
+
+
+@pytest.fixture
+def mock_services(aio_patch, mocker):
+    mocker.patch.dict(enrichment.ENRICHMENT_CONFIG, {
+        'concurrency': 2,
+        'batch_size': 2,
+        'max_vacancies': 10,
+    })
+    get_rows = aio_patch('jobparser.enrichment.get_vacancies_to_enrich')
+    save = aio_patch('jobparser.enrichment.save_vacancies_descriptions')
+    save.side_effect = lambda conn, descriptions: len(descriptions)
+    return (get_rows, save)
+
+
+@pytest.mark.parametrize('markup, expected', [
+    ('<p>Разработка&nbsp;API</p>\n<ul><li>Python</li></ul>', 'Разработка API Python'),
+    ('<p></p>', None),
+    (None, None),
+])
+def test_html_to_text(markup, expected):
+    assert enrichment.html_to_text(markup) == expected
+
+
+def test_html_to_text_is_cut_to_max_length():
+    text = enrichment.html_to_text('слово ' * 100, max_length=20)
+
+    assert len(text) == 20
+    assert text.endswith('…')
+
+
+async def test_enrich_parser_vacancies_saves_by_batches(loop, mock_services):
+    get_rows, save = mock_services
+    rows = [Row(i, 'https://fake.ru/{0}'.format(i)) for i in range(1, 6)]
+    get_rows.return_value = rows
+    descriptions = {row.source: '<b>{0}</b>'.format(row.id) for row in rows}
+    descriptions[rows[1].source] = RuntimeError('down')
+    parser = EnrichedParser(descriptions)
+
+    enriched = await enrichment.enrich_parser_vacancies(parser, FakeEngine(), min_id=0)
+
+    assert enriched == 4
+    assert [len(c.args[1]) for c in save.await_args_list] == [2, 2, 0]
+    saved = {k: v for c in save.await_args_list for k, v in c.args[1].items()}
+    assert saved == {1: '1', 3: '3', 4: '4', 5: '5'}
+    assert get_rows.await_args.args[1:] == ('fake', 0, 10, 0, 1, 'khabarovsk')
+
+
+async def test_enrich_parser_vacancies_after_deadline(loop, mock_services):
+    get_rows, save = mock_services
+    get_rows.return_value = [Row(1, 'https://fake.ru/1')]
+    parser = EnrichedParser({'https://fake.ru/1': 'text'})
+
+    enriched = await enrichment.enrich_parser_vacancies(
+        parser, FakeEngine(), min_id=0, deadline=loop.time() - 1,
+    )
+
+    assert enriched == 0
@@ -0,0 +1,84 @@
+from jobparser import extractors
+from jobparser.parsers import FarpostParser
+
+import pytest
+from pathlib import Path
+
+
+FARPOST_PAGE = Path(__file__).parent.joinpath('data', 'farpost_page.html').read_text()
+
+BASE_URL = 'https://www.farpost.ru'
+
+
+@pytest.fixture(scope='module', autouse=True)
+def process_pool():
+    yield
+    extractors.shutdown_process_pool()
+
+
+@pytest.mark.parametrize('extractor_name', ['lxml', 'bs4'])
+def test_extract_farpost_vacancies(extractor_name):
+    extractor = extractors.FARPOST_EXTRACTORS[extractor_name]
+
+    vacancies, has_next_page = extractor(FARPOST_PAGE, BASE_URL, 'farpost')
+
+    assert not has_next_page
+    assert len(vacancies) == 5
+    assert vacancies[0] == {
+        'name': 'Вакансия номер 1000',
+        'source': BASE_URL + '/khabarovsk/job/vacancy/vakansija-1000.html',
+        'source_name': 'farpost',
+    }
+
+
+@pytest.mark.parametrize('extractor_name', ['lxml', 'bs4'])
+def test_extract_farpost_vacancies_has_next_page(extractor_name):
+    extractor = extractors.FARPOST_EXTRACTORS[extractor_name]
+    markup = FARPOST_PAGE.replace('вчера, 18:40', 'сегодня, 08:00')
+
+    vacancies, has_next_page = extractor(markup, BASE_URL, 'farpost')
+
+    assert has_next_page
+    assert len(vacancies) == 6
+
+
+@pytest.mark.parametrize('extractor_name', ['lxml', 'bs4'])
+def test_extract_farpost_vacancies_empty_page(extractor_name):
+    extractor = extractors.FARPOST_EXTRACTORS[extractor_name]
+
+    assert extractor('<html><body></body></html>', BASE_URL, 'farpost') == ([], False)
+
+
+async def test_farpost_parser_extracts_in_process_pool(loop):
+    parser = FarpostParser(None, {'parse_url': BASE_URL, 'extract_in_process': True})
+
+    vacancies, has_next_page = await parser.extract_vacancies(FARPOST_PAGE)
+
+    assert len(vacancies) == 5
+    assert not has_next_page
+
+
+async def test_farpost_parser_falls_back_to_bs4(loop, mocker):
+    def broken_extractor(*args):
+        raise ValueError('unexpected markup')
+
+    mocker.patch.dict(extractors.FARPOST_EXTRACTORS, {'lxml': broken_extractor})
+    parser = FarpostParser(None, {'parse_url': BASE_URL, 'extract_in_process': False})
+
+    vacancies, has_next_page = await parser.extract_vacancies(FARPOST_PAGE)
+
+    assert len(vacancies) == 5
+    assert not has_next_page
+
+
+async def test_farpost_parser_loads_pages_of_region(loop):
+    parser = FarpostParser(None, {
+        'parse_url': BASE_URL + '/{path}/job/vacancy',
+        'region': {'name': 'vladivostok', 'path': 'vladivostok'},
+        'extract_in_process': False,
+    })
+
+    vacancies, _ = await parser.extract_vacancies(FARPOST_PAGE)
+
+    assert parser.get_page_url(2) == BASE_URL + '/vladivostok/job/vacancy/?page=2'
+    assert {v['region'] for v in vacancies} == {'vladivostok'}
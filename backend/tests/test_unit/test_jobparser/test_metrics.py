@@ -0,0 +1,60 @@
+from jobparser.metrics import format_prometheus_metrics, write_prometheus_textfile
+
+from datetime import datetime, timedelta, timezone
+
+
+STARTED_AT = datetime(2021, 9, 1, 12, tzinfo=timezone.utc)
+
+RUN = {
+    'parser_name': 'hh',
+    'started_at': STARTED_AT,
+    'finished_at': STARTED_AT + timedelta(seconds=30),
+    'pages': 2,
+    'requests': 3,
+    'http_errors': 1,
+    'bytes': 2048,
+    'latency_p50': 0.1,
+    'latency_p90': 0.5,
+    'latency_p99': None,
+    'created': 10,
+    'updated': 5,
+    'skipped': 1,
+    'duplicates': 0,
+    'enriched': 4,
+    'rejected': 2,
+    'error': "RuntimeError('down')",
+    'is_truncated': False,
+}
+
+
+def test_format_prometheus_metrics():
+    lines = format_prometheus_metrics([RUN]).splitlines()
+
+    assert '# TYPE khabjob_ingestion_pages gauge' in lines
+    assert 'khabjob_ingestion_duration_seconds{parser="hh"} 30.0' in lines
+    assert 'khabjob_ingestion_response_bytes{parser="hh"} 2048' in lines
+    assert 'khabjob_ingestion_failed{parser="hh"} 1' in lines
+    assert 'khabjob_ingestion_fetch_latency_seconds{parser="hh",quantile="0.9"} 0.5' in lines
+    assert 'khabjob_ingestion_vacancies{parser="hh",result="created"} 10' in lines
+    assert 'khabjob_ingestion_vacancies{parser="hh",result="enriched"} 4' in lines
+    assert 'khabjob_ingestion_vacancies{parser="hh",result="rejected"} 2' in lines
+    assert not any('quantile="0.99"' in line for line in lines)
+
+
+def test_format_prometheus_metrics_with_region():
+    lines = format_prometheus_metrics([dict(RUN, region='vladivostok')]).splitlines()
+
+    assert 'khabjob_ingestion_pages{parser="hh",region="vladivostok"} 2' in lines
+    assert (
+        'khabjob_ingestion_vacancies{parser="hh",region="vladivostok",result="created"} 10'
+    ) in lines
+
+
+def test_write_prometheus_textfile(tmp_path):
+    path = tmp_path.joinpath('khabjob.prom')
+
+    write_prometheus_textfile(path, [RUN, dict(RUN, parser_name='vk', error=None)])
+
+    content = path.read_text()
+    assert 'khabjob_ingestion_failed{parser="vk"} 0' in content
+    assert list(tmp_path.iterdir()) == [path]
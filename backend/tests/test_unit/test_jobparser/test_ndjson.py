@@ -0,0 +1,81 @@
+from jobparser import ndjson
+from jobparser.base import BaseParser
+
+import asyncio
+import gzip
+import io
+
+import pytest
+
+
+VACANCIES = [
+    {'name': 'Программист', 'source': 'https://fake.ru/1', 'source_name': 'fake'},
+    {'name': 'Тестировщик', 'source': 'https://fake.ru/2', 'source_name': 'fake'},
+    {'name': 'Аналитик', 'source': 'https://fake.ru/3', 'source_name': 'fake'},
+]
+
+
+class FakeParser(BaseParser):
+
+    base_url = 'https://fake.ru'
+    name = 'fake'
+
+    def __init__(self, pages, error=None):
+        super().__init__(None, {'parse_url': self.base_url})
+        self.pages = pages
+        self.error = error
+
+    async def iter_vacancies(self):
+        for page in self.pages:
+            await asyncio.sleep(0)
+            yield page
+        if self.error is not None:
+            raise self.error
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_dump_is_read_back_by_pages(tmp_path, compress):
+    path = str(tmp_path.joinpath('vacancies.ndjson'))
+
+    with ndjson.open_dump_output(path, compress) as dump:
+        assert ndjson.write_vacancies_dump(dump, [VACANCIES]) == 3
+    with ndjson.open_dump_input(path) as dump:
+        pages = list(ndjson.read_dump_pages(dump, page_size=2))
+
+    assert pages == [VACANCIES[:2], VACANCIES[2:]]
+
+
+def test_dump_with_gz_extension_is_compressed(tmp_path):
+    path = tmp_path.joinpath('vacancies.ndjson.gz')
+
+    with ndjson.open_dump_output(str(path)) as dump:
+        ndjson.write_vacancies_dump(dump, [VACANCIES])
+
+    lines = gzip.decompress(path.read_bytes()).splitlines()
+    assert len(lines) == 3
+    assert 'Программист'.encode() in lines[0]
+
+
+async def test_dump_parsers_vacancies_writes_pages_of_all_parsers(loop, mocker):
+    output = io.BytesIO()
+    parsers = [FakeParser([VACANCIES[:2], VACANCIES[2:]])]
+    mocker.patch.object(ndjson, 'get_active_parsers', return_value=parsers)
+
+    counts = await ndjson.dump_parsers_vacancies(output, ['fake'])
+
+    assert counts == {'fake': 3}
+    output.seek(0)
+    assert list(ndjson.read_dump_pages(output, page_size=10)) == [VACANCIES]
+
+
+async def test_dump_parsers_vacancies_writes_all_pages_on_parser_error(loop, mocker):
+    output = io.BytesIO()
+    parsers = [FakeParser([VACANCIES[:1]], error=RuntimeError('Source is down')),
+               FakeParser([VACANCIES[1:]])]
+    mocker.patch.object(ndjson, 'get_active_parsers', return_value=parsers)
+
+    with pytest.raises(RuntimeError):
+        await ndjson.dump_parsers_vacancies(output)
+
+    output.seek(0)
+    assert len(list(ndjson.read_dump_pages(output, page_size=10))[0]) == 3
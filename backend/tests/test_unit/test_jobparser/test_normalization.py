@@ -0,0 +1,55 @@
+from jobparser import normalization
+
+import pytest
+
+
+def make_vacancy(**fields):
+    return dict({'name': 'Job', 'source': 'https://hh.ru/vacancy/1', 'source_name': 'hh'}, **fields)
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://hh.ru/vacancy/1?from=main&utm_source=vk#top', 'https://hh.ru/vacancy/1'),
+    ('HTTPS://VK.com/wall-1_2?w=wall&utm_medium=feed', 'https://vk.com/wall-1_2?w=wall'),
+    (' https://farpost.ru/job?ref=x&page=2 ', 'https://farpost.ru/job?page=2'),
+])
+def test_canonicalize_url(url, expected):
+    assert normalization.canonicalize_url(url) == expected
+
+
+@pytest.mark.parametrize('text, max_length, expected', [
+    ('  Python \n developer ', 100, 'Python developer'),
+    ('слово ' * 10, 10, 'слово сло…'),
+    ('  ', 10, None),
+    (None, 10, None),
+])
+def test_clamp_text(text, max_length, expected):
+    assert normalization.clamp_text(text, max_length) == expected
+
+
+def test_normalize_vacancies():
+    long_name = 'Требуется ' * 100
+    vacancies = [
+        make_vacancy(name=long_name, source='https://vk.com/wall1_1?utm_source=x', source_name='vk'),
+        make_vacancy(description='  text  ', source='https://hh.ru/vacancy/2'),
+        make_vacancy(name='\n'),
+        make_vacancy(source='/vacancy/3'),
+        make_vacancy(source='https://hh.ru/' + 'x' * 300),
+        make_vacancy(source_name='superjob_khabarovsk'),
+        make_vacancy(source=None),
+    ]
+
+    normalized, rejects = normalization.normalize_vacancies(vacancies)
+
+    assert len(normalized[0]['name']) == normalization.NAME_MAX_LENGTH
+    assert normalized[0]['source'] == 'https://vk.com/wall1_1'
+    assert normalized[1]['description'] == 'text'
+    assert 'description' not in normalized[0]
+    assert [r.reason for r in rejects] == [
+        'empty name',
+        'source is not http url',
+        'source is longer than 264',
+        'source_name is longer than 16',
+        'empty source',
+    ]
+    assert rejects[0].vacancy is vacancies[2]
+    assert vacancies[0]['name'] == long_name
@@ -0,0 +1,251 @@
+from jobparser.base import ParserConfigError
+from jobparser.parsers import HHParser, SuperjobParser, VkParser
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+
+
+NOW = datetime(2021, 9, 1, 12, tzinfo=timezone.utc)
+
+
+def make_hh_page(page, found, per_page=HHParser.per_page):
+    """Return page of hh.ru response, every next vacancy is one minute older."""
+    return {
+        'page': page,
+        'found': found,
+        'items': [
+            {
+                'name': 'job',
+                'alternate_url': 'https://hh.ru/vacancy/{0}_{1}'.format(page, i),
+                'published_at': (
+                    NOW - timedelta(minutes=page * per_page + i)
+                ).strftime('%Y-%m-%dT%H:%M:%S%z'),
+            }
+            for i in range(min(per_page, found - page * per_page))
+        ],
+    }
+
+
+def make_superjob_page(page, total, per_page=SuperjobParser.per_page):
+    count = min(per_page, total - page * per_page)
+    return {
+        'more': (page + 1) * per_page < total,
+        'total': total,
+        'objects': [
+            {
+                'profession': 'job',
+                'link': 'https://superjob.ru/{0}_{1}'.format(page, i),
+                'date_published': int(NOW.timestamp()) - page * per_page - i,
+            }
+            for i in range(count)
+        ],
+    }
+
+
+@pytest.fixture
+def hh_parser(mocker):
+    parser = HHParser(None, {'parse_url': 'https://api.hh.ru/vacancies/', 'concurrency': 2})
+    parser.found = 150
+
+    async def get_json(url, params):
+        await asyncio.sleep(0.01)
+        return make_hh_page(params['page'], parser.found)
+
+    mocker.patch.object(parser, 'get_json', side_effect=get_json)
+    return parser
+
+
+async def test_parser_hh_loads_all_pages(loop, hh_parser):
+    vacancies = await hh_parser.get_vacancies()
+
+    assert len(vacancies) == 150
+    assert sorted(c.kwargs['params']['page'] for c in hh_parser.get_json.call_args_list) == [0, 1]
+
+
+async def test_parser_hh_is_rerunnable(loop, hh_parser):
+    first_run = await hh_parser.get_vacancies()
+    second_run = await hh_parser.get_vacancies()
+
+    assert sorted(v['source'] for v in first_run) == sorted(v['source'] for v in second_run)
+    pages = [c.kwargs['params']['page'] for c in hh_parser.get_json.call_args_list]
+    assert sorted(pages) == [0, 0, 1, 1]
+
+
+async def test_parser_hh_respects_parse_day_limit(loop, hh_parser):
+    hh_parser.found = 1000
+
+    await hh_parser.get_vacancies()
+
+    assert hh_parser.get_json.call_count == HHParser.parse_day_limit // HHParser.per_page
+
+
+async def test_parser_superjob_parse_day_limit_is_exact(loop, mocker):
+    parser = SuperjobParser(None, {'parse_url': 'https://api.superjob.ru', 'v': '2.33'})
+    parser.parse_day_limit = 150
+    mocker.patch.object(
+        parser,
+        'get_json',
+        side_effect=lambda url, params, headers: make_superjob_page(params['page'], 1000),
+    )
+
+    vacancies = await parser.get_vacancies()
+
+    assert len(vacancies) == 150
+    assert parser.get_json.call_count == 2
+
+
+async def test_parser_hh_stops_on_known_vacancies(loop, hh_parser):
+    hh_parser.found = 1000
+    hh_parser.parse_day_limit = 1000
+    hh_parser.checkpoint = NOW - timedelta(minutes=150)
+
+    vacancies = await hh_parser.get_vacancies()
+
+    params = [c.kwargs['params'] for c in hh_parser.get_json.call_args_list]
+    assert len(vacancies) == 150
+    assert hh_parser.high_water_mark == NOW
+    assert all(p['date_from'] == hh_parser.checkpoint.isoformat() for p in params)
+    # Only pages already started when known vacancies were found are loaded
+    assert max(p['page'] for p in params) <= 2 * hh_parser.config['concurrency']
+
+
+async def test_parser_hh_without_checkpoint_requests_last_day(loop, hh_parser):
+    await hh_parser.get_vacancies()
+
+    params = hh_parser.get_json.call_args_list[0].kwargs['params']
+    assert params['period'] == 1
+    assert 'date_from' not in params
+    assert hh_parser.high_water_mark == NOW
+
+
+async def test_parser_hh_requests_area_of_region(loop, mocker):
+    parser = HHParser(None, {
+        'parse_url': 'https://api.hh.ru/vacancies/',
+        'region': {'name': 'vladivostok', 'area': 22},
+    })
+    mocker.patch.object(parser, 'get_json', return_value=make_hh_page(0, 2))
+
+    vacancies = await parser.get_vacancies()
+
+    params = parser.get_json.call_args.kwargs['params']
+    assert params['area'] == 22
+    assert 'text' not in params
+    assert {v['region'] for v in vacancies} == {'vladivostok'}
+
+
+async def test_parser_vk_searches_query_of_region(loop, mocker):
+    parser = VkParser(None, {
+        'parse_url': 'https://api.vk.com/method/newsfeed.search',
+        'region': {'name': 'vladivostok', 'query': '#РаботаВладивосток'},
+    })
+    post = {'text': 'Job', 'owner_id': 1, 'id': 1, 'date': int(NOW.timestamp())}
+    mocker.patch.object(parser, 'get_json', return_value={'response': {'items': [post]}})
+
+    vacancies = await parser.get_vacancies()
+
+    assert parser.get_json.call_args.kwargs['params']['q'] == '#РаботаВладивосток'
+    assert vacancies[0]['region'] == 'vladivostok'
+
+
+async def test_parser_vk_requests_from_checkpoint(loop, mocker):
+    parser = VkParser(None, {'parse_url': 'https://api.vk.com/method/newsfeed.search'})
+    parser.checkpoint = NOW - timedelta(hours=1)
+    posts = [
+        {'text': 'Job {0}\ntext'.format(i), 'owner_id': 1, 'id': i,
+         'date': int((NOW - timedelta(minutes=30 * i)).timestamp())}
+        for i in range(4)
+    ]
+    mocker.patch.object(parser, 'get_json', return_value={'response': {'items': posts}})
+
+    vacancies = await parser.get_vacancies()
+
+    params = parser.get_json.call_args.kwargs['params']
+    assert params['start_time'] == int(parser.checkpoint.timestamp())
+    assert [v['name'] for v in vacancies] == ['Job 0', 'Job 1']
+    assert parser.high_water_mark == NOW
+
+
+async def test_parser_hh_get_description(loop, mocker):
+    parser = HHParser(None, {'parse_url': 'https://api.hh.ru/vacancies/'})
+    mocker.patch.object(parser, 'get_json', return_value={'description': '<p>text</p>'})
+
+    description = await parser.get_description('https://hh.ru/vacancy/12345')
+
+    assert description == '<p>text</p>'
+    parser.get_json.assert_awaited_once_with('https://api.hh.ru/vacancies/12345')
+
+
+async def test_parser_superjob_get_description(loop, mocker):
+    parser = SuperjobParser(None, {'parse_url': 'https://api.superjob.ru', 'v': '2.33'})
+    mocker.patch.object(parser, 'get_json', return_value={'vacancyRichText': '<p>text</p>'})
+
+    description = await parser.get_description(
+        'https://khabarovsk.superjob.ru/vakansii/programmist-12345.html'
+    )
+
+    assert description == '<p>text</p>'
+    assert parser.get_json.await_args.args[0] == 'https://api.superjob.ru/2.33/vacancies/12345/'
+
+
+async def test_parser_get_description_of_unknown_source(loop):
+    parser = HHParser(None, {'parse_url': 'https://api.hh.ru/vacancies/'})
+
+    assert await parser.get_description('https://hh.ru/employer/1') is None
+
+
+def test_parser_vk_name_of_one_line_post():
+    parser = VkParser(None, {'parse_url': 'https://api.vk.com/method/newsfeed.search'})
+    data = {'response': {'items': [
+        {'text': 'Водитель', 'owner_id': 1, 'id': 1},
+        {'text': 'Повар\nГрафик 2/2', 'owner_id': 1, 'id': 2},
+    ]}}
+
+    assert [v['name'] for v in parser.extract_vacancies(data)] == ['Водитель', 'Повар']
+
+
+def test_parser_hh_extract_archived():
+    parser = HHParser(None, {'parse_url': 'https://api.hh.ru/vacancies/'})
+    page = {'items': [{'name': 'Job', 'alternate_url': 'https://hh.ru/vacancy/1'}]}
+
+    vacancies = parser.extract_archived(json.dumps(page).encode(), 'utf-8')
+
+    assert vacancies == [{
+        'name': 'Job',
+        'source': 'https://hh.ru/vacancy/1',
+        'source_name': 'hh',
+        'region': 'khabarovsk',
+    }]
+    assert parser.extract_archived(b'{"description": "text"}', 'utf-8') is None
+
+
+def test_parser_vk_filters_posts():
+    parser = VkParser(None, {
+        'parse_url': 'https://api.vk.com/method/newsfeed.search',
+        'posts_filter': {
+            'block_reposts': True,
+            'block': {'resume': ['ищу работу'], 'ads': ['#реклама']},
+            'allow': {'vacancy': ['требуется']},
+        },
+    })
+    data = {'response': {'items': [
+        {'text': 'Ищу работу водителем', 'owner_id': 1, 'id': 1},
+        {'text': 'Требуется повар\nИщу работу не предлагать', 'owner_id': 1, 'id': 2},
+        {'text': '#реклама', 'owner_id': 1, 'id': 3},
+        {'text': 'Водитель', 'owner_id': 1, 'id': 4, 'copy_history': [{'id': 5}]},
+        {'text': 'Продавец', 'owner_id': 1, 'id': 6},
+    ]}}
+
+    vacancies = parser.extract_vacancies(data)
+
+    assert [v['name'] for v in vacancies] == ['Требуется повар', 'Продавец']
+    assert parser.filter_counts == {'resume': 2, 'vacancy': 1, 'ads': 1, 'repost': 1}
+
+
+def test_parser_vk_invalid_posts_filter():
+    with pytest.raises(ParserConfigError):
+        VkParser(None, {
+            'parse_url': 'https://api.vk.com/method/newsfeed.search',
+            'posts_filter': {'block': {'vacancy': ['']}},
+        })
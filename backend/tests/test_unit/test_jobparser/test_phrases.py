@@ -0,0 +1,64 @@
+from jobparser.phrases import PhraseFilter, get_phrase_filter
+
+import pytest
+
+
+@pytest.fixture
+def phrase_filter():
+    return PhraseFilter(
+        block={'resume': ['#резюме', 'ищу работу'], 'ads': ['реклама']},
+        allow={'vacancy': ['требуется', 'ищу работу в команду']},
+    )
+
+
+def test_phrase_filter_match_page(phrase_filter):
+    texts = [
+        'Ищу работу водителем',
+        '#резюме\nИщу работу, опыт 5 лет',
+        'Требуется повар. Реклама',
+        'Рекламации не принимаем',
+        '',
+        'Ищу работу в команду разработчиков',
+    ]
+
+    assert phrase_filter.match_page(texts) == [
+        {'resume'},
+        {'resume'},
+        {'vacancy', 'ads'},
+        set(),
+        set(),
+        {'vacancy'},
+    ]
+
+
+def test_phrase_filter_matches_do_not_cross_texts(phrase_filter):
+    assert phrase_filter.match_page(['ищу', 'работу']) == [set(), set()]
+    assert phrase_filter.match_page([]) == []
+
+
+def test_phrase_filter_filter_page(phrase_filter):
+    texts = ['Ищу работу', 'Требуется повар, #резюме на почту', 'Повар', 'реклама, реклама']
+
+    kept, counts = phrase_filter.filter_page(texts)
+
+    assert kept == [False, True, True, False]
+    assert counts == {'resume': 2, 'vacancy': 1, 'ads': 1}
+
+
+@pytest.mark.parametrize('block, allow', [
+    ({'resume': ['резюме']}, {'resume': ['вакансия']}),
+    ({'resume': ['  ']}, None),
+    ({'resume': ['a\x00b']}, None),
+])
+def test_phrase_filter_invalid_rules(block, allow):
+    with pytest.raises(ValueError):
+        PhraseFilter(block, allow)
+
+
+def test_get_phrase_filter():
+    assert get_phrase_filter(None) is None
+    assert get_phrase_filter({'block_reposts': True}) is None
+
+    phrase_filter = get_phrase_filter({'allow': {'vacancy': ['вакансия']}})
+
+    assert phrase_filter.filter_page(['Вакансия', 'Пост']) == ([True, True], {'vacancy': 1})
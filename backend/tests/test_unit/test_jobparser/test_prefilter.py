@@ -0,0 +1,54 @@
+from jobparser import prefilter
+
+from unittest import mock
+
+
+VACANCIES = [
+    {'name': 'Python developer', 'source': 'https://hh.ru/vacancy/1', 'source_name': 'hh'},
+    {'name': 'Driver', 'source': 'https://hh.ru/vacancy/2', 'source_name': 'hh'},
+    {'name': 'Seller', 'source': 'https://hh.ru/vacancy/3', 'source_name': 'hh'},
+]
+
+
+def test_get_source_key_is_stable_64_bit():
+    key = prefilter.get_source_key(VACANCIES[0]['source'])
+
+    assert key == prefilter.get_source_key(VACANCIES[0]['source'])
+    assert key != prefilter.get_source_key(VACANCIES[1]['source'])
+    assert 0 <= key < 2 ** 64
+
+
+def test_known_vacancies_split():
+    known = prefilter.KnownVacancies()
+    known.add(VACANCIES[:2])
+    changed = dict(VACANCIES[1], name='Truck driver')
+
+    touch, upsert = known.split([VACANCIES[0], changed, VACANCIES[2]])
+
+    assert len(known) == 2
+    assert touch == [VACANCIES[0]['source']]
+    assert upsert == [changed, VACANCIES[2]]
+
+
+def test_known_vacancies_add_changed():
+    known = prefilter.KnownVacancies()
+    changed = dict(VACANCIES[0], name='Senior Python developer')
+    known.add(VACANCIES[:1])
+    known.add([changed])
+
+    assert known.split([VACANCIES[0], changed]) == ([changed['source']], [VACANCIES[0]])
+
+
+async def test_load_known_vacancies(loop, aio_patch):
+    get_hashes = aio_patch('jobparser.prefilter.get_recent_content_hashes')
+    get_hashes.return_value = [
+        (v['source'], prefilter.get_content_hash(v)) for v in VACANCIES[:2]
+    ]
+    engine = mock.MagicMock()
+    engine.acquire.return_value.__aenter__.return_value = mock.Mock()
+
+    known = await prefilter.load_known_vacancies(engine, days=3)
+
+    assert known.split(VACANCIES) == (
+        [v['source'] for v in VACANCIES[:2]], VACANCIES[2:],
+    )
@@ -0,0 +1,73 @@
+from jobparser import regions
+
+import pytest
+
+
+HH_REGIONS = [
+    {'name': 'khabarovsk', 'area': 102},
+    {'name': 'vladivostok', 'area': 22},
+]
+
+
+def make_config(**options):
+    return dict({'parse_url': 'https://fake.ru', 'is_active': True}, **options)
+
+
+def test_get_region_configs_of_listed_regions():
+    configs = regions.get_region_configs(
+        make_config(regions=HH_REGIONS),
+        ['khabarovsk', 'vladivostok'],
+    )
+
+    assert [c['region']['name'] for c in configs] == ['khabarovsk', 'vladivostok']
+    assert all('regions' not in c for c in configs)
+
+
+def test_get_region_configs_without_regions():
+    config = make_config()
+
+    assert regions.get_region_configs(config) == [config]
+
+
+def test_get_parser_units_interleaves_parsers():
+    units = regions.get_parser_units(
+        parsers_config={
+            'hh': make_config(regions=HH_REGIONS),
+            'vk': make_config(regions=[{'name': 'khabarovsk'}, {'name': 'vladivostok'}]),
+            'farpost': make_config(),
+            'superjob': make_config(is_active=False),
+        },
+        regions=['khabarovsk', 'vladivostok'],
+    )
+
+    assert [(u.parser_name, u.region) for u in units] == [
+        ('hh', 'khabarovsk'),
+        ('vk', 'khabarovsk'),
+        ('farpost', regions.DEFAULT_REGION),
+        ('hh', 'vladivostok'),
+        ('vk', 'vladivostok'),
+    ]
+
+
+def test_get_parser_units_of_passed_parsers():
+    units = regions.get_parser_units(
+        ['vk'],
+        parsers_config={'hh': make_config(), 'vk': make_config()},
+    )
+
+    assert [u.parser_name for u in units] == ['vk']
+
+
+@pytest.mark.parametrize('region,expected', [
+    ('vladivostok', {'name': 'vladivostok', 'area': 22}),
+    ('magadan', {'name': 'magadan'}),
+])
+def test_get_region_config(region, expected):
+    config = regions.get_region_config(make_config(regions=HH_REGIONS), region)
+
+    assert config['region'] == expected
+    assert 'regions' not in config
+
+
+def test_get_region_config_of_response_without_region():
+    assert 'region' not in regions.get_region_config(make_config(regions=HH_REGIONS), None)
@@ -0,0 +1,58 @@
+from jobparser import registry
+from jobparser.base import BaseParser, ParserConfigError
+from jobparser.parsers import HHParser
+
+import subprocess
+import sys
+
+import pytest
+
+
+class PluginParser(BaseParser):
+
+    base_url = 'https://plugin.ru'
+    name = 'plugin'
+
+
+class FakeEntryPoint:
+
+    name = 'plugin'
+    value = '{0}:PluginParser'.format(__name__)
+
+
+def test_get_parser_class_imports_builtin_parser():
+    assert registry.get_parser_class('hh') is HHParser
+
+
+@pytest.mark.parametrize('path', [
+    '{0}:PluginParser'.format(__name__),
+    '{0}.PluginParser'.format(__name__),
+])
+def test_get_parser_class_from_config(path):
+    assert registry.get_parser_class('hh', {'class': path}) is PluginParser
+
+
+def test_get_parser_class_from_entry_point(mocker):
+    mocker.patch.object(registry, 'get_entry_points', return_value={'plugin': FakeEntryPoint()})
+
+    assert registry.get_parser_class('plugin') is PluginParser
+
+
+@pytest.mark.parametrize('parser_name, config', [
+    ('unknown', None),
+    ('hh', {'class': 'jobparser.parsers:UnknownParser'}),
+    ('hh', {'class': 'jobparser.unknown:HHParser'}),
+])
+def test_get_parser_class_raises_error(mocker, parser_name, config):
+    mocker.patch.object(registry, 'get_entry_points', return_value={})
+
+    with pytest.raises(ParserConfigError):
+        registry.get_parser_class(parser_name, config)
+
+
+def test_parsers_modules_are_not_imported_with_utils():
+    code = 'import sys, jobparser.utils; print(" ".join(sorted(sys.modules)))'
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+
+    modules = set(result.stdout.split())
+    assert not modules & {'jobparser.parsers', 'jobparser.extractors', 'bs4', 'lxml'}
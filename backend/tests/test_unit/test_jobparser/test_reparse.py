@@ -0,0 +1,57 @@
+from jobparser import reparse
+from jobparser.archive import ResponseArchive
+from jobparser.parsers import HHParser
+
+import io
+import json
+
+import pytest
+
+
+def make_hh_page(ids):
+    return json.dumps({
+        'items': [
+            {'name': 'Job {0}'.format(i), 'alternate_url': 'https://hh.ru/vacancy/{0}'.format(i)}
+            for i in ids
+        ],
+    }).encode()
+
+
+@pytest.fixture
+def hh_archive(tmp_path, mocker):
+    mocker.patch.dict(reparse.PARSERS_CONFIG, {
+        'hh': {'parse_url': 'https://api.hh.ru/vacancies', 'is_active': False},
+    })
+    response_archive = ResponseArchive(tmp_path)
+    for page in ([1, 2], [3], [1, 2]):
+        response_archive.write('hh', 'https://api.hh.ru/vacancies', {}, make_hh_page(page), 'utf-8')
+    response_archive.write('hh', 'https://api.hh.ru/vacancies/1', {}, b'{"description": ""}', 'utf-8')
+    return response_archive
+
+
+def test_plan_chunks_skips_the_same_bodies(hh_archive):
+    chunks = reparse.plan_chunks(hh_archive, chunk_size=2)
+
+    assert [len(chunk.entries) for chunk in chunks] == [2, 1]
+    assert all(chunk.parser_class is HHParser for chunk in chunks)
+    assert reparse.plan_chunks(hh_archive, parsers=['vk']) == []
+
+
+def test_extract_chunk(hh_archive):
+    chunk, = reparse.plan_chunks(hh_archive)
+
+    vacancies = reparse.extract_chunk(chunk)
+
+    assert [v['source'] for v in vacancies] == [
+        'https://hh.ru/vacancy/{0}'.format(i) for i in (1, 2, 3)
+    ]
+
+
+async def test_reparse_archive_to_dump(loop, hh_archive):
+    output = io.BytesIO()
+
+    count = await reparse.reparse_archive_to_dump(hh_archive, output, workers=2)
+
+    names = sorted(json.loads(line)['name'] for line in output.getvalue().splitlines())
+    assert count == 3
+    assert names == ['Job 1', 'Job 2', 'Job 3']
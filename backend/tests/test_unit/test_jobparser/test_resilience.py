@@ -0,0 +1,110 @@
+from aiohttp import web, ClientSession, ClientResponseError
+
+from jobparser.base import BaseParser
+from jobparser.resilience import CircuitBreaker, SourceUnavailableError, get_backoff_delay
+
+import asyncio
+import pytest
+
+
+class JsonParser(BaseParser):
+
+    base_url = 'https://fake.ru'
+    name = 'fake'
+
+
+@pytest.fixture
+def flaky_server(loop, aiohttp_server):
+    """Return server which answers with passed statuses, then with 200."""
+    async def make_server(statuses, delay=0):
+        statuses = list(statuses)
+        requests = []
+
+        async def handler(request):
+            requests.append(request)
+            await asyncio.sleep(delay)
+            if statuses:
+                return web.Response(status=statuses.pop(0))
+            return web.json_response({'ok': True})
+
+        app = web.Application()
+        app.router.add_get('/', handler)
+        server = await aiohttp_server(app)
+        return (server, requests)
+    return make_server
+
+
+def make_config(server, **options):
+    config = {
+        'parse_url': str(server.make_url('/')),
+        'retry': {'attempts': 3, 'backoff': 0.01, 'max_backoff': 0.01},
+    }
+    config.update(options)
+    return config
+
+
+async def test_request_retries_temporary_errors(flaky_server):
+    server, requests = await flaky_server([503, 502])
+
+    async with ClientSession() as session:
+        parser = JsonParser(session, make_config(server))
+        data = await parser.get_json(parser.parse_url)
+
+    assert data == {'ok': True}
+    assert len(requests) == 3
+
+
+async def test_request_does_not_retry_client_errors(flaky_server):
+    server, requests = await flaky_server([404])
+
+    async with ClientSession() as session:
+        parser = JsonParser(session, make_config(server))
+        with pytest.raises(ClientResponseError):
+            await parser.get_json(parser.parse_url)
+
+    assert len(requests) == 1
+
+
+async def test_request_timeout_is_retried(flaky_server):
+    server, requests = await flaky_server([], delay=0.5)
+
+    async with ClientSession() as session:
+        parser = JsonParser(session, make_config(server, timeout={'total': 0.1}))
+        with pytest.raises(asyncio.TimeoutError):
+            await parser.get_json(parser.parse_url)
+
+    assert len(requests) == 3
+
+
+async def test_circuit_breaker_stops_requests(flaky_server):
+    server, requests = await flaky_server([503] * 10)
+    config = make_config(server, circuit_breaker={'failures': 4, 'reset_timeout': 60})
+
+    async with ClientSession() as session:
+        parser = JsonParser(session, config)
+        with pytest.raises(ClientResponseError):
+            await parser.get_json(parser.parse_url)
+        with pytest.raises(SourceUnavailableError):
+            await parser.get_json(parser.parse_url)
+
+    assert len(requests) == 4
+
+
+def test_circuit_breaker_half_open_after_reset_timeout(mocker):
+    monotonic = mocker.patch('jobparser.resilience.time.monotonic', return_value=100)
+    breaker = CircuitBreaker('fake', failures=2, reset_timeout=10)
+
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    with pytest.raises(SourceUnavailableError):
+        breaker.check()
+
+    monotonic.return_value = 111
+    breaker.check()
+    breaker.record_success()
+    assert not breaker.is_open
+
+
+def test_get_backoff_delay():
+    assert all(0 <= get_backoff_delay(a, 0.5, 10) <= min(10, 0.5 * 2 ** a) for a in range(8))
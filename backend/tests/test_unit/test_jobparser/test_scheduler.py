@@ -0,0 +1,74 @@
+from jobparser import regions, scheduler
+
+import asyncio
+import pytest
+from unittest import mock
+
+
+SCHEDULE = {
+    'interval': 100,
+    'min_interval': 10,
+    'max_interval': 1000,
+    'busy_threshold': 50,
+    'idle_factor': 1.5,
+}
+
+
+@pytest.mark.parametrize('interval,created,expected', [
+    (100, 50, 50),
+    (100, 10, 100),
+    (100, 0, 150),
+    (15, 100, 10),
+    (900, 0, 1000),
+])
+def test_get_next_interval(interval, created, expected):
+    assert scheduler.get_next_interval(interval, created, SCHEDULE) == expected
+
+
+def test_get_schedule_updates_defaults(mocker):
+    mocker.patch.dict(scheduler.SCHEDULER_CONFIG, {'parsers': SCHEDULE})
+
+    schedule = scheduler.get_schedule({'schedule': {'interval': 20}})
+
+    assert schedule == dict(SCHEDULE, interval=20)
+
+
+async def test_scheduler_adapts_interval_and_survives_errors(loop, mocker):
+    mocker.patch.dict(regions.PARSERS_CONFIG, {
+        'hh': {'is_active': True, 'schedule': SCHEDULE},
+        'vk': {'is_active': False},
+    }, clear=True)
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        if len(sleeps) == 3:
+            raise asyncio.CancelledError
+
+    mocker.patch('jobparser.scheduler.asyncio.sleep', fake_sleep)
+    run_parser = mock.AsyncMock(side_effect=[100, RuntimeError('source is down'), 0])
+    instance = scheduler.Scheduler(None, None, ['hh'])
+    mocker.patch.object(instance, 'run_parser', run_parser)
+
+    unit, = instance.units
+    assert (unit.parser_name, unit.region) == ('hh', 'khabarovsk')
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(instance.schedule_parser(unit), 3)
+
+    assert run_parser.await_count == 3
+    assert sleeps == [50, 50, 75]
+
+
+def test_scheduler_has_unit_of_every_region(mocker):
+    mocker.patch.dict(regions.PARSERS_CONFIG, {
+        'hh': {
+            'is_active': True,
+            'regions': [{'name': 'khabarovsk', 'area': 102}, {'name': 'vladivostok', 'area': 22}],
+            'schedule': SCHEDULE,
+        },
+    }, clear=True)
+    mocker.patch.object(regions, 'REGIONS', ['khabarovsk', 'vladivostok'])
+
+    instance = scheduler.Scheduler(None, None)
+
+    assert list(instance.intervals) == [('hh', 'khabarovsk'), ('hh', 'vladivostok')]
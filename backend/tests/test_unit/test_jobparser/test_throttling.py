@@ -0,0 +1,67 @@
+from jobparser.throttling import RateLimiter, get_concurrency_budget, get_rate_limiter
+
+import asyncio
+import time
+
+
+async def test_rate_limiter_keeps_rate(loop):
+    limiter = RateLimiter(rate=20, burst=1, max_concurrency=5, min_concurrency=5)
+
+    started_at = time.monotonic()
+    for _ in range(5):
+        await limiter.acquire()
+        await limiter.release(0.01, 200)
+
+    assert time.monotonic() - started_at >= 4 / 20 * 0.9
+
+
+async def test_rate_limiter_limits_concurrency(loop):
+    limiter = RateLimiter(max_concurrency=2, min_concurrency=2)
+    max_in_flight = 0
+
+    async def request():
+        nonlocal max_in_flight
+        await limiter.acquire()
+        max_in_flight = max(max_in_flight, limiter.in_flight)
+        await asyncio.sleep(0.01)
+        await limiter.release(None)
+
+    await asyncio.gather(*[request() for _ in range(6)])
+
+    assert max_in_flight == 2
+    assert limiter.in_flight == 0
+
+
+async def test_rate_limiter_aimd(loop):
+    limiter = RateLimiter(max_concurrency=4, min_concurrency=1, latency_threshold=1)
+
+    for _ in range(20):
+        await limiter.acquire()
+        await limiter.release(0.1, 200)
+    assert int(limiter.concurrency) == 4
+
+    await limiter.acquire()
+    await limiter.release(0.1, 429)
+    assert int(limiter.concurrency) == 2
+
+    await limiter.acquire()
+    await limiter.release(2, 200)
+    assert int(limiter.concurrency) == 1
+
+
+async def test_get_rate_limiter_is_shared_by_host(loop):
+    config = {'concurrency': 3, 'rate_limit': {'rate': 1}}
+
+    limiter = get_rate_limiter('api.hh.ru', config)
+
+    assert get_rate_limiter('api.hh.ru', {}) is limiter
+    assert get_rate_limiter('hh.ru', config) is not limiter
+    assert limiter.max_concurrency == 3
+    assert limiter.rate == 1
+
+
+async def test_get_concurrency_budget_is_shared_by_event_loop(loop):
+    budget = get_concurrency_budget(2)
+
+    assert get_concurrency_budget(5) is budget
+    assert get_concurrency_budget(None) is None
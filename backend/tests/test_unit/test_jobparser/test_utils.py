@@ -0,0 +1,229 @@
+from jobparser import utils
+from jobparser.base import BaseParser
+from jobparser.prefilter import KnownVacancies
+
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from unittest import mock
+
+
+class FakeParser(BaseParser):
+
+    base_url = 'https://fake.ru'
+    name = 'fake'
+
+    def __init__(self, pages, error=None):
+        super().__init__(None, {'parse_url': self.base_url})
+        self.pages = pages
+        self.error = error
+
+    async def iter_vacancies(self):
+        for page in self.pages:
+            await asyncio.sleep(0)
+            yield page
+        if self.error is not None:
+            raise self.error
+
+
+class HangingParser(FakeParser):
+
+    name = 'hanging'
+
+    async def iter_vacancies(self):
+        for page in self.pages:
+            self.high_water_mark = datetime.now(tz=timezone.utc)
+            yield page
+        await asyncio.sleep(10)
+
+
+class FakeEngine:
+
+    def __init__(self):
+        self.conn = mock.Mock()
+
+    def acquire(self):
+        engine = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return engine.conn
+
+            async def __aexit__(self, *args):
+                pass
+
+        return Acquire()
+
+
+def make_pages(name, pages_count=5, per_page=3):
+    return [
+        [
+            {'name': 'job', 'source': 'https://{0}.ru/{1}/{2}'.format(name, p, i), 'source_name': name}
+            for i in range(per_page)
+        ] for p in range(pages_count)
+    ]
+
+
+@pytest.fixture
+def mock_upsert(aio_patch):
+    upsert = aio_patch('jobparser.utils.create_or_update_vacancy_batch')
+    upsert.side_effect = lambda conn, vacancies, **kwargs: (len(vacancies), 0)
+    aio_patch('jobparser.utils.link_duplicate_vacancies').return_value = {}
+    return upsert
+
+
+@pytest.fixture(autouse=True)
+def mock_checkpoints(aio_patch):
+    get_checkpoint = aio_patch('jobparser.utils.get_checkpoint')
+    get_checkpoint.return_value = None
+    aio_patch('jobparser.utils.save_ingestion_runs')
+    aio_patch('jobparser.utils.load_known_vacancies').return_value = KnownVacancies()
+    return (get_checkpoint, aio_patch('jobparser.utils.save_checkpoint'))
+
+
+@pytest.fixture
+def small_queue(mocker):
+    mocker.patch.dict(utils.INGESTION_CONFIG, {'queue_size': 2, 'writers': 2, 'chunk_size': 10})
+
+
+async def test_ingest_vacancies_success(loop, mock_upsert, small_queue):
+    parsers = [FakeParser(make_pages('a')), FakeParser(make_pages('b'))]
+
+    results = await asyncio.wait_for(utils.ingest_vacancies(parsers, FakeEngine()), 3)
+
+    assert mock_upsert.await_count == 10
+    assert [(s.pages, s.created, s.updated) for s in results] == [(5, 15, 0), (5, 15, 0)]
+
+
+async def test_ingest_vacancies_parser_error_does_not_stop_others(
+    loop, mock_upsert, small_queue
+):
+    healthy = FakeParser(make_pages('healthy'))
+    broken = FakeParser(make_pages('broken', pages_count=1), error=RuntimeError('down'))
+
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(utils.ingest_vacancies([broken, healthy], FakeEngine()), 3)
+
+    saved_sources = {
+        v['source'] for call in mock_upsert.await_args_list for v in call.args[1]
+    }
+    expected = {v['source'] for page in healthy.pages + broken.pages for v in page}
+    assert saved_sources == expected
+
+
+async def test_ingest_vacancies_writer_error(loop, mock_upsert, small_queue):
+    mock_upsert.side_effect = ValueError('bad row')
+    parsers = [FakeParser(make_pages('a', pages_count=20))]
+
+    with pytest.raises(ValueError):
+        await asyncio.wait_for(utils.ingest_vacancies(parsers, FakeEngine()), 3)
+
+
+async def test_ingest_vacancies_writer_error_after_parsing(loop, mock_upsert, small_queue):
+    async def slow_fail(conn, vacancies, **kwargs):
+        await asyncio.sleep(0.01)
+        raise ValueError('bad row')
+
+    mock_upsert.side_effect = slow_fail
+    parsers = [FakeParser(make_pages('a', pages_count=2))]
+
+    with pytest.raises(ValueError):
+        await asyncio.wait_for(utils.ingest_vacancies(parsers, FakeEngine()), 3)
+
+
+async def test_ingest_vacancies_run_deadline_saves_fetched_pages(
+    loop, mock_upsert, mock_checkpoints, small_queue
+):
+    hanging = HangingParser(make_pages('hanging', pages_count=2))
+    healthy = FakeParser(make_pages('healthy'))
+    healthy.high_water_mark = datetime.now(tz=timezone.utc)
+
+    results = await asyncio.wait_for(
+        utils.ingest_vacancies([hanging, healthy], FakeEngine(), deadline=0.1),
+        3,
+    )
+
+    assert [(s.pages, s.created, s.is_truncated) for s in results] == [(2, 6, True), (5, 15, False)]
+    assert results[0].get_run_data()['is_truncated']
+    _, save_checkpoint = mock_checkpoints
+    assert [c.args[1] for c in save_checkpoint.await_args_list] == ['fake']
+
+
+async def test_ingest_vacancies_parser_deadline(loop, mock_upsert, small_queue):
+    hanging = HangingParser(make_pages('hanging', pages_count=1))
+    hanging.config['deadline'] = 0.05
+
+    results = await asyncio.wait_for(utils.ingest_vacancies([hanging], FakeEngine()), 3)
+
+    assert (results[0].created, results[0].is_truncated) == (3, True)
+
+
+async def test_ingest_vacancies_touches_known_vacancies(loop, mock_upsert, small_queue, aio_patch):
+    pages = make_pages('a', pages_count=2)
+    known = KnownVacancies()
+    known.add(pages[0] + pages[1][:1])
+    aio_patch('jobparser.utils.load_known_vacancies').return_value = known
+    touch = aio_patch('jobparser.utils.touch_vacancies')
+
+    results = await asyncio.wait_for(utils.ingest_vacancies([FakeParser(pages)], FakeEngine()), 3)
+
+    assert mock_upsert.await_count == 1
+    assert [v['source'] for v in mock_upsert.await_args.args[1]] == [
+        v['source'] for v in pages[1][1:]
+    ]
+    assert sorted(c.args[1] for c in touch.await_args_list) == [
+        [v['source'] for v in pages[0]], [pages[1][0]['source']],
+    ]
+    assert [(s.pages, s.created, s.skipped) for s in results] == [(2, 2, 4)]
+
+
+async def test_ingest_vacancies_without_prefilter(loop, mock_upsert, small_queue, mocker, aio_patch):
+    mocker.patch.dict(utils.INGESTION_CONFIG, {'prefilter_days': None})
+    touch = aio_patch('jobparser.utils.touch_vacancies')
+
+    await asyncio.wait_for(utils.ingest_vacancies([FakeParser(make_pages('a'))], FakeEngine()), 3)
+
+    utils.load_known_vacancies.assert_not_awaited()
+    touch.assert_not_awaited()
+    assert mock_upsert.await_count == 5
+
+
+async def test_ingest_vacancies_rejects_invalid_vacancies(loop, mock_upsert, small_queue, aio_patch):
+    save_rejects = aio_patch('jobparser.utils.save_vacancy_rejects')
+    page = make_pages('a', pages_count=1)[0]
+    page[0]['source_name'] = 'a' * 17
+    page[1]['name'] = '  '
+
+    stats, = await asyncio.wait_for(utils.ingest_vacancies([FakeParser([page])], FakeEngine()), 3)
+
+    assert [v['source'] for v in mock_upsert.await_args.args[1]] == [page[2]['source']]
+    assert (stats.vacancies, stats.created, stats.rejected, stats.skipped) == (3, 1, 2, 0)
+    rejects = save_rejects.await_args.args[1]
+    assert [(r['parser_name'], r['reason']) for r in rejects] == [
+        ('fake', 'source_name is longer than 16'), ('fake', 'empty name'),
+    ]
+    assert rejects[0]['data'] == page[0]
+    assert stats.rejects == []
+
+
+async def test_ingest_vacancies_saves_page_by_rows_on_data_error(
+    loop, mock_upsert, small_queue, aio_patch
+):
+    save_rejects = aio_patch('jobparser.utils.save_vacancy_rejects')
+    page = make_pages('a', pages_count=1)[0]
+
+    def upsert(conn, vacancies, **kwargs):
+        if any(v['source'] == page[1]['source'] for v in vacancies):
+            raise utils.psycopg2.DataError('value too long\nDETAIL: row')
+        return (len(vacancies), 0)
+
+    mock_upsert.side_effect = upsert
+
+    stats, = await asyncio.wait_for(utils.ingest_vacancies([FakeParser([page])], FakeEngine()), 3)
+
+    assert mock_upsert.await_count == 4
+    assert (stats.created, stats.rejected) == (2, 1)
+    reject, = save_rejects.await_args.args[1]
+    assert reject['reason'] == 'value too long'
+    assert reject['data']['source'] == page[1]['source']
+    assert 'minhash' not in reject['data']
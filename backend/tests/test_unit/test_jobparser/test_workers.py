@@ -0,0 +1,136 @@
+from jobparser import registry, workers
+from jobparser.base import BaseParser, ParserConfigError
+from jobparser.client import FetchStats
+from jobparser.utils import IngestionStats
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+class PagedParser(BaseParser):
+
+    base_url = 'https://paged.ru'
+    name = 'paged'
+
+    supports_page_shards = True
+
+    async def iter_vacancies(self):
+        async for page in self.fetch_pages(self.fetch_page, lambda data: 5):
+            yield [page]
+
+    async def fetch_page(self, page):
+        return {'page': page}
+
+
+class SingleParser(PagedParser):
+
+    name = 'single'
+
+    supports_page_shards = False
+
+
+REGISTRY = {'paged': PagedParser, 'single': SingleParser}
+
+
+def make_config(**options):
+    return dict({'parse_url': 'https://paged.ru', 'is_active': True}, **options)
+
+
+@pytest.fixture(autouse=True)
+def paged_parsers(mocker):
+    mocker.patch.dict(registry.PARSERS_REGISTRY, REGISTRY)
+
+
+def test_plan_shards_splits_pages_of_shardable_parsers():
+    plan = workers.plan_shards(
+        3,
+        parsers_config={'paged': make_config(), 'single': make_config()},
+    )
+
+    assert [[(s.parser_class.name, s.shard, s.shards) for s in shards] for shards in plan] == [
+        [('paged', 0, 3), ('single', 0, 1)],
+        [('paged', 1, 3)],
+        [('paged', 2, 3)],
+    ]
+
+
+def test_plan_shards_respects_max_shards_and_active_parsers():
+    plan = workers.plan_shards(
+        4,
+        parsers_config={
+            'paged': make_config(max_shards=2),
+            'single': make_config(is_active=False),
+        },
+    )
+
+    assert [[(s.shard, s.shards) for s in shards] for shards in plan] == [[(0, 2)], [(1, 2)]]
+
+
+def test_plan_shards_spreads_regions_between_workers():
+    plan = workers.plan_shards(
+        2,
+        parsers_config={
+            'single': make_config(regions=[{'name': 'khabarovsk'}, {'name': 'vladivostok'}]),
+        },
+        regions=['khabarovsk', 'vladivostok'],
+    )
+
+    assert [[s.config['region']['name'] for s in shards] for shards in plan] == [
+        ['khabarovsk'], ['vladivostok'],
+    ]
+
+
+@pytest.mark.parametrize('budget,workers_count,expected', [
+    (16, 4, 4),
+    (16, 3, 5),
+    (2, 4, 1),
+    (None, 4, None),
+])
+def test_get_worker_budget(budget, workers_count, expected):
+    assert workers.get_worker_budget(budget, workers_count) == expected
+
+
+async def test_shards_load_every_page_once(loop):
+    pages = []
+    for shard in range(3):
+        parser = PagedParser(None, make_config())
+        parser.set_shard(shard, 3)
+        pages.extend(page['page'] for page in await parser.get_vacancies())
+
+    assert sorted(pages) == [0, 1, 2, 3, 4]
+
+
+def test_set_shard_of_not_shardable_parser_raises_error():
+    parser = SingleParser(None, make_config())
+
+    with pytest.raises(ParserConfigError):
+        parser.set_shard(1, 2)
+
+
+def test_merge_shards_stats():
+    now = datetime.now(tz=timezone.utc)
+    stats = []
+    for shard in range(2):
+        fetch_stats = FetchStats()
+        fetch_stats.response_received(0.1 * (shard + 1), 100)
+        shard_stats = IngestionStats('paged', fetch_stats)
+        shard_stats.page_queued(10)
+        shard_stats.page_saved(created=5, updated=2)
+        shard_stats.high_water_mark = now - timedelta(minutes=shard)
+        stats.append(shard_stats)
+    stats[1].error = RuntimeError('Source is down')
+    stats.append(IngestionStats('single', region='khabarovsk'))
+    stats.append(IngestionStats('single', region='vladivostok'))
+
+    merged = workers.merge_shards_stats(stats)
+
+    assert [(s.parser_name, s.region) for s in merged] == [
+        ('paged', None), ('single', 'khabarovsk'), ('single', 'vladivostok'),
+    ]
+    paged = merged[0]
+    assert (paged.pages, paged.vacancies, paged.created, paged.updated) == (2, 20, 10, 4)
+    assert paged.high_water_mark == now
+    assert isinstance(paged.error, RuntimeError)
+    assert (paged.fetch_stats.requests, paged.fetch_stats.bytes) == (2, 200)
+    assert paged.fetch_stats.get_latency_percentile(100) == pytest.approx(0.2)